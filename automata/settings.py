@@ -46,6 +46,7 @@ TAILWIND_APP_NAME = 'theme'
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.instrumentation.InstrumentationMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -91,6 +92,23 @@ DATABASES = {
 
 
 
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Simulation traces (core.traces) are stored by one request and paged by
+# later ones, which may be served by another process or host, so they live
+# in the shared database. Create the table with `python manage.py createcachetable`.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'traces': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'core_trace_cache',
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -132,6 +150,45 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Requests to core views issuing more SQL queries than this are logged
+# by core.instrumentation as likely N+1 regressions
+CORE_QUERY_WARNING_THRESHOLD = 50
+
+# Worker threads per process running minimize/to_dfa jobs (core.jobs);
+# CORE_JOBS_EAGER runs them inline in the submitting request instead
+CORE_JOB_WORKERS = 2
+CORE_JOBS_EAGER = False
+
+# Jobs still running this many seconds after they started are failed when
+# a worker pool starts, as their process is assumed to have died
+CORE_JOB_STALE_SECONDS = 30 * 60
+
+# UserHistory rows are buffered (core.history) and bulk inserted once this
+# many are pending or the oldest is this many seconds old
+CORE_HISTORY_BUFFER_SIZE = 100
+CORE_HISTORY_FLUSH_INTERVAL = 5
+
+# Seconds the detailed steps of a minimization or conversion are kept in
+# the result store (core.models.ResultSteps)
+CORE_RESULT_STEPS_TTL = 7 * 24 * 3600
+
+# Seconds compact simulation traces stay in the cache for paging, and the
+# CACHES alias they are stored in (core.traces)
+CORE_TRACE_TTL = 60 * 60
+CORE_TRACE_CACHE = 'traces'
+
+# Batch simulations of at least CORE_PARALLEL_MIN_STRINGS strings are spread
+# over this many worker processes (core.parallel); 0 or 1 keeps them in the
+# request's process
+CORE_SIMULATION_WORKERS = 0
+CORE_PARALLEL_MIN_STRINGS = 20000
+
+# Limits of an NFA to DFA conversion; larger constructions are aborted
+# before anything is written
+CORE_DFA_MAX_STATES = 10000
+CORE_DFA_MAX_TRANSITIONS = 250000
+CORE_DFA_MAX_SECONDS = 60
+
 # Authentication settings
 LOGIN_URL = '/accounts/login/'
 LOGIN_REDIRECT_URL = '/automata/'
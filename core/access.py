@@ -0,0 +1,70 @@
+"""
+Resolution of which automata a user can see.
+
+A user can open their own automata plus the shared examples, which are owned
+either by nobody or by the ``system`` user. Visibility is expressed as a single
+``Q`` so that looking an automaton up costs one query, and the system user's
+id is memoized for the life of the process once it has been found. Until
+then it is looked up again on every use, since the system user is usually
+created by a management command running in another process.
+"""
+from django.contrib.auth.models import User
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import Http404
+
+from .models import Automaton
+
+SYSTEM_USERNAME = 'system'
+
+_UNRESOLVED = object()
+_system_user_id = _UNRESOLVED
+
+
+def get_system_user_id():
+    """Returns the pk of the system user, or None if there is none yet."""
+    global _system_user_id
+    if _system_user_id is _UNRESOLVED:
+        system_user_id = User.objects.filter(username=SYSTEM_USERNAME).values_list('pk', flat=True).first()
+        if system_user_id is None:
+            return None
+        _system_user_id = system_user_id
+    return _system_user_id
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def reset_system_user_id(sender, instance, **kwargs):
+    """Forgets the memoized system user id when the system user changes."""
+    global _system_user_id
+    if instance.username == SYSTEM_USERNAME:
+        _system_user_id = _UNRESOLVED
+
+
+def system_owner_q():
+    """Q matching the shared examples (no owner or owned by the system user)."""
+    system_user_id = get_system_user_id()
+    if system_user_id is None:
+        return Q(owner=None)
+    return Q(owner=None) | Q(owner_id=system_user_id)
+
+
+def visible_to_q(user):
+    """Q matching every automaton the user is allowed to open."""
+    if user is None or not user.is_authenticated:
+        return system_owner_q()
+    return Q(owner=user) | system_owner_q()
+
+
+def visible_automata(user):
+    """Queryset of the automata the user owns plus the shared examples."""
+    return Automaton.objects.filter(visible_to_q(user))
+
+
+def get_automaton_instance(pk, user):
+    """Fetches the automaton instance, ensuring ownership or system access."""
+    try:
+        return visible_automata(user).get(pk=pk)
+    except Automaton.DoesNotExist:
+        raise Http404("No Automaton found matching the query or you don't have permission.")
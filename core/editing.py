@@ -0,0 +1,246 @@
+"""
+Batched editing of an automaton's states and transitions.
+
+The editor endpoints change one state or transition per request. A batch is a
+list of operations (add or remove states and transitions, toggle flags) that
+is checked in memory against a single snapshot of the automaton, so an invalid
+operation rejects the whole batch before anything is written. A valid batch is
+applied with bulk deletes, updates and inserts inside one transaction, and the
+stored JSON is patched once.
+
+Operations are dicts with an ``op`` key. States are referenced by name, so
+a batch can connect states it creates itself:
+
+    {"op": "add_state", "name": "q1", "is_start": false, "is_final": true}
+    {"op": "remove_state", "state": "q1"}
+    {"op": "add_transition", "from": "q0", "to": "q1", "symbol": "a-z"}
+    {"op": "remove_transition", "transition_pk": 42}
+    {"op": "toggle_final", "state": "q1"}
+    {"op": "set_start", "state": "q0"}
+"""
+from collections import defaultdict
+
+from django.db import transaction
+
+from .models import Automaton, State, Transition, SYMBOL_MAX_LENGTH, BULK_BATCH_SIZE
+from .symbols import EPSILON, parse_symbol_class
+
+# Upper bound on the number of operations accepted in one batch
+MAX_EDIT_OPERATIONS = 10000
+
+
+class EditError(ValueError):
+    """An operation of a batch that cannot be applied."""
+
+    def __init__(self, index, message):
+        self.index = index
+        super().__init__(f"Operation {index + 1}: {message}")
+
+
+class _PendingState:
+    """A state as it will be after the batch; pk is None for states the batch creates."""
+
+    def __init__(self, pk, name, is_start, is_final):
+        self.pk = pk
+        self.name = name
+        self.is_start = is_start
+        self.is_final = is_final
+        self.original = (is_start, is_final)
+
+    @property
+    def changed(self):
+        return self.pk is not None and (self.is_start, self.is_final) != self.original
+
+
+class _PendingTransition:
+    def __init__(self, pk, source, target, symbol):
+        self.pk = pk
+        self.source = source
+        self.target = target
+        self.symbol = symbol
+        self.symbol_class = parse_symbol_class(symbol)
+
+
+class EditBatch:
+    """
+    Validates a list of edit operations against a snapshot of the automaton
+    and applies them. ``validate`` raises EditError for the first invalid
+    operation; ``apply`` writes the result and returns the JSON delta.
+    """
+
+    def __init__(self, automaton, operations):
+        self.automaton = automaton
+        self.operations = operations
+        self.automaton_type = automaton.get_type()
+        self.alphabet = automaton.get_alphabet_class()
+
+        self.states = {}
+        for pk, name, is_start, is_final in automaton.states.values_list('pk', 'name', 'is_start', 'is_final'):
+            self.states[name] = _PendingState(pk, name, is_start, is_final)
+        by_pk = {state.pk: state for state in self.states.values()}
+        self.transitions = {}
+        self.outgoing = defaultdict(list)
+        for pk, from_pk, to_pk, symbol in automaton.transitions.values_list(
+            'pk', 'from_state_id', 'to_state_id', 'symbol'
+        ):
+            if from_pk in by_pk and to_pk in by_pk:
+                pending = _PendingTransition(pk, by_pk[from_pk], by_pk[to_pk], symbol)
+                self.transitions[pk] = pending
+                self.outgoing[pending.source].append(pending)
+
+        self.had_states = bool(self.states)
+        self.removed_states = []
+        self.removed_transition_pks = []
+        self.added_transitions = []
+        self.counts = {}
+
+    # --- Validation ---
+
+    def validate(self):
+        if not isinstance(self.operations, list):
+            raise EditError(0, "Operations must be a list.")
+        if len(self.operations) > MAX_EDIT_OPERATIONS:
+            raise EditError(MAX_EDIT_OPERATIONS, f"At most {MAX_EDIT_OPERATIONS} operations are accepted per batch.")
+
+        explicit_start = False
+        for index, operation in enumerate(self.operations):
+            if not isinstance(operation, dict):
+                raise EditError(index, "Each operation must be an object.")
+            op = operation.get('op')
+            handler = getattr(self, f'_op_{op}', None) if isinstance(op, str) else None
+            if handler is None:
+                raise EditError(index, f"Unknown operation '{op}'.")
+            handler(index, operation)
+            self.counts[op] = self.counts.get(op, 0) + 1
+            explicit_start = explicit_start or op == 'set_start' or (op == 'add_state' and operation.get('is_start'))
+
+        # As with add_state, the first state of an empty automaton becomes the start state
+        if not self.had_states and not explicit_start and self.states:
+            next(iter(self.states.values())).is_start = True
+
+    def _state(self, index, operation, key='state'):
+        name = operation.get(key)
+        state = self.states.get(name.strip()) if isinstance(name, str) else None
+        if state is None:
+            raise EditError(index, f"State '{name}' not found.")
+        return state
+
+    def _make_start(self, state):
+        for other in self.states.values():
+            other.is_start = False
+        state.is_start = True
+
+    def _op_add_state(self, index, operation):
+        name = operation.get('name')
+        name = name.strip() if isinstance(name, str) else ''
+        if not name:
+            raise EditError(index, "State name cannot be empty.")
+        if name in self.states:
+            raise EditError(index, f"State '{name}' already exists.")
+        state = _PendingState(None, name, False, bool(operation.get('is_final')))
+        self.states[name] = state
+        if operation.get('is_start'):
+            self._make_start(state)
+
+    def _op_remove_state(self, index, operation):
+        state = self._state(index, operation)
+        del self.states[state.name]
+        if state.pk is not None:
+            self.removed_states.append(state)
+        for pk, existing in list(self.transitions.items()):
+            if existing.source is state or existing.target is state:
+                del self.transitions[pk]
+        self.added_transitions = [
+            t for t in self.added_transitions if t.source is not state and t.target is not state
+        ]
+        self.outgoing.pop(state, None)
+        for source, transitions in self.outgoing.items():
+            transitions[:] = [t for t in transitions if t.target is not state]
+
+    def _op_add_transition(self, index, operation):
+        source = self._state(index, operation, 'from')
+        target = self._state(index, operation, 'to')
+        symbol = operation.get('symbol') or ''
+        if not isinstance(symbol, str):
+            raise EditError(index, "Symbol must be a string.")
+        symbol = symbol.strip()
+        if len(symbol) > SYMBOL_MAX_LENGTH:
+            raise EditError(index, f"Symbol is longer than {SYMBOL_MAX_LENGTH} characters.")
+
+        symbol_class = parse_symbol_class(symbol)
+        if symbol_class.epsilon and self.automaton_type != 'NFA' and not self.automaton.has_epsilon:
+            if not symbol:
+                raise EditError(index, "Symbol cannot be empty.")
+            raise EditError(index, f"Symbol '{EPSILON}' is not in the alphabet.")
+        symbol = symbol or EPSILON
+        outside = symbol_class.without_epsilon().difference(self.alphabet)
+        if outside:
+            raise EditError(index, f"Symbol '{next(iter(outside))}' is not in the alphabet.")
+
+        # For DFAs, ensure no two transitions from the same state share a symbol
+        if self.automaton_type == 'DFA':
+            for existing in self.outgoing[source]:
+                if existing.symbol_class.intersection(symbol_class):
+                    raise EditError(index, "This DFA already has a transition for this state and symbol.")
+
+        pending = _PendingTransition(None, source, target, symbol)
+        self.added_transitions.append(pending)
+        self.outgoing[source].append(pending)
+
+    def _op_remove_transition(self, index, operation):
+        pk = operation.get('transition_pk')
+        if not isinstance(pk, int) or pk not in self.transitions:
+            raise EditError(index, f"Transition {pk} not found.")
+        removed = self.transitions.pop(pk)
+        self.outgoing[removed.source].remove(removed)
+        self.removed_transition_pks.append(pk)
+
+    def _op_toggle_final(self, index, operation):
+        state = self._state(index, operation)
+        state.is_final = not state.is_final
+
+    def _op_set_start(self, index, operation):
+        self._make_start(self._state(index, operation))
+
+    # --- Writing ---
+
+    def apply(self):
+        """Writes the validated batch and the patched JSON in one transaction and returns the JSON delta."""
+        automaton = self.automaton
+        new_states = [state for state in self.states.values() if state.pk is None]
+        changed_states = [state for state in self.states.values() if state.changed]
+
+        with transaction.atomic():
+            if self.removed_transition_pks:
+                Transition.objects.filter(automaton=automaton, pk__in=self.removed_transition_pks).delete()
+            if self.removed_states:
+                State.objects.filter(automaton=automaton, pk__in=[s.pk for s in self.removed_states]).delete()
+            if changed_states:
+                State.objects.bulk_update(
+                    [State(pk=s.pk, automaton=automaton, name=s.name, is_start=s.is_start, is_final=s.is_final)
+                     for s in changed_states],
+                    ['is_start', 'is_final'], batch_size=BULK_BATCH_SIZE
+                )
+            created = State.objects.bulk_create([
+                State(automaton=automaton, name=s.name, is_start=s.is_start, is_final=s.is_final)
+                for s in new_states
+            ], batch_size=BULK_BATCH_SIZE)
+            for pending, state in zip(new_states, created):
+                pending.pk = state.pk
+            created_transitions = Transition.objects.bulk_create([
+                Transition(automaton=automaton, from_state_id=t.source.pk, to_state_id=t.target.pk, symbol=t.symbol)
+                for t in self.added_transitions
+            ], batch_size=BULK_BATCH_SIZE)
+
+            return automaton.apply_json_delta(
+                added_nodes=[Automaton.json_node(state) for state in created],
+                updated_nodes=[
+                    {'id': s.name, 'is_start': s.is_start, 'is_final': s.is_final} for s in changed_states
+                ],
+                removed_nodes=[s.name for s in self.removed_states],
+                added_edges=[
+                    Automaton.json_edge(transition, t.source.name, t.target.name)
+                    for t, transition in zip(self.added_transitions, created_transitions)
+                ],
+                removed_edges=self.removed_transition_pks,
+            )
@@ -0,0 +1,1479 @@
+"""
+Compiled in-memory representation of an Automaton.
+
+The model methods on ``Automaton`` walk ``State``/``Transition`` rows through
+the ORM, which costs a query per step. ``CompiledAutomaton`` is built from a
+single ``states`` query and a single ``transitions`` query, interns states and
+alphabet symbols to integers and stores the transition function in flat
+``array`` tables so the algorithms can run without touching the database.
+"""
+import hashlib
+import json
+import struct
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+
+from .symbols import SymbolClass, parse_symbol_class, partition_alphabet
+
+
+def iter_bits(mask):
+    """Yields the indices of the set bits of an int bitmask, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def structure_hash(states, transitions, alphabet, has_epsilon=False):
+    """
+    SHA-256 fingerprint of an automaton's structure.
+
+    states: iterable of (name, is_start, is_final)
+    transitions: iterable of (source_name, symbol, target_name), where symbol
+    is a transition symbol spec; the classes of all transitions between the
+    same two states are merged, so that ``a,b`` hashes the same as separate
+    ``a`` and ``b`` transitions.
+    alphabet: SymbolClass or iterable of symbols
+    The result does not depend on primary keys or on row order.
+    """
+    if not isinstance(alphabet, SymbolClass):
+        alphabet = SymbolClass.from_symbols(alphabet)
+    edges = {}
+    for source, spec, target in transitions:
+        symbol_class = parse_symbol_class(spec)
+        previous = edges.get((source, target))
+        edges[(source, target)] = symbol_class if previous is None else previous.union(symbol_class)
+    canonical = {
+        'alphabet': alphabet.spec(),
+        'has_epsilon': bool(has_epsilon),
+        'states': sorted([name, bool(is_start), bool(is_final)] for name, is_start, is_final in states),
+        'transitions': sorted(
+            [source, symbol_class.spec(), target]
+            for (source, target), symbol_class in edges.items()
+        ),
+    }
+    encoded = json.dumps(canonical, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+# Binary layout of a packed automaton structure, all integers little-endian:
+#   header       magic, format version (H), state count (I), transition count (I),
+#                symbol spec count (I) and the 64-byte structure hash it was packed for
+#   states       pks (q each), flags (B each: bit 0 start, bit 1 final), names (string table)
+#   symbols      the distinct transition symbol specs (string table)
+#   transitions  CSR rows: offsets into the transition arrays per source state
+#                (I, n + 1 of them), then per transition grouped by source and
+#                ordered by pk: target state index (I), symbol spec id (I), pk (q)
+# A string table is the end offset of every string (I each) followed by the
+# UTF-8 bytes of all of them.
+PACK_MAGIC = b'ATMN'
+PACK_VERSION = 1
+PACK_HEADER = struct.Struct('<4sHIII64s')
+
+FLAG_START = 1
+FLAG_FINAL = 2
+
+
+class PackFormatError(ValueError):
+    """Raised for a packed structure that is corrupt or of an unknown version."""
+
+
+def _array_bytes(typecode, values):
+    data = array(typecode, values)
+    if sys.byteorder == 'big':
+        data.byteswap()
+    return data.tobytes()
+
+
+def _read_array(typecode, data, offset, count):
+    result = array(typecode)
+    end = offset + result.itemsize * count
+    if end > len(data):
+        raise PackFormatError("Packed structure is truncated")
+    result.frombytes(data[offset:end])
+    if sys.byteorder == 'big':
+        result.byteswap()
+    return result, end
+
+
+def _string_table(strings):
+    encoded = [string.encode('utf-8') for string in strings]
+    ends = []
+    total = 0
+    for chunk in encoded:
+        total += len(chunk)
+        ends.append(total)
+    return _array_bytes('I', ends) + b''.join(encoded)
+
+
+def _read_string_table(data, offset, count):
+    ends, offset = _read_array('I', data, offset, count)
+    size = ends[-1] if count else 0
+    if offset + size > len(data):
+        raise PackFormatError("Packed structure is truncated")
+    blob = data[offset:offset + size]
+    strings = []
+    start = 0
+    for end in ends:
+        strings.append(blob[start:end].decode('utf-8'))
+        start = end
+    return strings, offset + size
+
+
+def pack_structure(states, transitions, structure_hash=''):
+    """
+    Packs states and transitions into the versioned binary layout above.
+
+    states: iterable of (pk, name, is_start, is_final)
+    transitions: iterable of (pk, from_state_pk, to_state_pk, symbol)
+    Returns None if a transition references a state that is not listed,
+    since such a transition cannot be represented.
+    """
+    state_pks = []
+    flags = bytearray()
+    names = []
+    index = {}
+    for pk, name, is_start, is_final in states:
+        index[pk] = len(state_pks)
+        state_pks.append(pk)
+        flags.append((FLAG_START if is_start else 0) | (FLAG_FINAL if is_final else 0))
+        names.append(name)
+
+    specs = {}
+    rows = [[] for _ in state_pks]
+    for pk, from_pk, to_pk, symbol in transitions:
+        source = index.get(from_pk)
+        target = index.get(to_pk)
+        if source is None or target is None:
+            return None
+        rows[source].append((pk, target, specs.setdefault(symbol, len(specs))))
+
+    offsets = [0]
+    targets = []
+    spec_ids = []
+    pks = []
+    for row in rows:
+        row.sort()
+        for pk, target, spec_id in row:
+            pks.append(pk)
+            targets.append(target)
+            spec_ids.append(spec_id)
+        offsets.append(len(pks))
+
+    header = PACK_HEADER.pack(
+        PACK_MAGIC, PACK_VERSION, len(state_pks), len(pks), len(specs),
+        structure_hash.encode('ascii')
+    )
+    return b''.join([
+        header,
+        _array_bytes('q', state_pks),
+        bytes(flags),
+        _string_table(names),
+        _string_table(specs),
+        _array_bytes('I', offsets),
+        _array_bytes('I', targets),
+        _array_bytes('I', spec_ids),
+        _array_bytes('q', pks),
+    ])
+
+
+def packed_structure_hash(data):
+    """Structure hash stored in a packed structure's header, or None if the header is not readable."""
+    data = bytes(data)
+    if len(data) < PACK_HEADER.size:
+        return None
+    magic, version, _, _, _, packed_hash = PACK_HEADER.unpack_from(data)
+    if magic != PACK_MAGIC or version != PACK_VERSION:
+        return None
+    return packed_hash.rstrip(b'\0').decode('ascii')
+
+
+def unpack_structure(data):
+    """
+    Decodes a packed structure into ``(states, transitions)`` in the forms
+    accepted by pack_structure, both ordered by pk.
+    """
+    data = bytes(data)
+    if len(data) < PACK_HEADER.size:
+        raise PackFormatError("Packed structure is truncated")
+    magic, version, n, m, spec_count, _ = PACK_HEADER.unpack_from(data)
+    if magic != PACK_MAGIC:
+        raise PackFormatError("Not a packed automaton structure")
+    if version != PACK_VERSION:
+        raise PackFormatError(f"Unsupported packed structure version {version}")
+
+    offset = PACK_HEADER.size
+    state_pks, offset = _read_array('q', data, offset, n)
+    flags = data[offset:offset + n]
+    offset += n
+    names, offset = _read_string_table(data, offset, n)
+    specs, offset = _read_string_table(data, offset, spec_count)
+    row_offsets, offset = _read_array('I', data, offset, n + 1)
+    targets, offset = _read_array('I', data, offset, m)
+    spec_ids, offset = _read_array('I', data, offset, m)
+    pks, offset = _read_array('q', data, offset, m)
+
+    states = [
+        (state_pks[i], names[i], bool(flags[i] & FLAG_START), bool(flags[i] & FLAG_FINAL))
+        for i in range(n)
+    ]
+    transitions = []
+    for source in range(n):
+        from_pk = state_pks[source]
+        for t in range(row_offsets[source], row_offsets[source + 1]):
+            transitions.append((pks[t], from_pk, state_pks[targets[t]], specs[spec_ids[t]]))
+    transitions.sort()
+    return states, transitions
+
+
+def packed_pk_totals(data):
+    """
+    (state count, sum of state pks, transition count, sum of transition pks)
+    of a packed structure, as CompiledAutomaton.pk_totals returns them.
+    """
+    states, transitions = unpack_structure(data)
+    return len(states), sum(state[0] for state in states), len(transitions), sum(t[0] for t in transitions)
+
+
+class BudgetExceeded(Exception):
+    """Raised when a construction outgrows its ConstructionBudget."""
+
+    def __init__(self, limit, maximum, subsets_discovered, transitions, elapsed_seconds):
+        self.limit = limit
+        self.maximum = maximum
+        self.subsets_discovered = subsets_discovered
+        self.transitions = transitions
+        self.elapsed_seconds = elapsed_seconds
+        super().__init__(
+            f"Budget exceeded: {limit} is limited to {maximum} "
+            f"(stopped after {subsets_discovered} DFA states, {transitions} transitions "
+            f"and {elapsed_seconds:.1f}s)"
+        )
+
+    def as_dict(self):
+        return {
+            'limit': self.limit,
+            'maximum': self.maximum,
+            'subsets_discovered': self.subsets_discovered,
+            'transitions': self.transitions,
+            'elapsed_seconds': round(self.elapsed_seconds, 3),
+        }
+
+
+class ConstructionBudget:
+    """
+    Limits on the number of DFA states, the number of transitions and the
+    wall time of a subset construction. A limit of None is unlimited.
+    """
+
+    def __init__(self, max_states=None, max_transitions=None, max_seconds=None):
+        self.max_states = max_states
+        self.max_transitions = max_transitions
+        self.max_seconds = max_seconds
+        self.started = time.monotonic()
+
+    def start(self):
+        self.started = time.monotonic()
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def check(self, states, transitions):
+        """Raises BudgetExceeded if any of the limits has been passed."""
+        if self.max_states is not None and states > self.max_states:
+            raise BudgetExceeded('max_states', self.max_states, states, transitions, self.elapsed)
+        if self.max_transitions is not None and transitions > self.max_transitions:
+            raise BudgetExceeded('max_transitions', self.max_transitions, states, transitions, self.elapsed)
+        if self.max_seconds is not None and self.elapsed > self.max_seconds:
+            raise BudgetExceeded('max_seconds', self.max_seconds, states, transitions, self.elapsed)
+
+
+class CompiledAutomaton:
+    """
+    Integer-indexed transition table for one automaton.
+
+    States are numbered ``0..n-1`` in primary key order. The alphabet is
+    split into symbol classes: the minterms of the transition symbol specs,
+    i.e. maximal sets of symbols that every transition either matches
+    entirely or not at all. Classes are numbered ``0..k-1`` by their smallest
+    symbol, so with plain single-symbol transitions every symbol is its own
+    class, while an alphabet of thousands of code points used through a few
+    ranges compiles to a handful of classes. ``symbols`` holds the class
+    labels (canonical specs such as ``a`` or ``a-z``) and ``symbol_index``
+    maps input symbols to class ids.
+
+    ``delta[state * k + class]`` holds the target of the first matching
+    transition (or -1), which is what DFA simulation needs;
+    ``delta_transition`` holds the index of that transition.
+
+    For NFAs, sets of states are Python ints used as bitmasks (bit ``i`` is
+    state ``i``). The ε-closure of every state and the ε-closed successor mask
+    of every (symbol, state) pair are precomputed on first use, so an input
+    step is an OR over the masks of the current states.
+    """
+
+    # Maximum number of (state set, symbol) steps memoized during one NFA run,
+    # and of state sets whose sorted names are cached
+    STEP_MEMO_SIZE = 4096
+
+    # Subsets discovered between two progress reports of the subset construction
+    PROGRESS_INTERVAL = 1024
+
+    # Alphabets up to this many symbols have symbol_index filled upfront;
+    # larger ones are classified on first use, up to the same number
+    SYMBOL_INDEX_SIZE = 4096
+
+    def __init__(self, states, transitions, alphabet):
+        """
+        states: iterable of (pk, name, is_start, is_final)
+        transitions: iterable of (pk, from_state_pk, to_state_pk, symbol)
+        alphabet: SymbolClass or iterable of alphabet symbols
+        """
+        self.state_pks = []
+        self.state_names = []
+        self.is_start = bytearray()
+        self.is_final = bytearray()
+        state_index = {}
+        for pk, name, is_start, is_final in states:
+            state_index[pk] = len(self.state_pks)
+            self.state_pks.append(pk)
+            self.state_names.append(name)
+            self.is_start.append(1 if is_start else 0)
+            self.is_final.append(1 if is_final else 0)
+        self.state_index = state_index
+
+        if not isinstance(alphabet, SymbolClass):
+            alphabet = SymbolClass.from_symbols(alphabet)
+        self.alphabet = alphabet
+
+        # Parallel arrays describing every transition row
+        self.transition_pks = array('q')
+        self.transition_from = array('l')
+        self.transition_to = array('l')
+        self.transition_epsilon = bytearray()
+        self.transition_spec_ids = array('l')
+
+        # Transitions whose endpoints are not states of this automaton
+        self.dangling_transitions = []
+
+        specs = {}
+        for pk, from_pk, to_pk, symbol in transitions:
+            source = state_index.get(from_pk)
+            target = state_index.get(to_pk)
+            if source is None or target is None:
+                self.dangling_transitions.append((pk, from_pk, to_pk))
+                continue
+            self.transition_pks.append(pk)
+            self.transition_from.append(source)
+            self.transition_to.append(target)
+            self.transition_spec_ids.append(specs.setdefault(symbol, len(specs)))
+
+        # Each distinct spec is parsed once and the alphabet partitioned by them
+        self.symbol_specs = list(specs)
+        spec_classes = [parse_symbol_class(spec) for spec in specs]
+        self.symbol_classes, spec_members = partition_alphabet(alphabet, spec_classes)
+        self.symbols = [symbol_class.spec() for symbol_class in self.symbol_classes]
+        self.transition_classes = [spec_members[i] for i in self.transition_spec_ids]
+        self.transition_epsilon.extend(1 if spec_classes[i].epsilon else 0 for i in self.transition_spec_ids)
+
+        # Class lookup by code point: _class_starts[j].._class_ends[j] belong to _class_ids[j]
+        self._class_starts = []
+        self._class_ends = []
+        self._class_ids = []
+        self._literal_classes = {}
+        for sym, symbol_class in enumerate(self.symbol_classes):
+            for lo, hi in symbol_class.intervals:
+                self._class_starts.append(lo)
+                self._class_ends.append(hi)
+                self._class_ids.append(sym)
+            for literal in symbol_class.literals:
+                self._literal_classes[literal] = sym
+        order = sorted(range(len(self._class_starts)), key=self._class_starts.__getitem__)
+        self._class_starts = [self._class_starts[j] for j in order]
+        self._class_ends = [self._class_ends[j] for j in order]
+        self._class_ids = [self._class_ids[j] for j in order]
+
+        self.symbol_index = dict(self._literal_classes)
+        if len(alphabet) <= self.SYMBOL_INDEX_SIZE:
+            for lo, hi, sym in zip(self._class_starts, self._class_ends, self._class_ids):
+                for code_point in range(lo, hi + 1):
+                    self.symbol_index[chr(code_point)] = sym
+
+        n = len(self.state_pks)
+        k = len(self.symbols)
+        self.delta = array('l', [-1]) * (n * k)
+        self.delta_transition = array('l', [-1]) * (n * k)
+        for t, classes in enumerate(self.transition_classes):
+            row = self.transition_from[t] * k
+            for sym in classes:
+                if self.delta[row + sym] < 0:
+                    self.delta[row + sym] = self.transition_to[t]
+                    self.delta_transition[row + sym] = t
+
+        self.start_states = [i for i in range(n) if self.is_start[i]]
+        self.final_mask = 0
+        for i in range(n):
+            if self.is_final[i]:
+                self.final_mask |= 1 << i
+        self._closures = None
+        self._outgoing = None
+        self._step_masks = None
+        self._mask_names = {}
+
+    @classmethod
+    def from_automaton(cls, automaton):
+        """Compiles an Automaton instance with two queries."""
+        states = automaton.states.order_by('pk').values_list('pk', 'name', 'is_start', 'is_final')
+        transitions = automaton.transitions.order_by('pk').values_list(
+            'pk', 'from_state_id', 'to_state_id', 'symbol'
+        )
+        return cls(states, transitions, automaton.get_alphabet_class())
+
+    @classmethod
+    def from_packed(cls, data, alphabet):
+        """
+        Compiles a structure packed by pack_structure without any query.
+        Raises PackFormatError if the data cannot be decoded.
+        """
+        states, transitions = unpack_structure(data)
+        return cls(states, transitions, alphabet)
+
+    def pack(self, structure_hash=''):
+        """Packs the compiled states and transitions, or returns None if some transitions dangle."""
+        if self.dangling_transitions:
+            return None
+        state_pks = self.state_pks
+        return pack_structure(
+            zip(state_pks, self.state_names, self.is_start, self.is_final),
+            (
+                (self.transition_pks[t], state_pks[self.transition_from[t]],
+                 state_pks[self.transition_to[t]], self.symbol_specs[self.transition_spec_ids[t]])
+                for t in range(len(self.transition_pks))
+            ),
+            structure_hash
+        )
+
+    def pk_totals(self):
+        """(state count, sum of state pks, transition count, sum of transition pks)."""
+        return len(self.state_pks), sum(self.state_pks), len(self.transition_pks), sum(self.transition_pks)
+
+    @property
+    def num_states(self):
+        return len(self.state_pks)
+
+    @property
+    def num_symbols(self):
+        """Number of symbol classes."""
+        return len(self.symbols)
+
+    def classify(self, symbol):
+        """
+        Returns the class id of an input symbol, or None if it is not in the
+        alphabet. Symbols missing from ``symbol_index`` are looked up in the
+        class intervals and then added to it, while it has room.
+        """
+        sym = self.symbol_index.get(symbol)
+        if sym is not None:
+            return sym
+        if len(symbol) == 1:
+            code_point = ord(symbol)
+            j = bisect_right(self._class_starts, code_point) - 1
+            if j < 0 or code_point > self._class_ends[j]:
+                return None
+            sym = self._class_ids[j]
+        else:
+            sym = self._literal_classes.get(symbol)
+            if sym is None:
+                return None
+        if len(self.symbol_index) < self.SYMBOL_INDEX_SIZE:
+            self.symbol_index[symbol] = sym
+        return sym
+
+    # --- Validation ---
+
+    def validate(self):
+        """
+        Checks the DFA and NFA rules in one pass over the states and the
+        transitions' symbol classes.
+
+        Returns ``{'dfa_problems': [...], 'nfa_problems': [...]}``. Each problem
+        is a dict with a ``code`` and a ``message`` plus ``state``/``symbol``
+        where relevant. Every NFA problem is also a DFA problem; the DFA list
+        additionally reports epsilon transitions and every nondeterministic or
+        missing (state, symbol) pair.
+        """
+        names = self.state_names
+        nfa_problems = []
+        dfa_problems = []
+
+        if not self.start_states:
+            nfa_problems.append({'code': 'no_start_state', 'message': "No start state defined"})
+        if not self.final_mask:
+            nfa_problems.append({'code': 'no_final_state', 'message': "No final state defined"})
+        for pk, from_pk, to_pk in self.dangling_transitions:
+            if from_pk not in self.state_index:
+                nfa_problems.append({
+                    'code': 'invalid_from_state',
+                    'message': f"Transition references invalid from_state: {from_pk}",
+                    'transition': pk
+                })
+            if to_pk not in self.state_index:
+                nfa_problems.append({
+                    'code': 'invalid_to_state',
+                    'message': f"Transition references invalid to_state: {to_pk}",
+                    'transition': pk
+                })
+
+        if not self.start_states:
+            dfa_problems.append(nfa_problems[0])
+        elif len(self.start_states) > 1:
+            dfa_problems.append({'code': 'multiple_start_states', 'message': "DFA must have exactly one start state"})
+        dfa_problems.extend(p for p in nfa_problems if p['code'] != 'no_start_state')
+
+        # Count matching transitions for every (state, symbol class) pair
+        k = self.num_symbols
+        coverage = [0] * (self.num_states * k)
+        for t, classes in enumerate(self.transition_classes):
+            source = self.transition_from[t]
+            if self.transition_epsilon[t]:
+                dfa_problems.append({
+                    'code': 'epsilon_transition',
+                    'message': "DFA cannot have epsilon transitions",
+                    'state': names[source],
+                    'transition': self.transition_pks[t]
+                })
+            row = source * k
+            for sym in classes:
+                coverage[row + sym] += 1
+
+        for state in range(self.num_states):
+            row = state * k
+            for sym, symbol in enumerate(self.symbols):
+                count = coverage[row + sym]
+                if count > 1:
+                    dfa_problems.append({
+                        'code': 'nondeterministic',
+                        'message': f"State '{names[state]}' has multiple transitions for symbol '{symbol}'",
+                        'state': names[state],
+                        'symbol': symbol
+                    })
+                elif count == 0:
+                    dfa_problems.append({
+                        'code': 'missing_transition',
+                        'message': f"State '{names[state]}' missing transition for symbol '{symbol}'",
+                        'state': names[state],
+                        'symbol': symbol
+                    })
+
+        return {'dfa_problems': dfa_problems, 'nfa_problems': nfa_problems}
+
+    # --- NFA tables ---
+
+    def _build_nfa_tables(self):
+        """Precomputes ε-closures and per-class successor masks."""
+        n = self.num_states
+        k = self.num_symbols
+
+        epsilon_targets = [[] for _ in range(n)]
+        for t in range(len(self.transition_pks)):
+            if self.transition_epsilon[t]:
+                epsilon_targets[self.transition_from[t]].append(self.transition_to[t])
+
+        closures = [0] * n
+        for state in range(n):
+            mask = 1 << state
+            stack = [state]
+            while stack:
+                for target in epsilon_targets[stack.pop()]:
+                    bit = 1 << target
+                    if not mask & bit:
+                        mask |= bit
+                        stack.append(target)
+            closures[state] = mask
+
+        step_masks = [[0] * n for _ in range(k)]
+        for t, classes in enumerate(self.transition_classes):
+            source = self.transition_from[t]
+            target_closure = closures[self.transition_to[t]]
+            for sym in classes:
+                step_masks[sym][source] |= target_closure
+
+        self._closures = closures
+        self._step_masks = step_masks
+
+    @property
+    def closures(self):
+        """ε-closure bitmask of every state."""
+        if self._closures is None:
+            self._build_nfa_tables()
+        return self._closures
+
+    @property
+    def step_masks(self):
+        """``step_masks[class][state]``: ε-closed successors of state on symbol class."""
+        if self._step_masks is None:
+            self._build_nfa_tables()
+        return self._step_masks
+
+    @property
+    def outgoing(self):
+        """Transition indices leaving each state, in primary key order."""
+        if self._outgoing is None:
+            outgoing = [[] for _ in range(self.num_states)]
+            for t, source in enumerate(self.transition_from):
+                outgoing[source].append(t)
+            self._outgoing = outgoing
+        return self._outgoing
+
+    def epsilon_closure(self, mask):
+        """Returns the ε-closure of a set of states given as a bitmask."""
+        closures = self.closures
+        result = 0
+        for state in iter_bits(mask):
+            result |= closures[state]
+        return result
+
+    def start_mask(self):
+        """ε-closure of the start states as a bitmask."""
+        mask = 0
+        for state in self.start_states:
+            mask |= 1 << state
+        return self.epsilon_closure(mask)
+
+    def step(self, mask, sym):
+        """Returns the ε-closed successor mask of ``mask`` on symbol class ``sym``."""
+        table = self.step_masks[sym]
+        result = 0
+        while mask:
+            low = mask & -mask
+            result |= table[low.bit_length() - 1]
+            mask ^= low
+        return result
+
+    def mask_names(self, mask):
+        """Sorted state names for a bitmask, cached per mask."""
+        names = self._mask_names.get(mask)
+        if names is None:
+            names = sorted(self.state_names[i] for i in iter_bits(mask))
+            if len(self._mask_names) < self.STEP_MEMO_SIZE:
+                self._mask_names[mask] = names
+        return names
+
+    # --- Simulation ---
+
+    def simulate_dfa(self, input_string, trace=True):
+        """
+        Runs the input through the deterministic transition table.
+        Returns the same tuples as ``Automaton._simulate_dfa``. With
+        ``trace=False`` no path is recorded and the path values are empty.
+        """
+        if not self.start_states:
+            return False, "No start state defined.", []
+
+        if not trace:
+            return self._run_dfa(input_string)
+
+        names = self.state_names
+        symbol_index = self.symbol_index
+        delta = self.delta
+        delta_transition = self.delta_transition
+        transition_pks = self.transition_pks
+        k = len(self.symbols)
+
+        current = self.start_states[0]
+        path = [names[current]]
+        detailed_path = {
+            'states': [names[current]],
+            'transitions': [],
+            'symbols': []
+        }
+
+        for symbol in input_string:
+            sym = symbol_index.get(symbol)
+            if sym is None:
+                sym = self.classify(symbol)
+                if sym is None:
+                    return False, f"Input symbol '{symbol}' is not in the alphabet.", path
+
+            cell = current * k + sym
+            target = delta[cell]
+            if target < 0:
+                return False, f"No transition found from state '{names[current]}' on symbol '{symbol}'.", path
+
+            detailed_path['transitions'].append([{
+                'from_state': names[current],
+                'to_state': names[target],
+                'symbol': symbol,
+                'transition_id': transition_pks[delta_transition[cell]]
+            }])
+            current = target
+            path.append(names[current])
+            detailed_path['states'].append(names[current])
+            detailed_path['symbols'].append(symbol)
+
+        return bool(self.is_final[current]), "Simulation completed.", path, detailed_path
+
+    def _run_dfa(self, input_string):
+        """DFA simulation that only tracks the current state."""
+        symbol_index = self.symbol_index
+        delta = self.delta
+        k = len(self.symbols)
+        current = self.start_states[0]
+
+        for symbol in input_string:
+            sym = symbol_index.get(symbol)
+            if sym is None:
+                sym = self.classify(symbol)
+                if sym is None:
+                    return False, f"Input symbol '{symbol}' is not in the alphabet.", []
+            target = delta[current * k + sym]
+            if target < 0:
+                return False, f"No transition found from state '{self.state_names[current]}' on symbol '{symbol}'.", []
+            current = target
+
+        return bool(self.is_final[current]), "Simulation completed.", [], {}
+
+    def simulate_nfa(self, input_string, trace=True):
+        """
+        Runs the input over bitmask state sets.
+        Returns the same tuples as ``Automaton._simulate_nfa``. With
+        ``trace=False`` no path is recorded and the path values are empty.
+        """
+        # Inputs tend to revisit the same few state sets, so successor masks
+        # are memoized for the duration of the run
+        return LazyDFA(self, self.STEP_MEMO_SIZE).simulate(input_string, trace=trace)
+
+    def _transitions_taken(self, mask, sym, symbol):
+        """Lists the transitions leaving the states of ``mask`` on ``symbol`` of class ``sym``."""
+        names = self.state_names
+        outgoing = self.outgoing
+        taken = []
+        for source in iter_bits(mask):
+            for t in outgoing[source]:
+                if sym in self.transition_classes[t]:
+                    taken.append({
+                        'from_state': names[source],
+                        'to_state': names[self.transition_to[t]],
+                        'symbol': symbol,
+                        'transition_id': self.transition_pks[t]
+                    })
+        return taken
+
+    # --- Subset construction ---
+
+    def subset_construction(self, progress=None, budget=None):
+        """
+        Determinizes the automaton over bitmask state sets.
+
+        Returns ``(subsets, transitions)``: ``subsets`` lists the reachable
+        NFA state sets as bitmasks in discovery order (index 0 is the
+        ε-closure of the start states) and ``transitions`` lists
+        ``(from_index, symbol_id, to_index)``. Empty target sets are skipped,
+        so no dead state is produced.
+
+        ``progress``, if given, is called with the number of subsets
+        discovered so far every ``PROGRESS_INTERVAL`` subsets and at the end.
+        ``budget``, if given, is a ConstructionBudget checked after every
+        subset is expanded; BudgetExceeded propagates to the caller.
+        """
+        start = self.start_mask()
+        index = {start: 0}
+        subsets = [start]
+        transitions = []
+        k = self.num_symbols
+        if budget is not None:
+            budget.start()
+
+        head = 0
+        while head < len(subsets):
+            mask = subsets[head]
+            for sym in range(k):
+                next_mask = self.step(mask, sym)
+                if not next_mask:
+                    continue
+                target = index.get(next_mask)
+                if target is None:
+                    target = len(subsets)
+                    index[next_mask] = target
+                    subsets.append(next_mask)
+                    if progress is not None and len(subsets) % self.PROGRESS_INTERVAL == 0:
+                        progress(len(subsets))
+                transitions.append((head, sym, target))
+            head += 1
+            if budget is not None:
+                budget.check(len(subsets), len(transitions))
+
+        if progress is not None:
+            progress(len(subsets))
+        return subsets, transitions
+
+    # --- Minimization ---
+
+    def minimize_partition(self, record_rounds=True, progress=None):
+        """
+        Computes the Myhill-Nerode equivalence classes with Hopcroft's
+        algorithm over the integer transition table.
+
+        Returns ``(classes, rounds)``. ``classes`` is a list of lists of state
+        indices. ``rounds`` holds the partition after P₀, after every round of
+        splitters that refined it and the final stable partition; intermediate
+        rounds are ``None`` when ``record_rounds`` is False. A round is one pass
+        over the splitters queued when it started.
+
+        ``progress``, if given, is called after every round with the number
+        of rounds completed and the current number of blocks.
+        """
+        n = self.num_states
+        k = self.num_symbols
+        delta = self.delta
+
+        # Missing transitions go to an implicit non-final sink state
+        sink = n if -1 in delta else None
+        total = n + 1 if sink is not None else n
+
+        # Inverse transitions per symbol in CSR form: the predecessors of q on
+        # symbol a are inverse[a][inverse_start[a][q]:inverse_start[a][q + 1]]
+        inverse = []
+        inverse_start = []
+        for a in range(k):
+            column = [sink if t < 0 else t for t in delta[a::k]] if k else []
+            if sink is not None:
+                column.append(sink)
+            counts = [0] * (total + 1)
+            for t in column:
+                counts[t + 1] += 1
+            for q in range(total):
+                counts[q + 1] += counts[q]
+            fill = counts[:]
+            sources = [0] * total
+            for p, t in enumerate(column):
+                sources[fill[t]] = p
+                fill[t] += 1
+            inverse.append(sources)
+            inverse_start.append(counts)
+
+        # Refinable partition: block b owns elems[start[b]:end[b]] and
+        # elems[start[b]:mid[b]] are the states marked by the current splitter
+        finals = [q for q in range(n) if self.is_final[q]]
+        non_finals = [q for q in range(total) if q >= n or not self.is_final[q]]
+        elems = []
+        start, end = [], []
+        block_of = [0] * total
+        for group in (finals, non_finals):
+            if group:
+                for q in group:
+                    block_of[q] = len(start)
+                start.append(len(elems))
+                elems.extend(group)
+                end.append(len(elems))
+        mid = start[:]
+        loc = [0] * total
+        for i, q in enumerate(elems):
+            loc[q] = i
+
+        def snapshot():
+            partition = []
+            for b in range(len(start)):
+                group = sorted(q for q in elems[start[b]:end[b]] if q != sink)
+                if group:
+                    partition.append(group)
+            return partition
+
+        rounds = [snapshot()]
+
+        # Worklist of (block, symbol) splitters; P₀ is split by the smaller block
+        queue = []
+        pending = set()
+        if len(start) == 2:
+            seed = 0 if end[0] - start[0] <= end[1] - start[1] else 1
+            for a in range(k):
+                queue.append((seed, a))
+                pending.add((seed, a))
+        head = 0
+        completed_rounds = 0
+
+        while head < len(queue):
+            round_end = len(queue)
+            refined = False
+            while head < round_end:
+                splitter, a = queue[head]
+                head += 1
+                pending.discard((splitter, a))
+
+                sources = inverse[a]
+                offsets = inverse_start[a]
+                touched = []
+                for q in elems[start[splitter]:end[splitter]]:
+                    for i in range(offsets[q], offsets[q + 1]):
+                        p = sources[i]
+                        b = block_of[p]
+                        m = mid[b]
+                        pos = loc[p]
+                        if pos >= m:
+                            other = elems[m]
+                            elems[m] = p
+                            elems[pos] = other
+                            loc[p] = m
+                            loc[other] = pos
+                            mid[b] = m + 1
+                            if m == start[b]:
+                                touched.append(b)
+
+                for b in touched:
+                    split_at = mid[b]
+                    mid[b] = start[b]
+                    if split_at == end[b]:
+                        continue
+                    refined = True
+                    # The smaller half becomes the new block
+                    c = len(start)
+                    if split_at - start[b] <= end[b] - split_at:
+                        start.append(start[b])
+                        end.append(split_at)
+                        start[b] = split_at
+                    else:
+                        start.append(split_at)
+                        end.append(end[b])
+                        end[b] = split_at
+                    mid[b] = start[b]
+                    mid.append(start[c])
+                    for i in range(start[c], end[c]):
+                        block_of[elems[i]] = c
+                    # Whether or not (b, s) is still queued, queueing the
+                    # smaller half c is enough to keep the refinement exact
+                    for s in range(k):
+                        pending.add((c, s))
+                        queue.append((c, s))
+
+            if refined:
+                rounds.append(snapshot() if record_rounds else None)
+            completed_rounds += 1
+            if progress is not None:
+                progress(completed_rounds, len(start))
+
+        classes = snapshot()
+        rounds.append(classes)
+        return classes, rounds
+
+    def transition_table(self):
+        """
+        Builds the transition table shown on the result pages, with a column
+        per symbol class. Each cell lists the targets of the transitions
+        matching the class, or ∅.
+        """
+        names = self.state_names
+        outgoing = self.outgoing
+        table = []
+        for state in range(self.num_states):
+            row = {"state": names[state], "is_start": bool(self.is_start[state]), "is_final": bool(self.is_final[state])}
+            for sym, symbol in enumerate(self.symbols):
+                targets = []
+                for t in outgoing[state]:
+                    if sym in self.transition_classes[t]:
+                        name = names[self.transition_to[t]]
+                        if name not in targets:
+                            targets.append(name)
+                row[symbol] = ", ".join(targets) if targets else "∅"
+            table.append(row)
+
+        return {
+            "headers": ["State"] + list(self.symbols),
+            "rows": table
+        }
+
+
+class LazyDFA:
+    """
+    Subset construction performed on the fly while simulating an NFA.
+
+    Every (state set, symbol) step a simulation takes is a transition of the
+    DFA the subset construction would build. The first time a step is taken
+    its target mask is computed from ``step_masks`` and kept in an LRU keyed
+    by (bitmask, symbol id), so later inputs follow the cached transition
+    like a table lookup. Only the subsets the inputs actually reach are ever
+    built, and nothing is written to the database.
+
+    One instance may be shared by several threads: concurrent misses may
+    compute the same step twice, which is harmless.
+    """
+
+    DEFAULT_MAX_TRANSITIONS = 65536
+
+    def __init__(self, compiled, max_transitions=DEFAULT_MAX_TRANSITIONS):
+        self.compiled = compiled
+        self.max_transitions = max_transitions
+        self.transitions = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._start = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.transitions)
+
+    def start_mask(self):
+        """ε-closure of the start states, computed once."""
+        if self._start is None:
+            self._start = self.compiled.start_mask()
+        return self._start
+
+    def next_mask(self, mask, sym):
+        """Target of the DFA transition from ``mask`` on symbol id ``sym``."""
+        key = (mask, sym)
+        target = self.transitions.get(key)
+        if target is None:
+            return self._discover(key)
+        self.hits += 1
+        try:
+            self.transitions.move_to_end(key)
+        except KeyError:
+            # Evicted by another thread in the meantime
+            pass
+        return target
+
+    def _discover(self, key):
+        """Computes an uncached step and stores it, evicting the least recently used."""
+        self.misses += 1
+        target = self.compiled.step(*key)
+        with self._lock:
+            self.transitions[key] = target
+            if len(self.transitions) > self.max_transitions:
+                self.transitions.popitem(last=False)
+        return target
+
+    def simulate(self, input_string, trace=True):
+        """
+        Runs the input through the lazily built DFA.
+        Returns the same tuples as ``CompiledAutomaton.simulate_nfa``.
+        """
+        compiled = self.compiled
+        if not compiled.start_states:
+            return False, "No start state defined.", []
+
+        symbol_index = compiled.symbol_index
+        transitions = self.transitions
+        current = self.start_mask()
+
+        if trace:
+            path = [compiled.mask_names(current)]
+            detailed_path = {
+                'states': [compiled.mask_names(current)],
+                'transitions': [],
+                'symbols': []
+            }
+        else:
+            path = []
+            detailed_path = {}
+
+        for symbol in input_string:
+            sym = symbol_index.get(symbol)
+            if sym is None:
+                sym = compiled.classify(symbol)
+                if sym is None:
+                    return False, f"Input symbol '{symbol}' is not in the alphabet.", path
+
+            key = (current, sym)
+            next_mask = transitions.get(key)
+            if next_mask is None:
+                next_mask = self._discover(key)
+            else:
+                self.hits += 1
+                try:
+                    transitions.move_to_end(key)
+                except KeyError:
+                    pass
+
+            if not next_mask:
+                return False, "Simulation stuck. No transition found.", path
+
+            if trace:
+                path.append(compiled.mask_names(next_mask))
+                detailed_path['states'].append(compiled.mask_names(next_mask))
+                detailed_path['transitions'].append(compiled._transitions_taken(current, sym, symbol))
+                detailed_path['symbols'].append(symbol)
+            current = next_mask
+
+        if current & compiled.final_mask:
+            return True, "String accepted.", path, detailed_path
+        return False, "String rejected.", path, detailed_path
+
+
+class LazyDFARegistry:
+    """
+    Process-wide LRU of LazyDFAs, so the transitions discovered while
+    simulating an automaton outlive the request that discovered them.
+    Keys are (automaton pk, structure hash) pairs identifying an automaton
+    version; ``discard`` drops the versions of an automaton once it changes.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, build):
+        """Returns the LazyDFA stored under ``key``, creating it with ``build()`` if needed."""
+        with self._lock:
+            lazy_dfa = self._entries.get(key)
+            if lazy_dfa is not None:
+                self._entries.move_to_end(key)
+                return lazy_dfa
+
+        # Built outside the lock, as compiling queries the database
+        lazy_dfa = build()
+        with self._lock:
+            lazy_dfa = self._entries.setdefault(key, lazy_dfa)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return lazy_dfa
+
+    def discard(self, automaton_pk):
+        """Discards the cached LazyDFAs of every version of an automaton."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == automaton_pk]:
+                del self._entries[key]
+
+    def clear(self):
+        """Discards every cached LazyDFA."""
+        with self._lock:
+            self._entries.clear()
+
+
+class CompactTrace:
+    """
+    Path of a simulation in a compact form for visualizing long runs.
+
+    States and transitions are interned: ``states`` holds each state label
+    once (a name for DFAs, a sorted list of names for NFA state sets) and
+    ``transitions`` holds each step taken once as ``[from, to, symbol,
+    transition_ids]``, with state indices and the symbol class label. The
+    path itself is a list of ``[block, count]`` runs, a block being a list of
+    transition indices taken ``count`` times in a row, so self-loops and
+    cycles of up to MAX_PERIOD steps collapse into a single run. Other steps,
+    including repetitions shorter than MIN_RUN_STEPS, are kept in blocks of
+    up to LITERAL_SIZE with count 1.
+
+    Steps are appended with ``add``; after ``close`` the trace can be read in
+    windows of steps with ``window`` and stored with ``to_data``.
+    """
+
+    MAX_PERIOD = 8
+    MIN_RUN_STEPS = 8
+    LITERAL_SIZE = 256
+
+    def __init__(self):
+        self.states = []
+        self.transitions = []
+        self.runs = []
+        self.length = 0
+        self.start = None
+        self.state_keys = {}
+        self.transition_keys = {}
+        self._literal = []
+        self._block = None
+        self._count = 0
+        self._pos = 0
+        self._starts = None
+
+    def add_state(self, key, label):
+        """Returns the index of the state with the given key, interning it first."""
+        index = self.state_keys.get(key)
+        if index is None:
+            index = self.state_keys[key] = len(self.states)
+            self.states.append(label)
+        return index
+
+    def add_transition(self, key, source, target, symbol, transition_ids):
+        """Interns a transition between state indices and returns its index."""
+        index = self.transition_keys[key] = len(self.transitions)
+        self.transitions.append([source, target, symbol, transition_ids])
+        return index
+
+    def add(self, step):
+        """Appends the transition index of the next step."""
+        self.length += 1
+        block = self._block
+        if block is not None:
+            if block[self._pos] == step:
+                self._pos += 1
+                if self._pos == len(block):
+                    self._count += 1
+                    self._pos = 0
+                return
+            self._end_block()
+
+        literal = self._literal
+        literal.append(step)
+        n = len(literal)
+        for period in range(1, min(self.MAX_PERIOD, n // 2) + 1):
+            if literal[n - 1 - period] == step and literal[n - period:] == literal[n - 2 * period:n - period]:
+                # The literal steps before the repetition stay pending until
+                # it is known to be long enough for a run of its own
+                self._block = literal[n - period:]
+                self._count = 2
+                self._pos = 0
+                self._literal = literal[:n - 2 * period]
+                return
+        if n >= self.LITERAL_SIZE:
+            keep = 2 * self.MAX_PERIOD
+            self.runs.append([literal[:n - keep], 1])
+            self._literal = literal[n - keep:]
+
+    def _end_block(self):
+        """Ends the current repetition; a started repeat becomes literal steps."""
+        block = self._block
+        if len(block) * self._count >= self.MIN_RUN_STEPS:
+            if self._literal:
+                self.runs.append([self._literal, 1])
+            self.runs.append([block, self._count])
+            self._literal = block[:self._pos]
+        else:
+            self._literal = self._literal + block * self._count + block[:self._pos]
+        self._block = None
+
+    def close(self):
+        """Flushes the pending steps into runs and indexes the runs by position."""
+        if self._block is not None:
+            self._end_block()
+        if self._literal:
+            self.runs.append([self._literal, 1])
+            self._literal = []
+        self._index_runs()
+
+    def _index_runs(self):
+        self._starts = array('q')
+        position = 0
+        for block, count in self.runs:
+            self._starts.append(position)
+            position += len(block) * count
+
+    def window(self, offset, limit):
+        """
+        Returns the runs covering steps ``offset`` to ``offset + limit``, with
+        the runs at either edge cut to the window.
+        """
+        end = min(offset + limit, self.length)
+        if offset >= end:
+            return []
+        runs = self.runs
+        starts = self._starts
+        i = bisect_right(starts, offset) - 1
+        position = offset
+        pieces = []
+        while position < end:
+            block, count = runs[i]
+            size = len(block)
+            stop = min(end, starts[i] + size * count)
+            skip = (position - starts[i]) % size
+            if skip:
+                take = min(size - skip, stop - position)
+                pieces.append([block[skip:skip + take], 1])
+                position += take
+            repeats = (stop - position) // size
+            if repeats:
+                pieces.append([block, repeats])
+                position += repeats * size
+            if position < stop:
+                pieces.append([block[:stop - position], 1])
+                position = stop
+            i += 1
+        return pieces
+
+    def to_data(self):
+        return {
+            'states': self.states,
+            'transitions': self.transitions,
+            'runs': self.runs,
+            'length': self.length,
+            'start': self.start,
+        }
+
+    @classmethod
+    def from_data(cls, data):
+        trace = cls()
+        trace.states = data['states']
+        trace.transitions = data['transitions']
+        trace.runs = data['runs']
+        trace.length = data['length']
+        trace.start = data['start']
+        trace._index_runs()
+        return trace
+
+
+class StreamingSimulation:
+    """
+    Simulation of one input that arrives in chunks, e.g. read from a request
+    body. Only the current state is kept, so memory does not grow with the
+    input; optionally the state is also sampled every ``checkpoint_every``
+    symbols, and/or the path is kept run-length encoded as [state, count]
+    runs of consecutive equal states (self-loops collapse into one run).
+
+    Both records are bounded: past MAX_CHECKPOINTS the checkpoint interval
+    doubles and every other checkpoint is dropped, and past MAX_RUNS no more
+    runs are recorded and ``runs_truncated`` is set, keeping the runs of the
+    prefix.
+
+    With ``trace`` set the steps are also recorded in a CompactTrace.
+
+    Pass ``lazy_dfa`` to simulate an NFA through it; otherwise ``compiled``
+    is run as a DFA.
+    """
+
+    MAX_CHECKPOINTS = 1024
+    MAX_RUNS = 4096
+
+    def __init__(self, compiled, lazy_dfa=None, checkpoint_every=0, run_length=False, trace=False):
+        self.compiled = compiled
+        self.lazy_dfa = lazy_dfa
+        self.checkpoint_every = checkpoint_every
+        self.position = 0
+        self.message = None  # Set once the run cannot continue
+        self.checkpoints = []
+        self.runs = None
+        self.runs_truncated = False
+        self.trace = CompactTrace() if trace else None
+
+        if not compiled.start_states:
+            self.current = None
+            self.message = "No start state defined."
+            return
+        self.current = lazy_dfa.start_mask() if lazy_dfa is not None else compiled.start_states[0]
+        if checkpoint_every:
+            self.checkpoints.append((0, self.current))
+        if run_length:
+            self.runs = [[self.current, 1]]
+        if trace:
+            self.trace.start = self.trace.add_state(self.current, self.state_label(self.current))
+
+    @property
+    def stopped(self):
+        return self.message is not None
+
+    def feed(self, text):
+        """Advances the run over the symbols of ``text``."""
+        if self.stopped:
+            return
+        compiled = self.compiled
+        symbol_index = compiled.symbol_index
+        lazy_dfa = self.lazy_dfa
+        delta = compiled.delta
+        k = len(compiled.symbols)
+        every = self.checkpoint_every
+        runs = None if self.runs_truncated else self.runs
+        trace = self.trace
+        current = self.current
+        position = self.position
+
+        for symbol in text:
+            sym = symbol_index.get(symbol)
+            if sym is None:
+                sym = compiled.classify(symbol)
+                if sym is None:
+                    self.message = f"Input symbol '{symbol}' is not in the alphabet."
+                    break
+
+            if lazy_dfa is None:
+                target = delta[current * k + sym]
+                if target < 0:
+                    self.message = (
+                        f"No transition found from state '{compiled.state_names[current]}' on symbol '{symbol}'."
+                    )
+                    break
+            else:
+                target = lazy_dfa.next_mask(current, sym)
+                if not target:
+                    self.message = "Simulation stuck. No transition found."
+                    break
+
+            if trace is not None:
+                trace.add(self._trace_step(current, sym, target))
+            current = target
+            position += 1
+            if every and position % every == 0:
+                self._checkpoint(position, current)
+                every = self.checkpoint_every
+            if runs is not None:
+                if runs[-1][0] == current:
+                    runs[-1][1] += 1
+                elif len(runs) < self.MAX_RUNS:
+                    runs.append([current, 1])
+                else:
+                    self.runs_truncated = True
+                    runs = None
+
+        self.current = current
+        self.position = position
+
+    def _trace_step(self, current, sym, target):
+        """Returns the index of the step in the trace's transition table."""
+        trace = self.trace
+        index = trace.transition_keys.get((current, sym))
+        if index is None:
+            compiled = self.compiled
+            if self.lazy_dfa is None:
+                cell = current * len(compiled.symbols) + sym
+                transition_ids = [compiled.transition_pks[compiled.delta_transition[cell]]]
+            else:
+                transition_ids = [
+                    taken['transition_id']
+                    for taken in compiled._transitions_taken(current, sym, compiled.symbols[sym])
+                ]
+            index = trace.add_transition(
+                (current, sym),
+                trace.add_state(current, self.state_label(current)),
+                trace.add_state(target, self.state_label(target)),
+                compiled.symbols[sym],
+                transition_ids
+            )
+        return index
+
+    def _checkpoint(self, position, state):
+        self.checkpoints.append((position, state))
+        if len(self.checkpoints) > self.MAX_CHECKPOINTS:
+            self.checkpoint_every *= 2
+            self.checkpoints = [c for c in self.checkpoints if c[0] % self.checkpoint_every == 0]
+
+    def state_label(self, state):
+        """State name for a DFA state, sorted state names for an NFA state set."""
+        if self.lazy_dfa is None:
+            return self.compiled.state_names[state]
+        return self.compiled.mask_names(state)
+
+    def result(self):
+        """
+        Verdict of the input fed so far, with the symbols consumed, the last
+        state and the recorded checkpoints and runs.
+        """
+        compiled = self.compiled
+        if self.stopped:
+            accepted, message = False, self.message
+        elif self.lazy_dfa is None:
+            accepted, message = bool(compiled.is_final[self.current]), "Simulation completed."
+        else:
+            accepted = bool(self.current & compiled.final_mask)
+            message = "String accepted." if accepted else "String rejected."
+
+        result = {
+            'accepted': accepted,
+            'message': message,
+            'length': self.position,
+            'state': None if self.current is None else self.state_label(self.current),
+        }
+        if self.checkpoint_every:
+            result['checkpoint_every'] = self.checkpoint_every
+            result['checkpoints'] = [
+                {'position': position, 'state': self.state_label(state)} for position, state in self.checkpoints
+            ]
+        if self.runs is not None:
+            result['runs'] = [[self.state_label(state), count] for state, count in self.runs]
+            result['runs_truncated'] = self.runs_truncated
+        return result
@@ -0,0 +1,273 @@
+"""
+Random and adversarial automata for load and stress testing.
+
+Every family is a function ``family(size, rng, params)`` returning a
+GeneratedAutomaton with about ``size`` states, built from the seeded
+``random.Random`` and the GeneratorParams it uses. Nothing touches the
+database until ``save_automata`` writes a list of them with a fixed number
+of bulk inserts, so 100k-state automata and thousands of small ones per
+user load quickly.
+
+Besides random DFAs and NFAs the families include the known worst cases:
+the n-th-symbol-from-the-end NFA, whose subset construction yields 2**n
+states, and the de Bruijn cycle, a unary DFA on which Hopcroft's algorithm
+needs its full n log n refinement work.
+"""
+import string
+
+from django.db import transaction
+
+from .models import BULK_BATCH_SIZE, Automaton, State, Transition
+from .symbols import EPSILON, SymbolClass
+
+# Symbols used for generated alphabets before falling back to code points
+SYMBOL_POOL = string.ascii_lowercase + string.ascii_uppercase + string.digits
+
+# Automata per UPDATE when storing the JSON of many generated automata
+JSON_BATCH_SIZE = 100
+
+
+def alphabet_symbols(size):
+    """The first ``size`` symbols: a-z, A-Z, 0-9, then code points from U+0100."""
+    return [SYMBOL_POOL[i] if i < len(SYMBOL_POOL) else chr(0x100 + i) for i in range(size)]
+
+
+class GeneratorParams:
+    """Knobs of the random families; each family documents the ones it uses."""
+
+    def __init__(self, alphabet_size=2, density=1.0, epsilon_ratio=0.0, final_ratio=0.3):
+        if alphabet_size < 1:
+            raise ValueError("alphabet_size must be at least 1")
+        if density < 0 or not 0 <= epsilon_ratio < 1 or not 0 <= final_ratio <= 1:
+            raise ValueError("density must be non-negative, epsilon_ratio below 1 and final_ratio at most 1")
+        self.alphabet_size = alphabet_size
+        self.density = density
+        self.epsilon_ratio = epsilon_ratio
+        self.final_ratio = final_ratio
+
+
+class GeneratedAutomaton:
+    """
+    States and transitions of a generated automaton before it is saved.
+    ``states`` are (name, is_start, is_final) tuples and ``transitions`` are
+    (source index, target index, symbol) tuples.
+    """
+
+    def __init__(self, name, alphabet, states, transitions):
+        self.name = name
+        self.alphabet = alphabet
+        self.states = states
+        self.transitions = transitions
+
+    @property
+    def has_epsilon(self):
+        return any(symbol == EPSILON for _, _, symbol in self.transitions)
+
+    def alphabet_spec(self):
+        return SymbolClass.from_symbols(self.alphabet).spec()
+
+
+def _finals(size, rng, ratio):
+    """Final flags with the given ratio; at least one state is final."""
+    finals = [rng.random() < ratio for _ in range(size)]
+    if not any(finals):
+        finals[rng.randrange(size)] = True
+    return finals
+
+
+def _states(finals):
+    return [(f"q{i}", i == 0, is_final) for i, is_final in enumerate(finals)]
+
+
+def chain_dfa(size, rng, params):
+    """
+    Complete DFA: the first symbol advances along a chain whose last state is
+    final, every other symbol returns to the start. Uses alphabet_size. All
+    states are distinguishable, but only by suffixes of growing length, so a
+    round-based minimization needs ``size`` rounds.
+    """
+    alphabet = alphabet_symbols(params.alphabet_size)
+    transitions = []
+    for i in range(size):
+        transitions.append((i, min(i + 1, size - 1), alphabet[0]))
+        transitions.extend((i, 0, symbol) for symbol in alphabet[1:])
+    return GeneratedAutomaton(
+        f"Chain DFA ({size} states)", alphabet, _states([i == size - 1 for i in range(size)]), transitions
+    )
+
+
+def random_dfa(size, rng, params):
+    """
+    DFA with uniformly random targets. Uses alphabet_size, final_ratio and
+    density, the probability that a (state, symbol) pair has a transition
+    (1 or more gives a complete DFA).
+    """
+    alphabet = alphabet_symbols(params.alphabet_size)
+    transitions = [
+        (i, rng.randrange(size), symbol)
+        for i in range(size) for symbol in alphabet
+        if params.density >= 1 or rng.random() < params.density
+    ]
+    return GeneratedAutomaton(
+        f"Random DFA ({size} states)", alphabet, _states(_finals(size, rng, params.final_ratio)), transitions
+    )
+
+
+def random_nfa(size, rng, params):
+    """
+    NFA with random transitions. Uses alphabet_size, final_ratio, density,
+    the average number of transitions per (state, symbol) pair, and
+    epsilon_ratio, the share of ε among all transitions.
+    """
+    alphabet = alphabet_symbols(params.alphabet_size)
+    labelled = round(size * len(alphabet) * params.density)
+    epsilon = round(labelled * params.epsilon_ratio / (1 - params.epsilon_ratio))
+    edges = {(rng.randrange(size), rng.randrange(size), rng.choice(alphabet)) for _ in range(labelled)}
+    edges.update((rng.randrange(size), rng.randrange(size), EPSILON) for _ in range(epsilon))
+    return GeneratedAutomaton(
+        f"Random NFA ({size} states)", alphabet, _states(_finals(size, rng, params.final_ratio)), sorted(edges)
+    )
+
+
+def epsilon_graph(size, rng, params):
+    """
+    NFA stressing ε-closures: a ring of ε-transitions plus two random
+    ε-transitions and one labelled transition per state. Uses
+    alphabet_size and final_ratio (scaled down to a third).
+    """
+    alphabet = alphabet_symbols(params.alphabet_size)
+    transitions = []
+    for i in range(size):
+        transitions.append((i, (i + 1) % size, EPSILON))
+        transitions.extend((i, rng.randrange(size), EPSILON) for _ in range(2))
+        transitions.append((i, rng.randrange(size), rng.choice(alphabet)))
+    return GeneratedAutomaton(
+        f"Epsilon graph ({size} states)", alphabet, _states(_finals(size, rng, params.final_ratio / 3)), transitions
+    )
+
+
+def nth_from_end_nfa(size, rng, params):
+    """
+    NFA over {a, b} accepting strings whose n-th symbol from the end is 'a',
+    the worst case of the subset construction: its DFA has 2**n states. n is
+    chosen so that the DFA has at most ``size`` states.
+    """
+    n = max(1, size.bit_length() - 1)
+    transitions = [(0, 0, 'a,b'), (0, 1, 'a')]
+    transitions.extend((i, i + 1, 'a,b') for i in range(1, n))
+    return GeneratedAutomaton(
+        f"Symbol {n} from the end is a", ['a', 'b'], _states([i == n for i in range(n + 1)]), transitions
+    )
+
+
+def de_bruijn_dfa(size, rng, params):
+    """
+    Unary DFA whose states form a cycle of 2**k <= ``size`` states, final
+    where a de Bruijn sequence of order k has a 1. It is already minimal, and
+    it is the known worst case of Hopcroft's algorithm (Berstel and Carton).
+    """
+    k = max(1, size.bit_length() - 1)
+    # Standard de Bruijn sequence B(2, k) from Lyndon words
+    sequence = []
+    a = [0] * (k + 1)
+
+    def db(t, p):
+        if t > k:
+            if k % p == 0:
+                sequence.extend(a[1:p + 1])
+        else:
+            a[t] = a[t - p]
+            db(t + 1, p)
+            for j in range(a[t - p] + 1, 2):
+                a[t] = j
+                db(t + 1, t)
+
+    db(1, 1)
+    n = len(sequence)
+    transitions = [(i, (i + 1) % n, 'a') for i in range(n)]
+    return GeneratedAutomaton(
+        f"de Bruijn cycle ({n} states)", ['a'], _states([bit == 1 for bit in sequence]), transitions
+    )
+
+
+def redundant_dfa(size, rng, params):
+    """
+    DFA made of four interleaved copies of a random DFA with a quarter of
+    the states, so minimization merges at least three quarters of them. Uses
+    alphabet_size and final_ratio.
+    """
+    copies = 4
+    base = random_dfa(max(1, size // copies), rng, GeneratorParams(
+        alphabet_size=params.alphabet_size, final_ratio=params.final_ratio
+    ))
+    n = len(base.states)
+    states = [
+        (f"q{c * n + i}", c == 0 and is_start, is_final)
+        for c in range(copies) for i, (_, is_start, is_final) in enumerate(base.states)
+    ]
+    transitions = [
+        (c * n + source, ((c + 1) % copies) * n + target, symbol)
+        for c in range(copies) for source, target, symbol in base.transitions
+    ]
+    return GeneratedAutomaton(f"Redundant DFA ({len(states)} states)", base.alphabet, states, transitions)
+
+
+FAMILIES = {
+    'chain': chain_dfa,
+    'random_dfa': random_dfa,
+    'random_nfa': random_nfa,
+    'epsilon_graph': epsilon_graph,
+    'nth_from_end': nth_from_end_nfa,
+    'de_bruijn': de_bruijn_dfa,
+    'redundant_dfa': redundant_dfa,
+}
+
+
+def generate(family, size, rng, params=None):
+    """Generates one automaton of the named family."""
+    if family not in FAMILIES:
+        raise ValueError(f"Unknown family '{family}'")
+    if size < 1:
+        raise ValueError("size must be at least 1")
+    return FAMILIES[family](size, rng, params or GeneratorParams())
+
+
+def save_automata(generated, owners):
+    """
+    Writes generated automata, the i-th owned by owners[i], with one bulk
+    insert per table (split into batches) and one bulk update of their JSON
+    representations, inside a transaction. Returns the Automaton objects.
+    """
+    with transaction.atomic():
+        automata = Automaton.objects.bulk_create([
+            Automaton(name=g.name, alphabet=g.alphabet_spec(), owner=owner, has_epsilon=g.has_epsilon)
+            for g, owner in zip(generated, owners)
+        ], batch_size=BULK_BATCH_SIZE)
+
+        states = State.objects.bulk_create([
+            State(automaton=automaton, name=name, is_start=is_start, is_final=is_final)
+            for automaton, g in zip(automata, generated)
+            for name, is_start, is_final in g.states
+        ], batch_size=BULK_BATCH_SIZE)
+
+        per_automaton = []
+        offset = 0
+        for g in generated:
+            per_automaton.append(states[offset:offset + len(g.states)])
+            offset += len(g.states)
+
+        transitions = Transition.objects.bulk_create([
+            Transition(automaton=automaton, from_state=rows[source], to_state=rows[target], symbol=symbol)
+            for automaton, g, rows in zip(automata, generated, per_automaton)
+            for source, target, symbol in g.transitions
+        ], batch_size=BULK_BATCH_SIZE)
+
+        offset = 0
+        for automaton, g, rows in zip(automata, generated, per_automaton):
+            automaton.set_json_representation(rows, transitions[offset:offset + len(g.transitions)])
+            offset += len(g.transitions)
+        Automaton.objects.bulk_update(
+            automata, ['json_representation', 'cached_type', 'structure_hash', 'packed_structure'],
+            batch_size=JSON_BATCH_SIZE
+        )
+    return automata
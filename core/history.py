@@ -0,0 +1,139 @@
+"""
+Buffered writing of user history.
+
+Every editor click used to insert its own UserHistory row. Entries are now
+collected in a process-wide buffer and written with one bulk insert when the
+buffer holds ``CORE_HISTORY_BUFFER_SIZE`` entries or its oldest entry is
+``CORE_HISTORY_FLUSH_INTERVAL`` seconds old, whichever comes first. Readers of
+the history table (the dashboard) flush first, and whatever is left is
+written when the process exits.
+
+Consecutive edits of the same automaton by the same user are coalesced into a
+single entry whose details count the individual edits by ``action_type``.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HISTORY_BUFFER_SIZE = 100
+DEFAULT_HISTORY_FLUSH_INTERVAL = 5
+
+# Actions whose consecutive entries on the same automaton are merged
+COALESCED_ACTIONS = frozenset({'edit'})
+
+
+def coalesce_details(previous, details):
+    """
+    Merges the details of an edit into those of the previous edit. The result
+    keeps the common action_type (or 'multiple'), the number of edits and a
+    count per action_type.
+    """
+    if 'edit_count' in previous:
+        merged = dict(previous)
+        merged['action_types'] = dict(previous['action_types'])
+    else:
+        first_type = previous.get('action_type', 'edit')
+        merged = {'action_type': first_type, 'edit_count': 1, 'action_types': {first_type: 1}}
+
+    action_type = details.get('action_type', 'edit')
+    merged['edit_count'] += 1
+    merged['action_types'][action_type] = merged['action_types'].get(action_type, 0) + 1
+    if merged['action_type'] != action_type:
+        merged['action_type'] = 'multiple'
+    return merged
+
+
+class HistoryBuffer:
+    """
+    Thread-safe buffer of pending history entries. Entries are dicts with the
+    UserHistory field values; ``write`` receives a list of them and stores
+    them, typically with a single bulk_create.
+    """
+
+    def __init__(self, write):
+        self.write = write
+        self.pending = []
+        self.last_by_user = {}
+        self.oldest = None
+        self.timer = None
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+
+    @property
+    def max_size(self):
+        return getattr(settings, 'CORE_HISTORY_BUFFER_SIZE', DEFAULT_HISTORY_BUFFER_SIZE)
+
+    @property
+    def max_age(self):
+        return getattr(settings, 'CORE_HISTORY_FLUSH_INTERVAL', DEFAULT_HISTORY_FLUSH_INTERVAL)
+
+    def add(self, entry):
+        """Queues an entry, merging it into the user's previous edit of the same automaton."""
+        with self.lock:
+            previous = self.last_by_user.get(entry['user_id'])
+            if (
+                previous is not None
+                and entry['action'] in COALESCED_ACTIONS
+                and previous['action'] == entry['action']
+                and previous['automaton_id'] == entry['automaton_id']
+            ):
+                previous['details'] = coalesce_details(previous['details'], entry['details'])
+                previous['timestamp'] = entry['timestamp']
+                previous['automaton_name'] = entry['automaton_name']
+                previous['automaton_type'] = entry['automaton_type'] or previous['automaton_type']
+            else:
+                self.pending.append(entry)
+                self.last_by_user[entry['user_id']] = entry
+            if self.oldest is None:
+                self.oldest = time.monotonic()
+
+            due = len(self.pending) >= self.max_size or time.monotonic() - self.oldest >= self.max_age
+            if not due and self.timer is None:
+                self.timer = threading.Timer(self.max_age, self._flush_in_background)
+                self.timer.daemon = True
+                self.timer.start()
+        if due:
+            self.flush()
+
+    def take(self):
+        """Removes and returns the pending entries."""
+        with self.lock:
+            entries = self.pending
+            self.pending = []
+            self.last_by_user = {}
+            self.oldest = None
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        return entries
+
+    def flush(self):
+        """Writes the pending entries. Returns the number of entries written."""
+        # Entries are written in the order they were taken
+        with self.flush_lock:
+            entries = self.take()
+            if entries:
+                self.write(entries)
+        return len(entries)
+
+    def _flush_in_background(self):
+        with self.lock:
+            self.timer = None
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Failed to write buffered user history")
+        finally:
+            # Timer threads open their own connections; don't leak them
+            connections.close_all()
+
+    def flush_at_exit(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Failed to write buffered user history at exit")
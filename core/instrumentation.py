@@ -0,0 +1,188 @@
+"""
+Per-request query counting and timing for the core views.
+
+``InstrumentationMiddleware`` counts the SQL queries and the time spent in the
+database for every request routed to the ``core`` app, and ``timed_phase``
+measures named phases of the automaton algorithms (simulation, minimization,
+subset construction) while such a request is active. The results are sent
+back as a ``Server-Timing`` header and folded into in-process histograms,
+which ``metrics_snapshot`` returns for the admin metrics endpoint.
+"""
+import bisect
+import logging
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the histogram buckets; the last bucket is unbounded
+TIME_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+# Requests issuing more queries than this are logged as likely N+1 regressions
+DEFAULT_QUERY_WARNING_THRESHOLD = 50
+
+_local = threading.local()
+
+
+class RequestMetrics:
+    """Counters collected while one request is being handled."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.phases = {}
+
+    def add_phase(self, name, duration):
+        self.phases[name] = self.phases.get(name, 0.0) + duration
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper counting and timing every query."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+
+
+class Histogram:
+    """Fixed-bucket histogram with count, sum, min and max."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def as_dict(self):
+        labels = [f"le_{bound}" for bound in self.buckets] + ['inf']
+        return {
+            'count': self.count,
+            'sum': round(self.total, 3),
+            'mean': round(self.total / self.count, 3) if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'buckets': dict(zip(labels, self.counts)),
+        }
+
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+
+def _observe(endpoint, metric, value, buckets=TIME_BUCKETS_MS):
+    with _histograms_lock:
+        histogram = _histograms.get((endpoint, metric))
+        if histogram is None:
+            histogram = _histograms[(endpoint, metric)] = Histogram(buckets)
+        histogram.observe(value)
+
+
+def metrics_snapshot():
+    """Returns {endpoint: {metric: histogram dict}} for everything recorded so far."""
+    with _histograms_lock:
+        snapshot = {}
+        for (endpoint, metric), histogram in sorted(_histograms.items()):
+            snapshot.setdefault(endpoint, {})[metric] = histogram.as_dict()
+        return snapshot
+
+
+def reset_metrics():
+    """Discards all recorded histograms."""
+    with _histograms_lock:
+        _histograms.clear()
+
+
+def current_metrics():
+    """Returns the RequestMetrics of the request being handled, if any."""
+    return getattr(_local, 'metrics', None)
+
+
+@contextmanager
+def timed_phase(name):
+    """
+    Times a block (or, used as a decorator, a function call) as a named phase
+    of the current request. Nested phases are recorded separately; outside
+    an instrumented request this does nothing.
+    """
+    metrics = current_metrics()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add_phase(name, time.perf_counter() - start)
+
+
+def server_timing_header(metrics, total):
+    """Formats the collected metrics as a Server-Timing header value."""
+    entries = [
+        f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries"',
+        f'app;dur={max(total - metrics.db_time, 0.0) * 1000:.1f}',
+        f'total;dur={total * 1000:.1f}',
+    ]
+    entries.extend(
+        f'{name};dur={duration * 1000:.1f}' for name, duration in metrics.phases.items()
+    )
+    return ', '.join(entries)
+
+
+class InstrumentationMiddleware:
+    """Records query count, DB time, Python time and algorithm phases per core request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.query_warning_threshold = getattr(
+            settings, 'CORE_QUERY_WARNING_THRESHOLD', DEFAULT_QUERY_WARNING_THRESHOLD
+        )
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        previous = current_metrics()
+        _local.metrics = metrics
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _local.metrics = previous
+        total = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        if match is None or match.app_name != 'core':
+            return response
+
+        response['Server-Timing'] = server_timing_header(metrics, total)
+
+        endpoint = match.view_name
+        _observe(endpoint, 'total_ms', total * 1000)
+        _observe(endpoint, 'db_ms', metrics.db_time * 1000)
+        _observe(endpoint, 'python_ms', max(total - metrics.db_time, 0.0) * 1000)
+        _observe(endpoint, 'queries', metrics.queries, QUERY_BUCKETS)
+        for name, duration in metrics.phases.items():
+            _observe(endpoint, f'phase:{name}_ms', duration * 1000)
+
+        if metrics.queries > self.query_warning_threshold:
+            logger.warning(
+                "%s issued %d queries (%.1f ms in the database)",
+                endpoint, metrics.queries, metrics.db_time * 1000
+            )
+        return response
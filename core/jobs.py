@@ -0,0 +1,255 @@
+"""
+Background execution of minimizations and NFA-to-DFA conversions.
+
+A conversion of an NFA with many states can take minutes, so besides the
+synchronous endpoints the operations can be submitted as ``Job`` rows and run
+by a local thread pool. The ``Job`` table is the only coordination between
+processes: a worker claims a job by moving it from pending to running in a
+single UPDATE, so a job is never run twice even if several processes pick it
+up. Progress reported by the algorithms is written back to the row, where the
+job status endpoint reads it.
+
+Set ``CORE_JOBS_EAGER = True`` to run jobs inline in the submitting thread
+(used by the tests), and ``CORE_JOB_WORKERS`` to size the pool. A job left
+running by a process that died is failed once it has been running for
+``CORE_JOB_STALE_SECONDS``, when the next pool starts.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .engine import BudgetExceeded
+from .models import DerivedAutomaton, Job, UserHistory
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_WORKERS = 2
+DEFAULT_JOB_STALE_SECONDS = 30 * 60
+
+# Minimum number of seconds between two progress writes of a running job
+PROGRESS_SAVE_INTERVAL = 0.5
+
+# Automaton type each operation applies to
+REQUIRED_TYPES = {
+    DerivedAutomaton.TO_DFA: 'NFA',
+    DerivedAutomaton.MINIMIZE: 'DFA',
+}
+
+
+def perform_operation(operation, automaton, user, progress=None):
+    """
+    Runs a conversion or minimization and logs it to the user's history.
+    Returns (response_data, result_automaton, detailed_steps), where
+    response_data is the JSON payload of the synchronous endpoint.
+    """
+    if operation == DerivedAutomaton.TO_DFA:
+        dfa, detailed_steps = automaton.to_dfa(progress=progress)
+
+        UserHistory.log_action(
+            user=user,
+            automaton=automaton,
+            action='convert',
+            details={
+                'from_type': 'NFA',
+                'to_type': 'DFA',
+                'result_dfa_id': dfa.id,
+                'result_dfa_name': dfa.name,
+                'original_states': detailed_steps['nfa_state_count'],
+                'result_states': detailed_steps['dfa_state_count']
+            }
+        )
+
+        data = {
+            'status': 'success',
+            'message': 'NFA successfully converted to DFA.',
+            'dfa_id': dfa.id,
+            'dfa_name': dfa.name,
+            'cached': detailed_steps.get('cached', False),
+            'conversion_steps_url': f'/automata/automaton/{dfa.id}/conversion-result/'
+        }
+        return data, dfa, detailed_steps
+
+    if operation == DerivedAutomaton.MINIMIZE:
+        minimized_dfa, detailed_steps = automaton.minimize(progress=progress)
+
+        UserHistory.log_action(
+            user=user,
+            automaton=automaton,
+            action='minimize',
+            details={
+                'original_states': detailed_steps.get('original_state_count'),
+                'minimized_states': detailed_steps.get('minimized_state_count'),
+                'was_already_minimal': minimized_dfa == automaton,
+                'result_dfa_id': minimized_dfa.id,
+                'reduction_percentage': detailed_steps.get('reduction_percentage', 0)
+            }
+        )
+
+        if minimized_dfa == automaton:
+            data = {
+                'status': 'info',
+                'message': 'DFA is already minimal.',
+                'cached': detailed_steps.get('cached', False),
+                'minimization_steps_url': f'/automata/automaton/{automaton.id}/minimization-result/'
+            }
+        else:
+            data = {
+                'status': 'success',
+                'message': 'DFA successfully minimized.',
+                'minimized_dfa_id': minimized_dfa.id,
+                'minimized_dfa_name': minimized_dfa.name,
+                'cached': detailed_steps.get('cached', False),
+                'minimization_steps_url': f'/automata/automaton/{minimized_dfa.id}/minimization-result/'
+            }
+        return data, minimized_dfa, detailed_steps
+
+    raise ValueError(f"Unknown operation '{operation}'")
+
+
+def budget_exceeded_data(exc):
+    """Structured response for a conversion aborted by its budget."""
+    return {
+        'status': 'budget_exceeded',
+        'message': str(exc),
+        'budget': exc.as_dict(),
+    }
+
+
+class ProgressReporter:
+    """
+    Progress callback for a running job. Merges the reported fields and
+    writes them to the job row, at most every PROGRESS_SAVE_INTERVAL seconds
+    unless the phase changes.
+    """
+
+    def __init__(self, job):
+        self.job_id = job.pk
+        self.progress = dict(job.progress)
+        self.last_saved = 0.0
+
+    def __call__(self, **fields):
+        phase_changed = 'phase' in fields and fields['phase'] != self.progress.get('phase')
+        self.progress.update(fields)
+        now = time.monotonic()
+        if phase_changed or now - self.last_saved >= PROGRESS_SAVE_INTERVAL:
+            Job.objects.filter(pk=self.job_id).update(progress=self.progress)
+            self.last_saved = now
+
+
+def run_job(job_id):
+    """Claims and runs a pending job. Does nothing if another worker claimed it first."""
+    claimed = Job.objects.filter(pk=job_id, status=Job.PENDING).update(
+        status=Job.RUNNING, started_at=timezone.now()
+    )
+    if not claimed:
+        return
+
+    job = Job.objects.select_related('automaton', 'owner').get(pk=job_id)
+    reporter = ProgressReporter(job)
+    try:
+        if job.automaton is None:
+            raise ValueError("The automaton was deleted before the job started.")
+        data, result, _ = perform_operation(job.operation, job.automaton, job.owner, progress=reporter)
+        job.status = Job.SUCCEEDED
+        job.result = result
+        job.result_data = data
+    except BudgetExceeded as e:
+        job.status = Job.FAILED
+        job.error = str(e)
+        job.result_data = budget_exceeded_data(e)
+        reporter.progress.update(subsets_discovered=e.subsets_discovered, transitions=e.transitions)
+    except Exception as e:
+        logger.exception("Job %s failed", job_id)
+        job.status = Job.FAILED
+        job.error = str(e)
+
+    reporter.progress.pop('phase', None)
+    job.progress = reporter.progress
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'result_data', 'error', 'progress', 'finished_at'])
+
+
+def _run_in_worker(job_id):
+    try:
+        run_job(job_id)
+    finally:
+        # Worker threads open their own connections; don't leak them
+        connections.close_all()
+
+
+def fail_stale_jobs():
+    """
+    Fails the jobs that have been running for longer than
+    CORE_JOB_STALE_SECONDS: their worker is assumed to have died with its
+    process. Running them again could kill the next process the same way,
+    so they are not re-queued. Returns the number of jobs failed.
+    """
+    stale_seconds = getattr(settings, 'CORE_JOB_STALE_SECONDS', DEFAULT_JOB_STALE_SECONDS)
+    now = timezone.now()
+    failed = Job.objects.filter(
+        status=Job.RUNNING, started_at__lt=now - timedelta(seconds=stale_seconds)
+    ).update(
+        status=Job.FAILED,
+        error="The job was interrupted before it finished. Please submit it again.",
+        finished_at=now,
+    )
+    if failed:
+        logger.warning("Failed %d stale running job(s)", failed)
+    return failed
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Returns the process-wide worker pool, creating it on first use. Jobs
+    still pending in the table (e.g. after a restart) are queued as well,
+    and stale running jobs are failed.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'CORE_JOB_WORKERS', DEFAULT_JOB_WORKERS),
+                thread_name_prefix='core-job',
+            )
+            fail_stale_jobs()
+            for job_id in Job.objects.filter(status=Job.PENDING).order_by('created_at').values_list('pk', flat=True):
+                _executor.submit(_run_in_worker, job_id)
+    return _executor
+
+
+def submit_job(operation, automaton, user):
+    """Creates a pending job and hands it to the worker pool once the row is committed."""
+    job = Job.objects.create(operation=operation, automaton=automaton, owner=user)
+    if getattr(settings, 'CORE_JOBS_EAGER', False):
+        run_job(job.pk)
+        job.refresh_from_db()
+    else:
+        transaction.on_commit(lambda: get_executor().submit(_run_in_worker, job.pk))
+    return job
+
+
+def job_status_data(job):
+    """JSON payload of the job status endpoint."""
+    result_data = job.result_data or {}
+    return {
+        'job_id': job.pk,
+        'operation': job.operation,
+        'status': job.status,
+        'progress': job.progress,
+        'result': job.result_data,
+        'result_url': result_data.get('conversion_steps_url') or result_data.get('minimization_steps_url'),
+        'error': job.error,
+        'created_at': job.created_at.isoformat(),
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
@@ -0,0 +1,251 @@
+import json
+import platform
+import random
+import statistics
+import time
+import tracemalloc
+from contextlib import nullcontext
+
+import django
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.engine import BudgetExceeded, CompiledAutomaton, LazyDFA
+from core.generators import FAMILIES, generate, save_automata
+from core.models import Automaton, DerivedAutomaton, conversion_budget, lazy_dfas
+from core.symbols import parse_alphabet
+
+# Families measured by default, see core.generators for all of them
+DEFAULT_FAMILIES = ['chain', 'random_dfa', 'nth_from_end', 'epsilon_graph']
+
+OPERATIONS = ['json', 'is_dfa', 'simulate', 'minimize', 'to_dfa']
+
+# Operations of --in-memory runs, which have no stored JSON to rebuild
+IN_MEMORY_OPERATIONS = ['is_dfa', 'simulate', 'minimize', 'to_dfa']
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the automaton algorithms on generated families of automata and '
+        'write the timings, query counts and peak memory as JSON. Everything '
+        'is created in a transaction that is rolled back afterwards; with '
+        '--in-memory the engine is timed on its own and no database is used.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--families', default=','.join(DEFAULT_FAMILIES),
+                            help=f"Comma separated families ({', '.join(FAMILIES)})")
+        parser.add_argument('--sizes', default='100,1000',
+                            help='Comma separated approximate state counts')
+        parser.add_argument('--operations', default=','.join(OPERATIONS),
+                            help=f"Comma separated operations ({', '.join(OPERATIONS)})")
+        parser.add_argument('--repeat', type=int, default=3, help='Timed runs per operation')
+        parser.add_argument('--strings', type=int, default=1000, help='Input strings per simulate run')
+        parser.add_argument('--length', type=int, default=100, help='Length of the simulated strings')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Worker processes of the simulate operation; batches below '
+                                 'CORE_PARALLEL_MIN_STRINGS still run in one process')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the random families and strings')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+        parser.add_argument('--keep', action='store_true', help='Keep the generated automata')
+        parser.add_argument('--in-memory', action='store_true',
+                            help='Compile the generated automata directly and time the engine without the '
+                                 'ORM, so no database is needed (json is not measured)')
+
+    def handle(self, *args, **options):
+        in_memory = options['in_memory']
+        families = self.parse_list(options['families'], FAMILIES, 'family')
+        operations = self.parse_list(options['operations'], OPERATIONS, 'operation')
+        if in_memory:
+            operations = [operation for operation in operations if operation in IN_MEMORY_OPERATIONS]
+        if in_memory and options['keep']:
+            raise CommandError("--keep cannot be combined with --in-memory")
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError("--sizes must be a comma separated list of integers")
+        if any(size < 1 for size in sizes) or options['repeat'] < 1:
+            raise CommandError("Sizes and --repeat must be positive")
+
+        report = {
+            'meta': {
+                'started_at': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': None if in_memory else connection.vendor,
+                'seed': options['seed'],
+                'repeat': options['repeat'],
+                'strings': options['strings'],
+                'length': options['length'],
+                'workers': options['workers'],
+            },
+            'results': [],
+        }
+
+        def run_all(owner=None):
+            for family in families:
+                for size in sizes:
+                    rng = random.Random(f"{options['seed']}:{family}:{size}")
+                    generated = generate(family, size, rng)
+                    # Strings over the automaton's own alphabet, so runs are not cut short
+                    strings = [
+                        ''.join(rng.choice(generated.alphabet) for _ in range(options['length']))
+                        for _ in range(options['strings'])
+                    ]
+                    if owner is None:
+                        subject = self.in_memory_subject(generated, strings)
+                    else:
+                        subject = self.database_subject(
+                            save_automata([generated], [owner])[0], strings, options['workers']
+                        )
+                    for operation in operations:
+                        entry = self.measure(subject, operation, options['repeat'], count_queries=owner is not None)
+                        if entry is not None:
+                            report['results'].append({'family': family, 'size': size, **entry})
+                            if options['output']:
+                                self.stdout.write(self.format_entry(family, size, entry))
+
+        if in_memory:
+            run_all()
+        else:
+            with transaction.atomic():
+                run_all(User.objects.get_or_create(username='bench')[0])
+                if not options['keep']:
+                    transaction.set_rollback(True)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Wrote {len(report['results'])} results to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    @staticmethod
+    def parse_list(value, known, kind):
+        items = [item.strip() for item in value.split(',') if item.strip()]
+        unknown = [item for item in items if item not in known]
+        if unknown:
+            raise CommandError(f"Unknown {kind} '{unknown[0]}'; choose from {', '.join(known)}")
+        return items
+
+    @staticmethod
+    def database_subject(automaton, strings, workers):
+        """
+        Returns (type, states, transitions, prepare, execute) for timing the
+        model methods on a saved automaton.
+        """
+        def prepare():
+            # Start from a freshly loaded copy, as a request would, without
+            # reusing the results of earlier runs
+            DerivedAutomaton.objects.filter(source_hash=automaton.structure_hash).delete()
+            lazy_dfas.clear()
+            return Automaton.objects.get(pk=automaton.pk)
+
+        def execute(instance, operation):
+            if operation == 'json':
+                instance.update_json_representation()
+            elif operation == 'is_dfa':
+                instance.is_dfa()
+            elif operation == 'simulate':
+                instance.simulate_many(strings, workers=workers)
+            elif operation == 'minimize':
+                instance.minimize()
+            elif operation == 'to_dfa':
+                instance.to_dfa()
+
+        return (
+            automaton.get_type(), automaton.states.count(), automaton.transitions.count(), prepare, execute
+        )
+
+    @staticmethod
+    def in_memory_subject(generated, strings):
+        """
+        Returns (type, states, transitions, prepare, execute) for timing the
+        engine on a generated automaton compiled without the database. Every
+        run compiles it again, as the model methods would.
+        """
+        states = [(i, name, is_start, is_final) for i, (name, is_start, is_final) in enumerate(generated.states)]
+        transitions = [(i, *transition) for i, transition in enumerate(generated.transitions)]
+        alphabet = parse_alphabet(generated.alphabet_spec())
+
+        def prepare():
+            return None
+
+        def execute(_, operation):
+            compiled = CompiledAutomaton(states, transitions, alphabet)
+            if operation == 'is_dfa':
+                compiled.validate()
+            elif operation == 'simulate':
+                run = compiled.simulate_dfa if automaton_type == 'DFA' else LazyDFA(compiled).simulate
+                for string in strings:
+                    run(string, trace=False)
+            elif operation == 'minimize':
+                compiled.minimize_partition(record_rounds=False)
+            elif operation == 'to_dfa':
+                compiled.subset_construction(budget=conversion_budget())
+
+        automaton_type = Automaton._type_from_report(CompiledAutomaton(states, transitions, alphabet).validate())
+        return automaton_type, len(states), len(transitions), prepare, execute
+
+    def measure(self, subject, operation, repeat, count_queries=True):
+        """
+        Times ``repeat`` runs of the operation on a freshly prepared copy of
+        the automaton, then counts the queries and peak memory of one more
+        run. Queries are reported as None when not counted, since counting
+        them needs a database connection. Returns None when the operation
+        does not apply to the automaton.
+        """
+        automaton_type, states, transitions, prepare, execute = subject
+        if (operation == 'minimize' and automaton_type != 'DFA') or (operation == 'to_dfa' and automaton_type != 'NFA'):
+            return None
+
+        def run():
+            instance = prepare()
+            start = time.perf_counter()
+            execute(instance, operation)
+            return time.perf_counter() - start
+
+        entry = {
+            'operation': operation,
+            'type': automaton_type,
+            'states': states,
+            'transitions': transitions,
+        }
+        try:
+            timings = [run() for _ in range(repeat)]
+            instance = prepare()
+            tracemalloc.start()
+            try:
+                with CaptureQueriesContext(connection) if count_queries else nullcontext() as queries:
+                    execute(instance, operation)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+        except BudgetExceeded as e:
+            entry['error'] = str(e)
+            return entry
+
+        entry.update({
+            'seconds': {
+                'min': min(timings),
+                'median': statistics.median(timings),
+                'max': max(timings),
+            },
+            'queries': len(queries) if count_queries else None,
+            'peak_memory_bytes': peak,
+        })
+        return entry
+
+    @staticmethod
+    def format_entry(family, size, entry):
+        if 'error' in entry:
+            return f"{family:>14} {size:>7} {entry['operation']:>9}  {entry['error']}"
+        return (
+            f"{family:>14} {size:>7} {entry['operation']:>9} "
+            f"{entry['seconds']['median'] * 1000:10.2f} ms {entry['queries'] if entry['queries'] is not None else '-':>5} queries "
+            f"{entry['peak_memory_bytes'] / 1024:10.1f} KiB"
+        )
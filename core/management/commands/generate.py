@@ -0,0 +1,90 @@
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from core.generators import FAMILIES, GeneratorParams, generate, save_automata
+
+# Automata and state/transition rows written per save_automata call,
+# bounding the objects held in memory
+SAVE_CHUNK_SIZE = 200
+SAVE_CHUNK_ROWS = 200000
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate seeded random or worst-case automata with bulk inserts, '
+        'e.g. for load testing with 100k-state automata or many users.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('family', choices=sorted(FAMILIES), help='Family of automata to generate')
+        parser.add_argument('--states', type=int, default=100, help='Approximate number of states')
+        parser.add_argument('--alphabet-size', type=int, default=2)
+        parser.add_argument('--density', type=float, default=1.0,
+                            help='Transition density (see the family in core.generators)')
+        parser.add_argument('--epsilon-ratio', type=float, default=0.0, help='Share of ε-transitions (random_nfa)')
+        parser.add_argument('--final-ratio', type=float, default=0.3, help='Share of final states')
+        parser.add_argument('--count', type=int, default=1, help='Automata per owner')
+        parser.add_argument('--users', type=int, default=0,
+                            help='Spread the automata over this many generated users (loadtest_<n>)')
+        parser.add_argument('--owner', default='loadtest', help='Owner username when --users is not given')
+        parser.add_argument('--password', help='Password of the generated users (default: cannot log in)')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        try:
+            params = GeneratorParams(
+                alphabet_size=options['alphabet_size'],
+                density=options['density'],
+                epsilon_ratio=options['epsilon_ratio'],
+                final_ratio=options['final_ratio'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        if options['states'] < 1 or options['count'] < 1 or options['users'] < 0:
+            raise CommandError("--states and --count must be positive and --users not negative")
+
+        if options['users']:
+            owners = self.load_users(options['users'], options['password'])
+        else:
+            owners = [User.objects.get_or_create(username=options['owner'])[0]]
+
+        rng = random.Random(options['seed'])
+        started = time.perf_counter()
+        automata = states = transitions = pending_rows = 0
+        pending, pending_owners = [], []
+        for owner in owners:
+            for _ in range(options['count']):
+                generated = generate(options['family'], options['states'], rng, params)
+                pending.append(generated)
+                pending_owners.append(owner)
+                states += len(generated.states)
+                transitions += len(generated.transitions)
+                pending_rows += len(generated.states) + len(generated.transitions)
+                if len(pending) >= SAVE_CHUNK_SIZE or pending_rows >= SAVE_CHUNK_ROWS:
+                    automata += len(save_automata(pending, pending_owners))
+                    pending, pending_owners, pending_rows = [], [], 0
+        if pending:
+            automata += len(save_automata(pending, pending_owners))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {automata} automata with {states} states and {transitions} transitions "
+            f"for {len(owners)} user(s) in {time.perf_counter() - started:.1f}s"
+        ))
+
+    @staticmethod
+    def load_users(count, password=None):
+        """Returns the users loadtest_0 .. loadtest_<count-1>, creating the missing ones in bulk."""
+        names = [f"loadtest_{i}" for i in range(count)]
+        existing = set(User.objects.filter(username__in=names).values_list('username', flat=True))
+        # Hashing is slow, so all generated users share one hash
+        hashed = make_password(password)
+        User.objects.bulk_create(
+            [User(username=name, password=hashed) for name in names if name not in existing],
+            batch_size=1000
+        )
+        users = {user.username: user for user in User.objects.filter(username__in=names)}
+        return [users[name] for name in names]
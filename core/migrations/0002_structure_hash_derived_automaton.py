@@ -0,0 +1,37 @@
+# Generated by Django 5.2.4 on 2026-10-17 06:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='automaton',
+            name='structure_hash',
+            field=models.CharField(blank=True, db_index=True, help_text='Fingerprint of the states, transitions and alphabet, used to cache derived automata', max_length=64),
+        ),
+        migrations.CreateModel(
+            name='DerivedAutomaton',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('operation', models.CharField(choices=[('minimize', 'Minimize'), ('to_dfa', 'NFA to DFA')], max_length=20)),
+                ('source_hash', models.CharField(max_length=64)),
+                ('result_hash', models.CharField(max_length=64)),
+                ('detailed_steps', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('owner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('result', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='derived_from', to='core.automaton')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['operation', 'source_hash', 'owner'], name='core_derive_operati_06115c_idx')],
+            },
+        ),
+    ]
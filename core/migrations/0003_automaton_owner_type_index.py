@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-17 06:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_structure_hash_derived_automaton'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='automaton',
+            index=models.Index(fields=['owner', 'cached_type'], name='core_automa_owner_i_abd955_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 06:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_job'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='automaton',
+            name='alphabet',
+            field=models.TextField(help_text='Enter all symbols of the alphabet, separated by commas (e.g., a,b,c). Ranges such as a-z or U+0000-U+00FF are allowed.'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 06:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_alphabet_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='automaton',
+            name='packed_structure',
+            field=models.BinaryField(blank=True, help_text='States and transitions packed for compiling without loading rows, rewritten whenever the structure changes', null=True),
+        ),
+    ]
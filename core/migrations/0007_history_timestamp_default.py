@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-17 07:03
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_automaton_packed_structure'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userhistory',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-17 07:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_history_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResultSteps',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('operation', models.CharField(choices=[('minimize', 'Minimize'), ('to_dfa', 'NFA to DFA')], max_length=20)),
+                ('data', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('result', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='result_steps', to='core.automaton')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('operation', 'result'), name='unique_result_steps')],
+            },
+        ),
+    ]
@@ -1,8 +1,74 @@
+import atexit
 import json
-from django.db import models
-from django.db.models import Q
+import threading
+import zlib
+from contextlib import contextmanager
+from datetime import timedelta
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Count, OuterRef, Q, Subquery, Sum
+from django.db.models.signals import post_delete, post_save
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .engine import (
+    CompiledAutomaton, ConstructionBudget, LazyDFA, LazyDFARegistry, PackFormatError, StreamingSimulation,
+    pack_structure, packed_pk_totals, packed_structure_hash, structure_hash,
+)
+from .history import HistoryBuffer
+from .instrumentation import timed_phase
+from .parallel import parallel_min_strings, simulate_parallel, simulation_results, simulation_workers
+from .symbols import EPSILON, expand_symbols, parse_alphabet, parse_symbol_class
+
+# Automata with more states than this only record the first and last
+# partitions of the minimization, not every intermediate round
+MINIMIZATION_TRACE_LIMIT = 500
+
+# Rows per INSERT when bulk creating generated states and transitions
+BULK_BATCH_SIZE = 2000
+
+# Default limits of an NFA to DFA conversion, overridable with the
+# CORE_DFA_MAX_STATES, CORE_DFA_MAX_TRANSITIONS and CORE_DFA_MAX_SECONDS settings
+DEFAULT_DFA_MAX_STATES = 10000
+DEFAULT_DFA_MAX_TRANSITIONS = 250000
+DEFAULT_DFA_MAX_SECONDS = 60
+
+# Length of the transition symbol column; longer symbol classes of generated
+# automata are split over several parallel transitions
+SYMBOL_MAX_LENGTH = 50
+
+# Automaton versions whose lazily determinized NFA is kept between requests
+LAZY_DFA_CACHE_SIZE = 32
+
+# Seconds the detailed steps of a minimization or conversion are kept,
+# overridable with the CORE_RESULT_STEPS_TTL setting
+DEFAULT_RESULT_STEPS_TTL = 7 * 24 * 3600
+
+# Rows of each list in the detailed steps rendered on a result page; the
+# rest is fetched page by page from the result steps endpoint
+STEPS_PAGE_SIZE = 200
+
+STATE_LETTERS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+lazy_dfas = LazyDFARegistry(LAZY_DFA_CACHE_SIZE)
+
+
+def state_name(index):
+    """Name for the index-th state of a generated automaton: A..Z, then S26, S27, ..."""
+    return STATE_LETTERS[index] if index < len(STATE_LETTERS) else f"S{index}"
+
+
+def conversion_budget():
+    """ConstructionBudget for to_dfa from the CORE_DFA_MAX_* settings."""
+    return ConstructionBudget(
+        max_states=getattr(settings, 'CORE_DFA_MAX_STATES', DEFAULT_DFA_MAX_STATES),
+        max_transitions=getattr(settings, 'CORE_DFA_MAX_TRANSITIONS', DEFAULT_DFA_MAX_TRANSITIONS),
+        max_seconds=getattr(settings, 'CORE_DFA_MAX_SECONDS', DEFAULT_DFA_MAX_SECONDS),
+    )
 
 
 class Automaton(models.Model):
@@ -11,9 +77,9 @@ class Automaton(models.Model):
     The type is determined by the is_dfa() and is_nfa() methods.
     """
     name = models.CharField(max_length=255)
-    alphabet = models.CharField(
-        max_length=255,
-        help_text="Enter all symbols of the alphabet, separated by commas (e.g., a,b,c)",
+    alphabet = models.TextField(
+        help_text="Enter all symbols of the alphabet, separated by commas (e.g., a,b,c). "
+                  "Ranges such as a-z or U+0000-U+00FF are allowed.",
     )
     owner = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     json_representation = models.JSONField(null=True, blank=True, help_text="JSON representation for graph visualization")
@@ -22,49 +88,300 @@ class Automaton(models.Model):
     is_example = models.BooleanField(default=False, help_text="True if this is a system example automaton")
     has_epsilon = models.BooleanField(default=False, help_text="True if this automaton has epsilon transitions")
     cached_type = models.CharField(max_length=10, blank=True, help_text="Cached automaton type for performance")
+    structure_hash = models.CharField(
+        max_length=64, blank=True, db_index=True,
+        help_text="Fingerprint of the states, transitions and alphabet, used to cache derived automata",
+    )
+    packed_structure = models.BinaryField(
+        null=True, blank=True, editable=False,
+        help_text="States and transitions packed for compiling without loading rows, "
+                  "rewritten whenever the structure changes",
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', 'cached_type']),
+        ]
+
+    def get_alphabet_class(self):
+        """Returns the alphabet as a SymbolClass of code-point intervals."""
+        return parse_alphabet(self.alphabet)
 
     def get_alphabet_as_set(self):
-        """Returns the alphabet as a set of strings."""
-        return set(s.strip() for s in self.alphabet.split(',') if s.strip())
+        """
+        Returns the alphabet as a set of strings, with ranges expanded. Use
+        get_alphabet_class for alphabets that may be large.
+        """
+        return set(self.get_alphabet_class())
+
+    @staticmethod
+    def json_node(state):
+        """Cytoscape node for a State."""
+        return {
+            'data': {
+                'id': state.name,
+                'name': state.name,
+                'pk': state.pk,  # Add primary key for AJAX operations
+                'is_start': state.is_start,
+                'is_final': state.is_final,
+            }
+        }
+
+    @staticmethod
+    def json_edge(transition, source_name, target_name):
+        """Cytoscape edge for a Transition between the named states."""
+        return {
+            'data': {
+                'source': source_name,
+                'target': target_name,
+                'label': transition.symbol if transition.symbol else 'ε',
+                'pk': transition.pk,  # Add primary key for AJAX operations
+                'is_self_loop': source_name == target_name,
+            }
+        }
 
     def update_json_representation(self):
         """
         Updates the json_representation field with the current state of the automaton
         for visualization with Cytoscape.js.
         """
+        self.set_json_representation(self.states.all(), self.transitions.all())
+        self.save()
+        _structure_saved(self.pk)
+
+    def set_json_representation(self, states, transitions):
+        """
+        Rebuilds the JSON representation, structure hash and packed structure
+        from the given State and Transition rows without saving, e.g. from
+        rows that were just bulk created.
+        """
         nodes = []
         edges = []
+        names = {}
 
-        for state in self.states.all():
-            nodes.append({
-                'data': {
-                    'id': state.name,
-                    'name': state.name,
-                    'pk': state.pk,  # Add primary key for AJAX operations
-                    'is_start': state.is_start,
-                    'is_final': state.is_final,
-                }
-            })
+        for state in states:
+            names[state.pk] = state.name
+            nodes.append(self.json_node(state))
 
-        for transition in self.transitions.all():
-            symbol_display = transition.symbol if transition.symbol else 'ε'
-            is_self_loop = transition.from_state.name == transition.to_state.name
-            edges.append({
-                'data': {
-                    'source': transition.from_state.name,
-                    'target': transition.to_state.name,
-                    'label': symbol_display,
-                    'pk': transition.pk,  # Add primary key for AJAX operations
-                    'is_self_loop': is_self_loop,
-                }
-            })
+        for transition in transitions:
+            if transition.from_state_id not in names or transition.to_state_id not in names:
+                continue
+            edges.append(self.json_edge(
+                transition,
+                names[transition.from_state_id],
+                names[transition.to_state_id]
+            ))
 
         self.json_representation = {'nodes': nodes, 'edges': edges}
         # Clear cached type when automaton structure changes
         self.cached_type = ''
-        self.save()
+        self._set_structure_hash(self.compute_structure_hash())
+        self.packed_structure = self.pack_json_structure()
+        self._rows_checked_hash = self.structure_hash
+
+    def _set_structure_hash(self, new_hash):
+        """Sets the structure hash, dropping the shared LazyDFAs of older versions."""
+        if self.pk and new_hash != self.structure_hash:
+            lazy_dfas.discard(self.pk)
+        self.structure_hash = new_hash
+
+    def apply_json_delta(self, added_nodes=(), updated_nodes=(), removed_nodes=(),
+                         added_edges=(), removed_edges=()):
+        """
+        Patches the stored Cytoscape JSON instead of rebuilding it from every
+        state and transition, then saves it with a single UPDATE.
+
+        added_nodes/added_edges are node and edge dicts, updated_nodes are
+        partial node data dicts that must include 'id', removed_nodes are node
+        ids (state names) and removed_edges are transition pks. Edges attached
+        to a removed node are removed as well.
+        Returns the applied delta, or {'reload': True} when there was no stored
+        JSON to patch and it was rebuilt from scratch instead.
+
+        The delta is applied to the JSON as it is in the database, read under
+        a row lock, so overlapping edits of the same automaton do not
+        overwrite each other's changes.
+        """
+        with transaction.atomic():
+            current = (
+                Automaton.objects.select_for_update()
+                .only('json_representation', 'structure_hash')
+                .get(pk=self.pk)
+            )
+            self.json_representation = current.json_representation
+            self.structure_hash = current.structure_hash
+            if not self.json_representation:
+                self.update_json_representation()
+                return {'reload': True}
+            return self._patch_json(added_nodes, updated_nodes, removed_nodes, added_edges, removed_edges)
+
+    def _patch_json(self, added_nodes, updated_nodes, removed_nodes, added_edges, removed_edges):
+        """Applies a delta to the loaded JSON and saves it; see apply_json_delta."""
+        nodes = self.json_representation.get('nodes', [])
+        edges = self.json_representation.get('edges', [])
+
+        removed_node_ids = set(removed_nodes)
+        removed_edge_pks = set(removed_edges)
+        if removed_node_ids:
+            removed_edge_pks.update(
+                edge['data']['pk'] for edge in edges
+                if edge['data']['source'] in removed_node_ids or edge['data']['target'] in removed_node_ids
+            )
+
+        updates = {data['id']: data for data in updated_nodes}
+        patched_nodes = []
+        for node in nodes:
+            node_id = node['data']['id']
+            if node_id in removed_node_ids:
+                continue
+            if node_id in updates:
+                node = {'data': {**node['data'], **updates[node_id]}}
+            patched_nodes.append(node)
+        patched_nodes.extend(added_nodes)
+
+        patched_edges = [edge for edge in edges if edge['data']['pk'] not in removed_edge_pks]
+        patched_edges.extend(added_edges)
+
+        self.json_representation = {'nodes': patched_nodes, 'edges': patched_edges}
+        # Clear cached type when automaton structure changes
+        self.cached_type = ''
+        self._set_structure_hash(self.compute_structure_hash())
+        self.packed_structure = self.pack_json_structure()
+        self.save(update_fields=[
+            'json_representation', 'cached_type', 'structure_hash', 'packed_structure', 'updated_at'
+        ])
+        _structure_saved(self.pk)
+
+        return self.json_delta(added_nodes, updated_nodes, removed_node_ids, added_edges, removed_edge_pks)
+
+    @staticmethod
+    def json_delta(added_nodes=(), updated_nodes=(), removed_nodes=(), added_edges=(), removed_edges=()):
+        """Delta returned to the editor; with no arguments, a change that did nothing."""
+        return {
+            'nodes': {
+                'added': list(added_nodes),
+                'updated': list(updated_nodes),
+                'removed': sorted(removed_nodes),
+            },
+            'edges': {
+                'added': list(added_edges),
+                'removed': sorted(removed_edges),
+            }
+        }
+
+    def compute_structure_hash(self):
+        """
+        Fingerprints the automaton from its JSON representation, so no
+        queries are needed. The JSON is patched by the editor and cleared by
+        any other state or transition write (see invalidate_structure), so a
+        stored hash never describes rows that have since changed.
+        """
+        data = self.json_representation or {}
+        return structure_hash(
+            (
+                (node['data']['name'], node['data']['is_start'], node['data']['is_final'])
+                for node in data.get('nodes', [])
+            ),
+            (
+                (edge['data']['source'], edge['data']['label'], edge['data']['target'])
+                for edge in data.get('edges', [])
+            ),
+            self.get_alphabet_class(),
+            self.has_epsilon,
+        )
+
+    def pack_json_structure(self):
+        """
+        Packs the states and transitions described by the JSON representation,
+        tagged with the current structure hash. Returns None if the JSON lacks
+        primary keys or references unknown states.
+        """
+        data = self.json_representation or {}
+        nodes = [node['data'] for node in data.get('nodes', [])]
+        edges = [edge['data'] for edge in data.get('edges', [])]
+        if any(item.get('pk') is None for item in nodes + edges):
+            return None
+        state_pks = {node['name']: node['pk'] for node in nodes}
+        return pack_structure(
+            ((node['pk'], node['name'], node['is_start'], node['is_final']) for node in nodes),
+            (
+                (edge['pk'], state_pks.get(edge['source']), state_pks.get(edge['target']), edge['label'])
+                for edge in edges
+            ),
+            self.structure_hash
+        )
+
+    def get_structure_hash(self):
+        """
+        Returns the structure hash, computing and storing it first when it is
+        missing (e.g. for automata created before the field existed).
+        """
+        if self.structure_hash:
+            return self.structure_hash
+
+        if not self.json_representation:
+            self.update_json_representation()
+        else:
+            self.structure_hash = self.compute_structure_hash()
+            self.save(update_fields=['structure_hash'])
+        return self.structure_hash
+
+    def _cached_result(self, operation):
+        """
+        Returns (result_automaton, detailed_steps) from a previous run of the
+        operation on a structurally identical automaton of the same owner, or
+        None. Entries whose result automaton has been edited since are dropped.
+        """
+        entry = (
+            DerivedAutomaton.objects
+            .select_related('result')
+            .filter(operation=operation, source_hash=self.get_structure_hash(), owner=self.owner)
+            .first()
+        )
+        if entry is None:
+            return None
+        # An automaton that was already minimal is its own result
+        result = self if entry.result_hash == entry.source_hash else entry.result
+        if result.get_structure_hash() != entry.result_hash:
+            entry.delete()
+            return None
+        # The result page shows the full steps of the original run again
+        ResultSteps.touch(operation, result)
+        return result, dict(entry.detailed_steps, cached=True)
+
+    def _store_result(self, operation, result, detailed_steps):
+        """
+        Records the result of an operation under this automaton's structure
+        hash. The cache entry keeps the summary of the steps; the full steps
+        go to the result store.
+        """
+        DerivedAutomaton.objects.create(
+            operation=operation,
+            source_hash=self.get_structure_hash(),
+            owner=self.owner,
+            result=result,
+            result_hash=result.get_structure_hash(),
+            detailed_steps=steps_summary(detailed_steps)
+        )
+        ResultSteps.store(operation, result, detailed_steps)
 
-    def is_dfa(self):
+    def validate(self):
+        """
+        Validates the automaton against the DFA and NFA rules in a single pass
+        over one states query and one transitions query.
+        Returns a dict with 'dfa_problems' and 'nfa_problems', each a list of
+        problems ({'code', 'message', ...}); an empty list means valid.
+        """
+        return self.compile().validate()
+
+    @staticmethod
+    def _validation_result(problems, valid_message):
+        """Turns a problem list into the (is_valid, message) tuple of is_dfa/is_nfa."""
+        if problems:
+            return False, problems[0]['message']
+        return True, valid_message
+
+    def is_dfa(self, report=None):
         """
         Checks if the automaton is a valid DFA.
         A DFA must have:
@@ -74,40 +391,10 @@ class Automaton(models.Model):
         - For every state and every symbol, exactly one transition (deterministic)
         Returns tuple: (is_dfa, message)
         """
-        # Basic validation checks
-        start_states = self.states.filter(is_start=True)
-        if not start_states.exists():
-            return False, "No start state defined"
-        
-        if start_states.count() > 1:
-            return False, "DFA must have exactly one start state"
-        
-        final_states = self.states.filter(is_final=True)
-        if not final_states.exists():
-            return False, "No final state defined"
-        
-        # Check for epsilon transitions
-        for transition in self.transitions.all():
-            if not transition.symbol or transition.symbol == 'ε':
-                return False, "DFA cannot have epsilon transitions"
-        
-        # Check for nondeterministic transitions
-        alphabet = self.get_alphabet_as_set()
-        for state in self.states.all():
-            for symbol in alphabet:
-                matching_transitions = []
-                for trans in self.transitions.filter(from_state=state):
-                    if trans.matches_symbol(symbol):
-                        matching_transitions.append(trans)
-                
-                if len(matching_transitions) > 1:
-                    return False, f"State '{state.name}' has multiple transitions for symbol '{symbol}'"
-                elif len(matching_transitions) == 0:
-                    return False, f"State '{state.name}' missing transition for symbol '{symbol}'"
-        
-        return True, "Valid DFA"
+        report = report or self.validate()
+        return self._validation_result(report['dfa_problems'], "Valid DFA")
 
-    def is_nfa(self):
+    def is_nfa(self, report=None):
         """
         Checks if the automaton is a valid NFA.
         An NFA can have:
@@ -118,49 +405,66 @@ class Automaton(models.Model):
         - Missing transitions for some state-symbol pairs
         Returns tuple: (is_nfa, message)
         """
-        # Basic validation checks
-        start_states = self.states.filter(is_start=True)
-        if not start_states.exists():
-            return False, "No start state defined"
-        
-        final_states = self.states.filter(is_final=True)
-        if not final_states.exists():
-            return False, "No final state defined"
-        
-        # Check if all transitions reference valid states
-        for transition in self.transitions.all():
-            if transition.from_state not in self.states.all():
-                return False, f"Transition references invalid from_state: {transition.from_state.name}"
-            if transition.to_state not in self.states.all():
-                return False, f"Transition references invalid to_state: {transition.to_state.name}"
-        
-        return True, "Valid NFA"
+        report = report or self.validate()
+        return self._validation_result(report['nfa_problems'], "Valid NFA")
 
-    def get_type(self):
+    def get_type(self, report=None):
         """
         Returns the type of automaton: 'DFA', 'NFA', or 'INVALID'
         Rule: If NFA is exactly the same as DFA, assume it to be DFA because NFA can be DFA but DFA cannot be NFA.
-        Uses caching for performance.
+        Uses caching for performance; pass the report of validate() when
+        the caller already has it.
         """
         if self.cached_type:
             return self.cached_type
             
-        is_dfa_result, dfa_message = self.is_dfa()
-        if is_dfa_result:
-            self.cached_type = 'DFA'
-            self.save(update_fields=['cached_type'])
+        self.cached_type = self._type_from_report(report or self.validate())
+        self.save(update_fields=['cached_type'])
+        return self.cached_type
+
+    @staticmethod
+    def _type_from_report(report):
+        """Maps a validation report to 'DFA', 'NFA' or 'INVALID'."""
+        if not report['dfa_problems']:
             return 'DFA'
-        
-        is_nfa_result, nfa_message = self.is_nfa()
-        if is_nfa_result:
-            self.cached_type = 'NFA'
-            self.save(update_fields=['cached_type'])
+        if not report['nfa_problems']:
             return 'NFA'
-        
-        self.cached_type = 'INVALID'
-        self.save(update_fields=['cached_type'])
         return 'INVALID'
 
+    @classmethod
+    def classify_untyped(cls, queryset):
+        """
+        Fills in cached_type for every automaton of the queryset that does
+        not have one yet. The states and transitions of all of them are
+        loaded with one query each, so the cost does not grow with the
+        number of automata. Returns the number of automata classified.
+        """
+        pending = list(queryset.filter(cached_type='').only('pk', 'alphabet'))
+        if not pending:
+            return 0
+
+        pending_ids = queryset.filter(cached_type='').values('pk')
+        states = defaultdict(list)
+        for automaton_id, *row in (
+            State.objects.filter(automaton__in=pending_ids).order_by('pk')
+            .values_list('automaton_id', 'pk', 'name', 'is_start', 'is_final')
+        ):
+            states[automaton_id].append(row)
+        transitions = defaultdict(list)
+        for automaton_id, *row in (
+            Transition.objects.filter(automaton__in=pending_ids).order_by('pk')
+            .values_list('automaton_id', 'pk', 'from_state_id', 'to_state_id', 'symbol')
+        ):
+            transitions[automaton_id].append(row)
+
+        for automaton in pending:
+            compiled = CompiledAutomaton(
+                states[automaton.pk], transitions[automaton.pk], automaton.get_alphabet_class()
+            )
+            automaton.cached_type = cls._type_from_report(compiled.validate())
+        cls.objects.bulk_update(pending, ['cached_type'], batch_size=BULK_BATCH_SIZE)
+        return len(pending)
+
     def is_valid(self):
         """
         Checks if the automaton is valid based on its type.
@@ -173,299 +477,297 @@ class Automaton(models.Model):
         else:
             return False, "Invalid automaton"
 
-    def simulate(self, input_string):
-        """Simulates the automaton on a given input string."""
+    @timed_phase('simulate')
+    def simulate(self, input_string, trace=True):
+        """
+        Simulates the automaton on a given input string.
+        Pass trace=False to skip building the path when only the verdict is needed.
+        """
         automaton_type = self.get_type()
         if automaton_type == 'DFA':
-            return self._simulate_dfa(input_string)
+            return self._simulate_dfa(input_string, trace=trace)
         elif automaton_type == 'NFA':
-            return self._simulate_nfa(input_string)
+            return self._simulate_nfa(input_string, trace=trace)
         else:
             return False, "Cannot simulate invalid automaton", []
 
-    def _simulate_dfa(self, input_string):
-        """Simulates DFA on input string."""
-        if not self.states.filter(is_start=True).exists():
-            return False, "No start state defined.", []
+    @timed_phase('simulate_many')
+    def simulate_many(self, input_strings, include_paths=False, workers=None):
+        """
+        Simulates several input strings against a single compiled copy of the
+        automaton. Returns a list of dicts with 'string', 'accepted', 'message'
+        and, when include_paths is set, 'path'.
 
-        current_state = self.states.get(is_start=True)
-        path = [current_state.name]
-        
-        # Create detailed path tracking for DFA
-        detailed_path = {
-            'states': [current_state.name],
-            'transitions': [],
-            'symbols': []
-        }
+        Large batches are spread over ``workers`` processes (by default
+        CORE_SIMULATION_WORKERS, see core.parallel); pass workers=1 to stay
+        in this process.
+        """
+        automaton_type = self.get_type()
+        if automaton_type not in ('DFA', 'NFA'):
+            return [
+                {'string': input_string, 'accepted': False, 'message': "Cannot simulate invalid automaton"}
+                for input_string in input_strings
+            ]
+
+        if workers is None:
+            workers = simulation_workers()
+        if workers > 1 and len(input_strings) >= parallel_min_strings():
+            # The workers compile their own copy, so this process only
+            # compiles when there is no current packed structure to send
+            packed = self._current_packed_structure()
+            if packed is None:
+                compiled = self.compile()
+                packed = self._current_packed_structure() or compiled.pack(self.structure_hash)
+            if packed is not None:
+                return simulate_parallel(
+                    bytes(packed), self.alphabet, automaton_type == 'NFA', list(input_strings),
+                    include_paths=include_paths, workers=workers
+                )
 
-        for symbol in input_string:
-            if symbol not in self.get_alphabet_as_set():
-                return False, f"Input symbol '{symbol}' is not in the alphabet.", path
+        if automaton_type == 'DFA':
+            run = self.compile().simulate_dfa
+        else:
+            run = self.lazy_dfa().simulate
+        return simulation_results(run, input_strings, include_paths)
+
+    @timed_phase('compile')
+    def compile(self):
+        """
+        Returns a CompiledAutomaton for running the algorithms. It is decoded
+        from packed_structure when that was packed for the current structure
+        hash and still has the pks of the State and Transition rows, checked
+        with one query; otherwise it is built from one states query and one
+        transitions query, and packed for next time.
+
+        The packed structure and hash are derived from the stored JSON, so
+        when the rows turn out to differ, the JSON is rebuilt from them too.
+        """
+        packed = self.packed_structure
+        if packed and self.structure_hash and packed_structure_hash(packed) == self.structure_hash:
             try:
-                # Find transition that matches this symbol
-                transitions = self.transitions.filter(from_state=current_state)
-                matching_transition = None
-                for trans in transitions:
-                    if trans.matches_symbol(symbol):
-                        matching_transition = trans
-                        break
-                
-                if not matching_transition:
-                    return False, f"No transition found from state '{current_state.name}' on symbol '{symbol}'.", path
-                
-                current_state = matching_transition.to_state
-                path.append(current_state.name)
-                
-                # Add transition details
-                detailed_path['states'].append(current_state.name)
-                detailed_path['transitions'].append([{
-                    'from_state': matching_transition.from_state.name,
-                    'to_state': matching_transition.to_state.name,
-                    'symbol': symbol,
-                    'transition_id': matching_transition.pk
-                }])
-                detailed_path['symbols'].append(symbol)
-                
-            except Exception as e:
-                return False, f"Error during simulation: {str(e)}", path
-
-        return current_state.is_final, "Simulation completed.", path, detailed_path
-
-    def _simulate_nfa(self, input_string):
-        """Simulates NFA on input string."""
-        
-        def epsilon_closure(states):
-            """Calculates the epsilon closure for a set of states."""
-            closure = set(states)
-            stack = list(states)
-            while stack:
-                state = stack.pop()
-                # Check for epsilon transitions (empty string or 'ε')
-                epsilon_transitions = self.transitions.filter(from_state=state)
-                for trans in epsilon_transitions:
-                    if trans.matches_symbol('ε') or (not trans.symbol):
-                        if trans.to_state not in closure:
-                            closure.add(trans.to_state)
-                            stack.append(trans.to_state)
-            return closure
-
-        # Check if there are any start states
-        start_states = self.states.filter(is_start=True)
-        if not start_states.exists():
-            return False, "No start state defined.", []
-
-        # Get all start states and their epsilon closure
-        initial_states = set(start_states)
-        current_states = epsilon_closure(initial_states)
-        
-        # Create detailed path tracking with state sets and transitions
-        path = [sorted([state.name for state in current_states])]
-        detailed_path = {
-            'states': [sorted([state.name for state in current_states])],
-            'transitions': [],
-            'symbols': []
-        }
+                compiled = CompiledAutomaton.from_packed(packed, self.get_alphabet_class())
+            except PackFormatError:
+                compiled = None
+            if compiled is not None and self._packed_matches_rows(compiled.pk_totals):
+                return compiled
+            if compiled is not None:
+                self.update_json_representation()
+                if self.packed_structure is not None:
+                    return CompiledAutomaton.from_packed(self.packed_structure, self.get_alphabet_class())
 
-        for symbol in input_string:
-            if symbol not in self.get_alphabet_as_set():
-                return False, f"Input symbol '{symbol}' is not in the alphabet.", path
+        compiled = CompiledAutomaton.from_automaton(self)
+        if self.pk and self.structure_hash:
+            self.packed_structure = compiled.pack(self.structure_hash)
+            if self.packed_structure is not None:
+                Automaton.objects.filter(pk=self.pk).update(packed_structure=self.packed_structure)
+                self._rows_checked_hash = self.structure_hash
+        return compiled
 
-            next_states = set()
-            transitions_taken = []
-            
-            for state in current_states:
-                transitions = self.transitions.filter(from_state=state)
-                for trans in transitions:
-                    if trans.matches_symbol(symbol):
-                        next_states.add(trans.to_state)
-                        transitions_taken.append({
-                            'from_state': state.name,
-                            'to_state': trans.to_state.name,
-                            'symbol': symbol,
-                            'transition_id': trans.pk
-                        })
-            
-            if not next_states:
-                return False, "Simulation stuck. No transition found.", path
-
-            current_states = epsilon_closure(next_states)
-            if current_states:
-                path.append(sorted([state.name for state in current_states]))
-                detailed_path['states'].append(sorted([state.name for state in current_states]))
-                detailed_path['transitions'].append(transitions_taken)
-                detailed_path['symbols'].append(symbol)
-
-        # Check if any of the final states is in the set of current states
-        for state in current_states:
-            if state.is_final:
-                return True, "String accepted.", path, detailed_path
-        
-        return False, "String rejected.", path, detailed_path
+    def _current_packed_structure(self):
+        """
+        Returns packed_structure if it was packed for the current structure
+        hash and matches the rows, without compiling it; otherwise None.
+        """
+        packed = self.packed_structure
+        if not (packed and self.structure_hash and packed_structure_hash(packed) == self.structure_hash):
+            return None
+        try:
+            if self._packed_matches_rows(lambda: packed_pk_totals(packed)):
+                return packed
+        except PackFormatError:
+            pass
+        return None
+
+    def _packed_matches_rows(self, pk_totals):
+        """
+        Checks a packed structure against the rows, once per instance and
+        structure hash. pk_totals returns the totals of the packed structure
+        (see CompiledAutomaton.pk_totals) and is only called when checking.
+        """
+        if not self.pk or self.__dict__.get('_rows_checked_hash') == self.structure_hash:
+            return True
+        if self._row_totals() != pk_totals():
+            return False
+        self._rows_checked_hash = self.structure_hash
+        return True
+
+    def _row_totals(self):
+        """
+        (state count, sum of state pks, transition count, sum of transition
+        pks) of the automaton's rows, fetched with a single query.
+        """
+        def total(model, function):
+            return Subquery(
+                model.objects.filter(automaton=OuterRef('pk')).order_by().values('automaton')
+                .annotate(total=function('pk')).values('total')
+            )
+
+        totals = Automaton.objects.filter(pk=self.pk).values_list(
+            total(State, Count), total(State, Sum), total(Transition, Count), total(Transition, Sum)
+        ).get()
+        return tuple(value or 0 for value in totals)
+
+    def lazy_dfa(self):
+        """
+        Returns the LazyDFA for simulating this NFA. Saved automata share one
+        per (pk, structure hash) across requests, so the subset transitions
+        found by earlier simulations are reused until the automaton is
+        edited, which drops the entries of older versions. The shared copy
+        may have been compiled from since-replaced rows of an identical
+        structure, so its transition ids are only trusted for names and
+        verdicts, not for detailed traces.
+        """
+        if not self.pk:
+            return LazyDFA(self.compile())
+        return lazy_dfas.get((self.pk, self.get_structure_hash()), lambda: LazyDFA(self.compile()))
 
-    def to_dfa(self):
+    def streaming_simulation(self, checkpoint_every=0, run_length=False, trace=False):
+        """
+        Returns a StreamingSimulation for feeding an input in chunks, or None
+        if the automaton is neither a DFA nor an NFA. Traced NFA runs use
+        their own LazyDFA, since the transition ids of the shared one may be
+        stale (see lazy_dfa).
+        """
+        options = {'checkpoint_every': checkpoint_every, 'run_length': run_length, 'trace': trace}
+        automaton_type = self.get_type()
+        if automaton_type == 'DFA':
+            return StreamingSimulation(self.compile(), **options)
+        if automaton_type == 'NFA':
+            lazy_dfa = LazyDFA(self.compile()) if trace else self.lazy_dfa()
+            return StreamingSimulation(lazy_dfa.compiled, lazy_dfa, **options)
+        return None
+
+    def _simulate_dfa(self, input_string, trace=True):
+        """Simulates DFA on input string."""
+        return self.compile().simulate_dfa(input_string, trace=trace)
+
+    def _simulate_nfa(self, input_string, trace=True):
+        """Simulates NFA on input string."""
+        if trace:
+            return self.compile().simulate_nfa(input_string, trace=True)
+        return self.lazy_dfa().simulate(input_string, trace=False)
+
+    @timed_phase('to_dfa')
+    def to_dfa(self, progress=None, budget=None):
         """
         Converts the NFA to an equivalent DFA using the subset construction algorithm.
+        A structurally identical NFA that was converted before returns the
+        existing DFA and steps instead of creating a new one.
+        progress, if given, is called with keyword arguments describing how
+        far the conversion got (phase, subsets_discovered).
+        budget limits the size and duration of the construction (defaults to
+        conversion_budget()); when it is exceeded engine.BudgetExceeded is
+        raised and nothing is written to the database.
         Returns a tuple: (dfa, detailed_steps)
         """
         if self.get_type() != 'NFA':
             raise ValueError("Can only convert NFA to DFA")
-        
-        from collections import defaultdict, deque
-        
+
+        cached = self._cached_result(DerivedAutomaton.TO_DFA)
+        if cached:
+            return cached
+
+        dfa, detailed_steps = self._to_dfa(progress, budget or conversion_budget())
+        self._store_result(DerivedAutomaton.TO_DFA, dfa, detailed_steps)
+        return dfa, detailed_steps
+
+    def _to_dfa(self, progress=None, budget=None):
+        """
+        Runs the subset construction. Subsets are int bitmasks over the
+        compiled NFA, and the resulting DFA is written with bulk inserts
+        inside a single transaction.
+        """
+        compiled = self.compile()
         steps = []
-        state_construction_log = []
-        
-        # Helper function to compute epsilon closure
-        def epsilon_closure(states):
-            """
-            Calculates the epsilon closure for a set of states.
-            Returns the set of all states reachable by epsilon transitions.
-            """
-            if not states:
-                return set()
-            
-            closure = set(states)
-            stack = list(states)
-            
-            while stack:
-                state = stack.pop()
-                # Find all epsilon transitions from this state
-                for trans in self.transitions.filter(from_state=state):
-                    if trans.matches_symbol('ε') or not trans.symbol:
-                        if trans.to_state not in closure:
-                            closure.add(trans.to_state)
-                            stack.append(trans.to_state)
-            
-            return closure
         
         # Step 1: Get NFA transition table
-        alphabet = self.get_alphabet_as_set()
+        alphabet = compiled.symbols
+        nfa_table = compiled.transition_table()
         steps.append({
             "step": 1,
             "description": "NFA Transition Table Analysis",
-            "nfa_table": self._create_transition_table(self),
-            "alphabet": sorted(alphabet),
+            "nfa_table": nfa_table,
+            "alphabet": list(alphabet),
             "explanation": "Analyze the original NFA structure and alphabet"
         })
         
         # Step 2: Create the DFA's start state
-        start_states = set(self.states.filter(is_start=True))
-        if not start_states:
+        if not compiled.start_states:
             raise ValueError("NFA must have at least one start state")
         
-        # Get epsilon closure of start states
-        initial_state_set = epsilon_closure(start_states)
-        
         steps.append({
             "step": 2,
             "description": "Create DFA start state",
-            "start_states": [s.name for s in start_states],
-            "epsilon_closure": sorted([s.name for s in initial_state_set]),
+            "start_states": [compiled.state_names[s] for s in compiled.start_states],
+            "epsilon_closure": compiled.mask_names(compiled.start_mask()),
             "explanation": "DFA start state is the ε-closure of NFA start states"
         })
         
-        # Create the DFA
-        dfa = Automaton.objects.create(
-            name=f"{self.name}_DFA",
-            alphabet=self.alphabet,
-            owner=self.owner
-        )
-        
-        # Map from frozenset of NFA states to DFA state
-        state_map = {}
-        # Queue of state sets to process
-        queue = deque([initial_state_set])
-        # Set of processed state sets
-        processed = set()
-        
-        # Better state naming
-        state_names = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L', 'M', 'N', 'O', 'P', 'Q', 'R', 'S', 'T', 'U', 'V', 'W', 'X', 'Y', 'Z']
-        state_counter = 0
-        
-        # Create initial DFA state
-        initial_state_name = state_names[state_counter] if state_counter < len(state_names) else f"S{state_counter}"
-        initial_dfa_state = dfa.states.create(
-            name=initial_state_name,
-            is_start=True,
-            is_final=any(s.is_final for s in initial_state_set)
-        )
-        state_map[frozenset(initial_state_set)] = initial_dfa_state
-        
-        state_construction_log.append({
-            "dfa_state": initial_state_name,
-            "nfa_states": sorted([s.name for s in initial_state_set]),
-            "is_start": True,
-            "is_final": any(s.is_final for s in initial_state_set)
-        })
-        
-        state_counter += 1
+        # Step 3: Discover the reachable subsets and the transitions between them
+        if progress:
+            progress(phase='subset_construction')
+        with timed_phase('subset_construction'):
+            subsets, subset_transitions = compiled.subset_construction(
+                progress=progress and (lambda count: progress(subsets_discovered=count)),
+                budget=budget
+            )
+        final_mask = compiled.final_mask
+        dfa_state_names = [state_name(i) for i in range(len(subsets))]
+        
+        # Step 4: A DFA state is final if it contains at least one NFA final state
+        state_construction_log = [
+            {
+                "dfa_state": dfa_state_names[i],
+                "nfa_states": compiled.mask_names(mask),
+                "is_start": i == 0,
+                "is_final": bool(mask & final_mask)
+            }
+            for i, mask in enumerate(subsets)
+        ]
         
-        # Step 3: Create the DFA's transition table
         transition_log = []
+        for from_index, sym, to_index in subset_transitions:
+            from_names = compiled.mask_names(subsets[from_index])
+            to_names = compiled.mask_names(subsets[to_index])
+            transition_log.append({
+                "from_state": dfa_state_names[from_index],
+                "to_state": dfa_state_names[to_index],
+                "symbol": alphabet[sym],
+                "nfa_computation": f"δ({from_names}, {alphabet[sym]}) = ε-closure({to_names})"
+            })
         
-        while queue:
-            current_state_set = queue.popleft()
-            current_state_set_frozen = frozenset(current_state_set)
-            
-            if current_state_set_frozen in processed:
-                continue
-            processed.add(current_state_set_frozen)
-            
-            current_dfa_state = state_map[current_state_set_frozen]
-            
-            # For each symbol in alphabet
-            for symbol in alphabet:
-                next_state_set = set()
-                
-                # Find all states reachable by this symbol from current state set
-                for nfa_state in current_state_set:
-                    for trans in self.transitions.filter(from_state=nfa_state):
-                        if trans.matches_symbol(symbol):
-                            next_state_set.add(trans.to_state)
-                
-                if next_state_set:
-                    # Step 3 continued: Add epsilon closure of the destination states
-                    next_state_set = epsilon_closure(next_state_set)
-                    next_state_set_frozen = frozenset(next_state_set)
-                    
-                    # Create new DFA state if it doesn't exist
-                    if next_state_set_frozen not in state_map:
-                        next_state_name = state_names[state_counter] if state_counter < len(state_names) else f"S{state_counter}"
-                        
-                        # Step 4: Create DFA final states
-                        # A DFA state is final if it contains at least one NFA final state
-                        is_final = any(s.is_final for s in next_state_set)
-                        
-                        next_dfa_state = dfa.states.create(
-                            name=next_state_name,
-                            is_start=False,
-                            is_final=is_final
-                        )
-                        state_map[next_state_set_frozen] = next_dfa_state
-                        queue.append(next_state_set)
-                        
-                        state_construction_log.append({
-                            "dfa_state": next_state_name,
-                            "nfa_states": sorted([s.name for s in next_state_set]),
-                            "is_start": False,
-                            "is_final": is_final
-                        })
-                        
-                        state_counter += 1
-                    
-                    # Create transition in DFA
-                    dfa.transitions.create(
-                        from_state=current_dfa_state,
-                        to_state=state_map[next_state_set_frozen],
-                        symbol=symbol
-                    )
-                    
-                    transition_log.append({
-                        "from_state": current_dfa_state.name,
-                        "to_state": state_map[next_state_set_frozen].name,
-                        "symbol": symbol,
-                        "nfa_computation": f"δ({[s.name for s in current_state_set]}, {symbol}) = ε-closure({[s.name for s in next_state_set]})"
-                    })
+        # Building the logs counts against the time budget; once this passes
+        # the DFA is written in one transaction, so an abort leaves no rows
+        if budget is not None:
+            budget.check(len(subsets), len(subset_transitions))
+        if progress:
+            progress(phase='persisting')
+        with timed_phase('persist'), transaction.atomic():
+            dfa = Automaton.objects.create(
+                name=f"{self.name}_DFA",
+                alphabet=self.alphabet,
+                owner=self.owner
+            )
+            dfa_states = State.objects.bulk_create([
+                State(
+                    automaton=dfa,
+                    name=entry["dfa_state"],
+                    is_start=entry["is_start"],
+                    is_final=entry["is_final"]
+                )
+                for entry in state_construction_log
+            ], batch_size=BULK_BATCH_SIZE)
+            symbol_specs = [c.specs(SYMBOL_MAX_LENGTH) for c in compiled.symbol_classes]
+            Transition.objects.bulk_create([
+                Transition(
+                    automaton=dfa,
+                    from_state=dfa_states[from_index],
+                    to_state=dfa_states[to_index],
+                    symbol=spec
+                )
+                for from_index, sym, to_index in subset_transitions
+                for spec in symbol_specs[sym]
+            ], batch_size=BULK_BATCH_SIZE)
         
         steps.append({
             "step": 3,
@@ -491,12 +793,12 @@ class Automaton(models.Model):
         # Create detailed result
         detailed_steps = {
             "steps": steps,
-            "message": f"Successfully converted NFA to DFA ({self.states.count()} NFA states → {dfa.states.count()} DFA states)",
-            "original_nfa_table": self._create_transition_table(self),
+            "message": f"Successfully converted NFA to DFA ({compiled.num_states} NFA states → {len(subsets)} DFA states)",
+            "original_nfa_table": nfa_table,
             "final_dfa_table": self._create_transition_table(dfa),
             "state_mapping": state_construction_log,
-            "nfa_state_count": self.states.count(),
-            "dfa_state_count": dfa.states.count(),
+            "nfa_state_count": compiled.num_states,
+            "dfa_state_count": len(subsets),
             "has_epsilon_transitions": self.has_epsilon
         }
         
@@ -536,224 +838,129 @@ class Automaton(models.Model):
         for state in dead_states:
             state.delete()
 
-    def minimize(self):
+    @timed_phase('minimize')
+    def minimize(self, progress=None):
         """
         Minimizes the automaton if it's a DFA using the Myhill-Nerode Theorem.
+        A structurally identical DFA that was minimized before returns the
+        existing result and steps instead of creating a new automaton.
+        progress, if given, is called with keyword arguments describing how
+        far the minimization got (phase, partition_rounds, blocks).
         Returns a tuple: (minimized_automaton, detailed_steps)
         """
         if self.get_type() != 'DFA':
             raise ValueError("Can only minimize DFA")
-        
-        states = list(self.states.all())
-        n = len(states)
+
+        cached = self._cached_result(DerivedAutomaton.MINIMIZE)
+        if cached:
+            return cached
+
+        minimized_automaton, detailed_steps = self._minimize(progress)
+        self._store_result(DerivedAutomaton.MINIMIZE, minimized_automaton, detailed_steps)
+        return minimized_automaton, detailed_steps
+
+    def _minimize(self, progress=None):
+        """
+        Computes the equivalence classes with Hopcroft's algorithm on the
+        compiled transition table and writes the minimized DFA with bulk
+        inserts inside a single transaction.
+        """
+        compiled = self.compile()
+        n = compiled.num_states
         
         if n <= 1:
             return self, {"steps": [], "message": "Already minimal - single state"}
         
-        alphabet = self.get_alphabet_as_set()
+        alphabet = compiled.symbols
+        names = compiled.state_names
         steps = []
+
+        def partition_names(partition):
+            return [[names[state] for state in group] for group in partition]
+
+        # Intermediate partitions are only recorded for automata small enough to display
+        record_rounds = n <= MINIMIZATION_TRACE_LIMIT
+        if progress:
+            progress(phase='partitioning')
+        with timed_phase('hopcroft'):
+            current_partition, rounds = compiled.minimize_partition(
+                record_rounds=record_rounds,
+                progress=progress and (lambda done, blocks: progress(partition_rounds=done, blocks=blocks))
+            )
         
         # Step 1: Initial partition P0 - separate final and non-final states
-        final_states = []
-        non_final_states = []
-        
-        for state in states:
-            if state.is_final:
-                final_states.append(state)
-            else:
-                non_final_states.append(state)
-        
-        # Create initial partition P0
-        current_partition = []
-        if final_states:
-            current_partition.append(final_states)
-        if non_final_states:
-            current_partition.append(non_final_states)
-        
-        # Record Step 1
         steps.append({
             "step": 1,
             "description": "Initial partition P₀: Separate final and non-final states",
-            "partition": [[state.name for state in group] for group in current_partition],
+            "partition": partition_names(rounds[0]),
             "explanation": "States are initially grouped by their acceptance status"
         })
         
-        # Step 2-4: Iteratively refine partitions
-        k = 0
-        while True:
-            k += 1
-            new_partition = []
-            
-            # For each set in current partition, check if it can be split
-            for state_set in current_partition:
-                if len(state_set) == 1:
-                    # Single state sets cannot be split
-                    new_partition.append(state_set)
-                    continue
-                
-                # Check all pairs in this set for distinguishability
-                sub_partitions = []
-                remaining_states = list(state_set)
-                
-                while remaining_states:
-                    # Start new sub-partition with first remaining state
-                    current_sub = [remaining_states.pop(0)]
-                    
-                    # Check which other states are equivalent to this one
-                    i = 0
-                    while i < len(remaining_states):
-                        state1 = current_sub[0]
-                        state2 = remaining_states[i]
-                        
-                        # Check if state1 and state2 are distinguishable
-                        are_distinguishable = False
-                        distinguishing_symbol = None
-                        
-                        for symbol in alphabet:
-                            # Find transitions for both states
-                            trans1 = None
-                            trans2 = None
-                            
-                            for trans in self.transitions.filter(from_state=state1):
-                                if trans.matches_symbol(symbol):
-                                    trans1 = trans
-                                    break
-                            
-                            for trans in self.transitions.filter(from_state=state2):
-                                if trans.matches_symbol(symbol):
-                                    trans2 = trans
-                                    break
-                            
-                            if not trans1 or not trans2:
-                                # Missing transition means states are distinguishable
-                                are_distinguishable = True
-                                distinguishing_symbol = symbol
-                                break
-                            
-                            # Find which partition sets the destination states belong to
-                            dest1 = trans1.to_state
-                            dest2 = trans2.to_state
-                            
-                            # Find partition sets for destinations
-                            dest1_partition = None
-                            dest2_partition = None
-                            
-                            for j, partition_set in enumerate(current_partition):
-                                if dest1 in partition_set:
-                                    dest1_partition = j
-                                if dest2 in partition_set:
-                                    dest2_partition = j
-                            
-                            # If destinations are in different partitions, states are distinguishable
-                            if dest1_partition != dest2_partition:
-                                are_distinguishable = True
-                                distinguishing_symbol = symbol
-                                break
-                        
-                        if not are_distinguishable:
-                            # States are equivalent, add to current sub-partition
-                            current_sub.append(remaining_states.pop(i))
-                        else:
-                            i += 1
-                    
-                    sub_partitions.append(current_sub)
-                
-                # Add all sub-partitions to new partition
-                new_partition.extend(sub_partitions)
-            
-            # Record this step
-            steps.append({
+        # Step 2-4: Each round of splitters refines the partition
+        for k, partition in enumerate(rounds[1:], start=1):
+            step = {
                 "step": k + 1,
                 "description": f"Partition P₍{k}₎: Check distinguishability",
-                "partition": [[state.name for state in group] for group in new_partition],
+                "partition": partition_names(partition) if partition is not None else [],
                 "explanation": f"States are grouped by equivalent behavior on alphabet {list(alphabet)}"
-            })
-            
-            # Check if partition changed
-            if len(new_partition) == len(current_partition):
-                # Check if sets are the same
-                partition_changed = False
-                for new_set in new_partition:
-                    found_match = False
-                    for old_set in current_partition:
-                        if set(new_set) == set(old_set):
-                            found_match = True
-                            break
-                    if not found_match:
-                        partition_changed = True
-                        break
-                
-                if not partition_changed:
-                    break  # No change, we're done
-            
-            current_partition = new_partition
+            }
+            if partition is None:
+                step["explanation"] += f" (groups omitted for automata with more than {MINIMIZATION_TRACE_LIMIT} states)"
+            steps.append(step)
         
         # Step 5: Check if minimization is possible
         if len(current_partition) == n:
             return self, {
                 "steps": steps,
                 "message": "Already minimal - no equivalent states found",
-                "equivalence_classes": [[state.name for state in group] for group in current_partition]
+                "equivalence_classes": partition_names(current_partition)
             }
         
-        # Create minimized automaton
-        minimized_automaton = Automaton.objects.create(
-            name=f"{self.name}_minimized",
-            alphabet=self.alphabet,
-            owner=self.owner
-        )
-        
-        # Create mapping from old states to new states with better names
-        state_map = {}
-        state_names = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L', 'M', 'N', 'O', 'P', 'Q', 'R', 'S', 'T', 'U', 'V', 'W', 'X', 'Y', 'Z']
-        
+        state_names = [state_name(i) for i in range(len(current_partition))]
+        class_of = {}
         for i, equiv_class in enumerate(current_partition):
-            # Create clean state name
-            if i < len(state_names):
-                new_state_name = state_names[i]
-            else:
-                new_state_name = f"S{i}"
-            
-            # Check if any state in class is start/final
-            is_start = any(state.is_start for state in equiv_class)
-            is_final = any(state.is_final for state in equiv_class)
-            
-            new_state = minimized_automaton.states.create(
-                name=new_state_name,
-                is_start=is_start,
-                is_final=is_final
-            )
-            
-            # Map all old states in this class to the new state
             for state in equiv_class:
-                state_map[state] = new_state
-        
-        # Create transitions for minimized automaton
-        created_transitions = set()
-        
-        for old_state in states:
-            new_from_state = state_map[old_state]
-            
-            for symbol in alphabet:
-                # Find transition that matches this symbol
-                old_transition = None
-                for trans in self.transitions.filter(from_state=old_state):
-                    if trans.matches_symbol(symbol):
-                        old_transition = trans
-                        break
-                
-                if old_transition:
-                    new_to_state = state_map[old_transition.to_state]
-                    
-                    # Avoid duplicate transitions
-                    transition_key = (new_from_state.id, new_to_state.id, symbol)
-                    if transition_key not in created_transitions:
-                        minimized_automaton.transitions.create(
-                            from_state=new_from_state,
-                            to_state=new_to_state,
-                            symbol=symbol
+                class_of[state] = i
+
+        # Create minimized automaton
+        if progress:
+            progress(phase='persisting')
+        with timed_phase('persist'), transaction.atomic():
+            minimized_automaton = Automaton.objects.create(
+                name=f"{self.name}_minimized",
+                alphabet=self.alphabet,
+                owner=self.owner
+            )
+            new_states = State.objects.bulk_create([
+                State(
+                    automaton=minimized_automaton,
+                    name=state_names[i],
+                    is_start=any(compiled.is_start[state] for state in equiv_class),
+                    is_final=any(compiled.is_final[state] for state in equiv_class)
+                )
+                for i, equiv_class in enumerate(current_partition)
+            ], batch_size=BULK_BATCH_SIZE)
+
+            # Every state of a class has the same target classes, so the
+            # first member's row of the table describes the whole class
+            k = compiled.num_symbols
+            symbol_specs = [c.specs(SYMBOL_MAX_LENGTH) for c in compiled.symbol_classes]
+            new_transitions = []
+            for i, equiv_class in enumerate(current_partition):
+                row = equiv_class[0] * k
+                for sym in range(k):
+                    target = compiled.delta[row + sym]
+                    if target >= 0:
+                        new_transitions.extend(
+                            Transition(
+                                automaton=minimized_automaton,
+                                from_state=new_states[i],
+                                to_state=new_states[class_of[target]],
+                                symbol=spec
+                            )
+                            for spec in symbol_specs[sym]
                         )
-                        created_transitions.add(transition_key)
+            Transition.objects.bulk_create(new_transitions, batch_size=BULK_BATCH_SIZE)
         
         # Update JSON representation
         minimized_automaton.update_json_representation()
@@ -764,10 +971,10 @@ class Automaton(models.Model):
             "message": f"Successfully minimized from {n} states to {len(current_partition)} states",
             "equivalence_classes": [
                 {
-                    "new_state": state_names[i] if i < len(state_names) else f"S{i}",
-                    "original_states": [state.name for state in equiv_class],
-                    "is_start": any(state.is_start for state in equiv_class),
-                    "is_final": any(state.is_final for state in equiv_class)
+                    "new_state": state_names[i],
+                    "original_states": [names[state] for state in equiv_class],
+                    "is_start": new_states[i].is_start,
+                    "is_final": new_states[i].is_final
                 }
                 for i, equiv_class in enumerate(current_partition)
             ],
@@ -781,31 +988,19 @@ class Automaton(models.Model):
 
     def _create_transition_table(self, automaton):
         """Helper method to create a transition table for display."""
-        alphabet = automaton.get_alphabet_as_set()
-        states = list(automaton.states.all())
-        
-        table = []
-        for state in states:
-            row = {"state": state.name, "is_start": state.is_start, "is_final": state.is_final}
-            for symbol in sorted(alphabet):
-                trans = automaton.transitions.filter(from_state=state, symbol=symbol).first()
-                row[symbol] = trans.to_state.name if trans else "∅"
-            table.append(row)
-        
-        return {
-            "headers": ["State"] + sorted(alphabet),
-            "rows": table
-        }
+        return automaton.compile().transition_table()
 
     def add_epsilon_transition(self, from_state, to_state):
         """
         Helper method to add an epsilon transition between two states.
         """
-        epsilon_transition = self.transitions.create(
-            from_state=from_state,
-            to_state=to_state,
-            symbol='ε'
-        )
+        with patching_json():
+            epsilon_transition = self.transitions.create(
+                from_state=from_state,
+                to_state=to_state,
+                symbol='ε'
+            )
+            self.update_json_representation()
         return epsilon_transition
 
     def get_epsilon_transitions(self):
@@ -850,11 +1045,13 @@ class Automaton(models.Model):
         if existing_transitions.exists():
             return existing_transitions.first()
         
-        transition = self.transitions.create(
-            from_state=from_state,
-            to_state=to_state,
-            symbol=symbol_str
-        )
+        with patching_json():
+            transition = self.transitions.create(
+                from_state=from_state,
+                to_state=to_state,
+                symbol=symbol_str
+            )
+            self.update_json_representation()
         return transition
 
     def remove_transition(self, from_state, to_state, symbols=None):
@@ -862,19 +1059,16 @@ class Automaton(models.Model):
         Helper method to remove transitions.
         If symbols is None, removes all transitions between the states.
         """
-        if symbols is None:
-            # Remove all transitions between these states
-            self.transitions.filter(from_state=from_state, to_state=to_state).delete()
-        else:
+        transitions = self.transitions.filter(from_state=from_state, to_state=to_state)
+        if symbols is not None:
             if isinstance(symbols, list):
                 symbol_str = ','.join(symbols)
             else:
                 symbol_str = symbols
-            self.transitions.filter(
-                from_state=from_state, 
-                to_state=to_state, 
-                symbol=symbol_str
-            ).delete()
+            transitions = transitions.filter(symbol=symbol_str)
+        with patching_json():
+            transitions.delete()
+            self.update_json_representation()
 
     def __str__(self):
         return self.name
@@ -903,7 +1097,7 @@ class Transition(models.Model):
     automaton = models.ForeignKey('Automaton', related_name='transitions', on_delete=models.CASCADE)
     from_state = models.ForeignKey('State', related_name='from_transitions', on_delete=models.CASCADE)
     to_state = models.ForeignKey('State', related_name='to_transitions', on_delete=models.CASCADE)
-    symbol = models.CharField(max_length=50, blank=True)  # Increased length for multiple symbols
+    symbol = models.CharField(max_length=SYMBOL_MAX_LENGTH, blank=True)  # Increased length for multiple symbols
 
     class Meta:
         indexes = [
@@ -912,72 +1106,228 @@ class Transition(models.Model):
         ]
 
     def get_symbols_as_set(self):
-        """Returns the symbols in this transition as a set, supporting ranges like a-z, 0-9."""
-        import re
-        import string
-        
-        if not self.symbol:
-            return {'ε'}  # Epsilon transition
-        if self.symbol == 'ε':
-            return {'ε'}
-        
-        symbols = set()
-        parts = [s.strip() for s in self.symbol.split(',') if s.strip()]
-        
-        for part in parts:
-            # Check for range patterns like a-z, 0-9, A-Z
-            range_match = re.match(r'^([a-zA-Z0-9])-([a-zA-Z0-9])$', part)
-            if range_match:
-                start_char, end_char = range_match.groups()
-                
-                # Handle lowercase letters
-                if start_char.islower() and end_char.islower():
-                    start_ord = ord(start_char)
-                    end_ord = ord(end_char)
-                    if start_ord <= end_ord:
-                        symbols.update(chr(i) for i in range(start_ord, end_ord + 1))
-                
-                # Handle uppercase letters
-                elif start_char.isupper() and end_char.isupper():
-                    start_ord = ord(start_char)
-                    end_ord = ord(end_char)
-                    if start_ord <= end_ord:
-                        symbols.update(chr(i) for i in range(start_ord, end_ord + 1))
-                
-                # Handle digits
-                elif start_char.isdigit() and end_char.isdigit():
-                    start_ord = ord(start_char)
-                    end_ord = ord(end_char)
-                    if start_ord <= end_ord:
-                        symbols.update(chr(i) for i in range(start_ord, end_ord + 1))
-                else:
-                    # Invalid range, treat as literal
-                    symbols.add(part)
-            else:
-                # Regular symbol
-                symbols.add(part)
-        
-        return symbols
+        """
+        Returns the symbols in this transition as a frozenset, supporting ranges
+        like a-z, 0-9. Parsed specs are cached, so repeated calls are cheap.
+        """
+        return expand_symbols(self.symbol)
+
+    def get_symbol_class(self):
+        """Returns the symbols in this transition as a SymbolClass."""
+        return parse_symbol_class(self.symbol)
 
     def clean(self):
         # Ensure the symbols are in the automaton's alphabet (except for epsilon transitions)
         if self.symbol and self.symbol != 'ε':
-            alphabet = self.automaton.get_alphabet_as_set()
-            symbols = self.get_symbols_as_set()
-            for symbol in symbols:
-                if symbol not in alphabet:
-                    raise ValidationError(f"Symbol '{symbol}' is not in the automaton's alphabet.")
+            outside = self.get_symbol_class().difference(self.automaton.get_alphabet_class())
+            if outside:
+                symbol = next(iter(outside), EPSILON)
+                raise ValidationError(f"Symbol '{symbol}' is not in the automaton's alphabet.")
 
     def matches_symbol(self, input_symbol):
         """Check if this transition can be taken with the given input symbol."""
-        transition_symbols = self.get_symbols_as_set()
-        return input_symbol in transition_symbols
+        return input_symbol in parse_symbol_class(self.symbol)
 
     def __str__(self):
         symbol_display = self.symbol if self.symbol else 'ε'
         return f"({self.from_state.name}) --{symbol_display}--> ({self.to_state.name})"
 
 
+class DerivedAutomaton(models.Model):
+    """
+    Cached result of minimizing or converting an automaton, keyed by the
+    structure hash of the source so repeated requests reuse the result.
+    """
+    MINIMIZE = 'minimize'
+    TO_DFA = 'to_dfa'
+    OPERATION_CHOICES = [
+        (MINIMIZE, 'Minimize'),
+        (TO_DFA, 'NFA to DFA'),
+    ]
+
+    operation = models.CharField(max_length=20, choices=OPERATION_CHOICES)
+    source_hash = models.CharField(max_length=64)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    result = models.ForeignKey('Automaton', related_name='derived_from', on_delete=models.CASCADE)
+    result_hash = models.CharField(max_length=64)  # Structure hash of the result when it was created
+    detailed_steps = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['operation', 'source_hash', 'owner']),
+        ]
+
+    @classmethod
+    def stored_steps(cls, operation, automaton):
+        """
+        Summary of the steps of the latest run of the operation that produced
+        the automaton (or found it already minimal), or {} if there is none.
+        """
+        produced = Q(result=automaton)
+        if automaton.structure_hash:
+            produced |= Q(
+                source_hash=automaton.structure_hash,
+                result_hash=automaton.structure_hash,
+                owner=automaton.owner
+            )
+        steps = (
+            cls.objects.filter(produced, operation=operation)
+            .order_by('-created_at')
+            .values_list('detailed_steps', flat=True)
+            .first()
+        )
+        return steps or {}
+
+    def __str__(self):
+        return f"{self.operation} {self.source_hash[:12]} -> {self.result_id}"
+
+
+def steps_summary(detailed_steps):
+    """The scalar fields of detailed steps (counts, message), without the logs and tables."""
+    return {key: value for key, value in detailed_steps.items() if not isinstance(value, (list, dict))}
+
+
+def truncate_steps(detailed_steps, limit=STEPS_PAGE_SIZE):
+    """
+    Copy of detailed steps in which every list is cut to its first ``limit``
+    items, for rendering. Returns (steps, truncated), where truncated lists
+    the path, shown and total length of every list that was cut; the full
+    lists are available from ResultSteps.page.
+    """
+    truncated = []
+
+    def visit(value, path):
+        if isinstance(value, dict):
+            return {key: visit(item, path + [str(key)]) for key, item in value.items()}
+        if isinstance(value, list):
+            if len(value) > limit:
+                truncated.append({'path': '.'.join(path), 'shown': limit, 'total': len(value)})
+            return [visit(item, path + [str(i)]) for i, item in enumerate(value[:limit])]
+        return value
+
+    return visit(detailed_steps, []), truncated
+
+
+class ResultSteps(models.Model):
+    """
+    Detailed steps of a minimization or conversion, stored as compressed JSON
+    under the automaton it produced. Rows expire after CORE_RESULT_STEPS_TTL
+    seconds and are purged whenever new steps are stored.
+    """
+    operation = models.CharField(max_length=20, choices=DerivedAutomaton.OPERATION_CHOICES)
+    result = models.ForeignKey('Automaton', related_name='result_steps', on_delete=models.CASCADE)
+    data = models.BinaryField()  # zlib-compressed JSON
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['operation', 'result'], name='unique_result_steps'),
+        ]
+
+    @staticmethod
+    def expiry():
+        ttl = getattr(settings, 'CORE_RESULT_STEPS_TTL', DEFAULT_RESULT_STEPS_TTL)
+        return timezone.now() + timedelta(seconds=ttl)
+
+    @classmethod
+    def store(cls, operation, result, detailed_steps):
+        """Replaces the steps stored for the result, dropping expired rows in the same query."""
+        cls.objects.filter(
+            Q(operation=operation, result=result) | Q(expires_at__lt=timezone.now())
+        ).delete()
+        return cls.objects.create(
+            operation=operation,
+            result=result,
+            data=zlib.compress(json.dumps(detailed_steps, separators=(',', ':')).encode()),
+            expires_at=cls.expiry()
+        )
+
+    @classmethod
+    def touch(cls, operation, result):
+        """Restarts the expiry of the steps stored for the result."""
+        cls.objects.filter(operation=operation, result=result).update(expires_at=cls.expiry())
+
+    @classmethod
+    def load(cls, operation, automaton):
+        """The unexpired steps of the operation that produced the automaton, or None."""
+        data = (
+            cls.objects.filter(operation=operation, result=automaton, expires_at__gte=timezone.now())
+            .values_list('data', flat=True)
+            .first()
+        )
+        if data is None:
+            return None
+        return json.loads(zlib.decompress(bytes(data)))
+
+    @classmethod
+    def page(cls, operation, automaton, path, offset=0, limit=STEPS_PAGE_SIZE):
+        """
+        A slice of one list in the stored steps, addressed by a dotted path
+        such as 'steps.3.transitions'. Returns {'total', 'offset', 'items'},
+        or None when no steps are stored. Raises KeyError for a path that
+        does not lead to a list.
+        """
+        value = cls.load(operation, automaton)
+        if value is None:
+            return None
+        for key in path.split('.') if path else []:
+            if isinstance(value, list) and key.isdigit() and int(key) < len(value):
+                value = value[int(key)]
+            elif isinstance(value, dict) and key in value:
+                value = value[key]
+            else:
+                raise KeyError(path)
+        if not isinstance(value, list):
+            raise KeyError(path)
+        return {'total': len(value), 'offset': offset, 'items': value[offset:offset + limit]}
+
+    def __str__(self):
+        return f"{self.operation} steps of {self.result_id}"
+
+
+class Job(models.Model):
+    """
+    A minimize or NFA-to-DFA run executed by the background worker pool in
+    core.jobs, with its progress and outcome for the status endpoint.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+
+    operation = models.CharField(max_length=20, choices=DerivedAutomaton.OPERATION_CHOICES)
+    automaton = models.ForeignKey('Automaton', related_name='jobs', on_delete=models.SET_NULL, null=True)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='automaton_jobs')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    progress = models.JSONField(default=dict, blank=True)
+    result = models.ForeignKey('Automaton', related_name='+', on_delete=models.SET_NULL, null=True, blank=True)
+    result_data = models.JSONField(null=True, blank=True)  # Response payload of the synchronous endpoint
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    @property
+    def is_finished(self):
+        return self.status in (self.SUCCEEDED, self.FAILED)
+
+    def __str__(self):
+        return f"{self.operation} job {self.pk} ({self.status})"
+
+
 class UserHistory(models.Model):
     """Track user interactions with automata for history and analytics."""
     ACTION_CHOICES = [
@@ -995,7 +1345,7 @@ class UserHistory(models.Model):
     automaton_name = models.CharField(max_length=255)
     automaton_type = models.CharField(max_length=10, choices=[('DFA', 'DFA'), ('NFA', 'NFA')])
     action = models.CharField(max_length=20, choices=ACTION_CHOICES)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now)  # Time of the action, not of the buffered write
     details = models.JSONField(null=True, blank=True)  # Store action-specific data
     
     class Meta:
@@ -1010,17 +1360,115 @@ class UserHistory(models.Model):
 
     @classmethod
     def log_action(cls, user, automaton, action, details=None):
-        """Helper method to log user actions."""
+        """
+        Helper method to log user actions. The entry is buffered (see
+        core.history) once the current transaction commits; the type is the
+        automaton's cached type, so logging never triggers a validation.
+        """
         if not user or not automaton:
             return
-        
-        automaton_type = automaton.get_type()
-        
-        return cls.objects.create(
-            user=user,
-            automaton_id=automaton.id,
-            automaton_name=automaton.name,
-            automaton_type=automaton_type,
-            action=action,
-            details=details or {}
-        )
+
+        entry = {
+            'user_id': user.pk,
+            'automaton_id': automaton.id,
+            'automaton_name': automaton.name,
+            'automaton_type': automaton.cached_type if automaton.cached_type in ('DFA', 'NFA') else '',
+            'action': action,
+            'timestamp': timezone.now(),
+            'details': details or {},
+        }
+        transaction.on_commit(lambda: history_buffer.add(entry))
+
+    @classmethod
+    def write_entries(cls, entries):
+        """
+        Stores buffered entries with one bulk insert. Types that were not
+        cached when the action was logged are read from the automata, and
+        entries of users deleted in the meantime are dropped.
+        """
+        untyped = {entry['automaton_id'] for entry in entries if not entry['automaton_type']}
+        types = dict(
+            Automaton.objects.filter(pk__in=untyped, cached_type__in=('DFA', 'NFA'))
+            .values_list('pk', 'cached_type')
+        ) if untyped else {}
+        user_ids = set(User.objects.filter(
+            pk__in={entry['user_id'] for entry in entries}
+        ).values_list('pk', flat=True))
+
+        cls.objects.bulk_create([
+            cls(**{**entry, 'automaton_type': entry['automaton_type'] or types.get(entry['automaton_id'], '')})
+            for entry in entries if entry['user_id'] in user_ids
+        ], batch_size=BULK_BATCH_SIZE)
+
+    @staticmethod
+    def flush_pending():
+        """Writes buffered history entries; called before reading the history."""
+        return history_buffer.flush()
+
+
+history_buffer = HistoryBuffer(UserHistory.write_entries)
+atexit.register(history_buffer.flush_at_exit)
+
+
+# Automata whose JSON the current patching_json block will save, per thread
+_patching = threading.local()
+
+
+@contextmanager
+def patching_json():
+    """
+    Wraps editor row writes that are followed by apply_json_delta, which
+    saves the new JSON, structure hash and packed structure anyway, so
+    invalidate_structure does not clear them first. Automata whose JSON was
+    not saved by the end of the block (e.g. after an error) are invalidated
+    then.
+    """
+    outer = getattr(_patching, 'pending', None)
+    pending = _patching.pending = set()
+    try:
+        yield
+    finally:
+        _patching.pending = outer
+        for automaton_pk in pending:
+            _invalidate_structure(automaton_pk)
+
+
+def _structure_saved(automaton_pk):
+    pending = getattr(_patching, 'pending', None)
+    if pending is not None:
+        pending.discard(automaton_pk)
+
+
+def _invalidate_structure(automaton_pk):
+    Automaton.objects.filter(pk=automaton_pk).update(
+        json_representation=None, structure_hash='', packed_structure=None, cached_type=''
+    )
+    lazy_dfas.discard(automaton_pk)
+
+
+@receiver(post_save, sender=State)
+@receiver(post_save, sender=Transition)
+@receiver(post_delete, sender=State)
+@receiver(post_delete, sender=Transition)
+def invalidate_structure(sender, instance, origin=None, **kwargs):
+    """
+    Forgets the stored JSON, structure hash, packed structure and type of the
+    automaton whose states or transitions were saved or deleted, so that they
+    are rebuilt from the rows on next use. This covers writes that bypass the
+    editor views (the admin, scripts); QuerySet.update and bulk writes send
+    no signals and must update the JSON themselves, as the views do.
+    """
+    # Nothing to keep current when the automaton itself is being deleted
+    if isinstance(origin, Automaton):
+        return
+    pending = getattr(_patching, 'pending', None)
+    if pending is not None:
+        pending.add(instance.automaton_id)
+        return
+    # A delete cascading to many rows of one automaton clears it once
+    if origin is not None:
+        seen = origin.__dict__.setdefault('_invalidated_automata', set())
+        if instance.automaton_id in seen:
+            return
+        seen.add(instance.automaton_id)
+    _invalidate_structure(instance.automaton_id)
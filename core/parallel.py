@@ -0,0 +1,89 @@
+"""
+Batch simulation fanned out over worker processes.
+
+Grading a corpus of millions of strings is CPU-bound, so ``simulate_many``
+can split it over a ``ProcessPoolExecutor``. Each worker receives the packed
+structure of the automaton (see ``pack_structure``) once, through the pool
+initializer, and compiles its own CompiledAutomaton; afterwards only chunks
+of input strings and their results cross the process boundary. Results are
+returned in input order.
+
+Workers never touch the database. The pool is used when
+``CORE_SIMULATION_WORKERS`` is above 1 and the batch has at least
+``CORE_PARALLEL_MIN_STRINGS`` strings; smaller batches are not worth the
+process start-up.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+from .engine import CompiledAutomaton, LazyDFA
+from .symbols import parse_alphabet
+
+DEFAULT_SIMULATION_WORKERS = 0
+DEFAULT_PARALLEL_MIN_STRINGS = 20000
+
+# Strings per task sent to a worker
+CHUNK_SIZE = 2000
+
+# Simulation function of the automaton compiled by _init_worker
+_run = None
+
+
+def simulation_workers():
+    return getattr(settings, 'CORE_SIMULATION_WORKERS', DEFAULT_SIMULATION_WORKERS)
+
+
+def parallel_min_strings():
+    return getattr(settings, 'CORE_PARALLEL_MIN_STRINGS', DEFAULT_PARALLEL_MIN_STRINGS)
+
+
+def simulation_results(run, input_strings, include_paths=False):
+    """
+    Runs each string through ``run`` (simulate_dfa or LazyDFA.simulate) and
+    returns the result dicts of ``Automaton.simulate_many``.
+    """
+    results = []
+    for input_string in input_strings:
+        simulation_result = run(input_string, trace=include_paths)
+        result = {
+            'string': input_string,
+            'accepted': simulation_result[0],
+            'message': simulation_result[1]
+        }
+        if include_paths:
+            result['path'] = simulation_result[2]
+        results.append(result)
+    return results
+
+
+def _init_worker(packed, alphabet_spec, is_nfa):
+    global _run
+    compiled = CompiledAutomaton.from_packed(packed, parse_alphabet(alphabet_spec))
+    _run = LazyDFA(compiled).simulate if is_nfa else compiled.simulate_dfa
+
+
+def _simulate_chunk(input_strings, include_paths):
+    return simulation_results(_run, input_strings, include_paths)
+
+
+def simulate_parallel(packed, alphabet_spec, is_nfa, input_strings, include_paths=False,
+                      workers=None, chunk_size=CHUNK_SIZE):
+    """
+    Simulates the strings on ``workers`` processes, each compiling the packed
+    structure once, and returns the results in input order.
+    """
+    workers = workers or simulation_workers()
+    chunks = [input_strings[i:i + chunk_size] for i in range(0, len(input_strings), chunk_size)]
+    start_method = getattr(settings, 'CORE_SIMULATION_START_METHOD', None)
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(chunks)) or 1,
+        mp_context=multiprocessing.get_context(start_method),
+        initializer=_init_worker,
+        initargs=(packed, alphabet_spec, is_nfa),
+    ) as executor:
+        results = []
+        for chunk_results in executor.map(_simulate_chunk, chunks, [include_paths] * len(chunks)):
+            results.extend(chunk_results)
+    return results
@@ -0,0 +1,363 @@
+"""
+Parsing of transition symbol specifications.
+
+A transition's ``symbol`` field can hold a single symbol (``a``), a comma
+separated list (``a,b,c``), character ranges (``a-z``, ``A-Z``, ``0-9``),
+code points or code-point ranges (``U+002C``, ``U+0000-U+00FF``) or
+epsilon (``ε`` or an empty string). Alphabets use the same syntax.
+
+Specs are parsed into ``SymbolClass`` objects, which keep single-character
+symbols as sorted disjoint code-point intervals, so a class like
+``U+0000-U+FFFF`` costs two integers rather than 65536 strings. Parsed specs
+are cached process-wide, since the same few specs are looked up for every
+step of every simulation and conversion.
+"""
+import re
+from bisect import bisect_right
+from functools import lru_cache
+
+EPSILON = 'ε'
+
+# Distinct symbol specs whose expansion is kept in memory
+SYMBOL_CACHE_SIZE = 4096
+
+RANGE_PATTERN = re.compile(r'^([a-zA-Z0-9])-([a-zA-Z0-9])$')
+CODE_POINT_PATTERN = re.compile(r'^U\+([0-9A-Fa-f]{4,6})(?:-U\+([0-9A-Fa-f]{4,6}))?$')
+
+MAX_CODE_POINT = 0x10FFFF
+
+
+def _same_class(start_char, end_char):
+    """Ranges are only expanded within lowercase letters, uppercase letters or digits."""
+    return (
+        (start_char.islower() and end_char.islower())
+        or (start_char.isupper() and end_char.isupper())
+        or (start_char.isdigit() and end_char.isdigit())
+    )
+
+
+def _merge(intervals):
+    """Sorts (lo, hi) intervals and merges overlapping or adjacent ones."""
+    merged = []
+    for lo, hi in sorted(intervals):
+        if merged and lo <= merged[-1][1] + 1:
+            if hi > merged[-1][1]:
+                merged[-1] = (merged[-1][0], hi)
+        else:
+            merged.append((lo, hi))
+    return tuple(merged)
+
+
+def _intersect(first, second):
+    """Intersection of two normalized interval tuples."""
+    result = []
+    i = j = 0
+    while i < len(first) and j < len(second):
+        lo = max(first[i][0], second[j][0])
+        hi = min(first[i][1], second[j][1])
+        if lo <= hi:
+            result.append((lo, hi))
+        if first[i][1] < second[j][1]:
+            i += 1
+        else:
+            j += 1
+    return tuple(result)
+
+
+def _subtract(first, second):
+    """Code points of ``first`` not in ``second``, both normalized."""
+    result = []
+    j = 0
+    for lo, hi in first:
+        while j < len(second) and second[j][1] < lo:
+            j += 1
+        k = j
+        while k < len(second) and second[k][0] <= hi:
+            if second[k][0] > lo:
+                result.append((lo, second[k][0] - 1))
+            lo = max(lo, second[k][1] + 1)
+            k += 1
+        if lo <= hi:
+            result.append((lo, hi))
+    return tuple(result)
+
+
+def _format_code_point(code_point):
+    """A code point as a spec part: the character itself when unambiguous, U+XXXX otherwise."""
+    char = chr(code_point)
+    if char.isprintable() and not char.isspace() and char not in (',', EPSILON):
+        return char
+    return f"U+{code_point:04X}"
+
+
+def _format_interval(lo, hi):
+    """Spec parts for one interval."""
+    if lo == hi:
+        return [_format_code_point(lo)]
+    start_char, end_char = chr(lo), chr(hi)
+    if RANGE_PATTERN.match(f"{start_char}-{end_char}") and _same_class(start_char, end_char):
+        if hi == lo + 1:
+            return [start_char, end_char]
+        return [f"{start_char}-{end_char}"]
+    if hi - lo < 3:
+        return [_format_code_point(c) for c in range(lo, hi + 1)]
+    return [f"U+{lo:04X}-U+{hi:04X}"]
+
+
+class SymbolClass:
+    """
+    Immutable set of symbols. Single characters are stored as sorted,
+    disjoint, non-adjacent (lo, hi) code-point intervals; multi-character
+    symbols are kept as literals, and ``epsilon`` records whether ε is
+    included.
+    """
+
+    __slots__ = ('intervals', 'literals', 'epsilon', '_starts')
+
+    def __init__(self, intervals=(), literals=(), epsilon=False):
+        self.intervals = _merge(intervals)
+        self.literals = frozenset(literals)
+        self.epsilon = bool(epsilon)
+        self._starts = [lo for lo, _ in self.intervals]
+
+    @classmethod
+    def from_symbols(cls, symbols):
+        """Builds a class from an iterable of individual symbols."""
+        intervals = []
+        literals = []
+        epsilon = False
+        for symbol in symbols:
+            if symbol == EPSILON:
+                epsilon = True
+            elif len(symbol) == 1:
+                intervals.append((ord(symbol), ord(symbol)))
+            elif symbol:
+                literals.append(symbol)
+        return cls(intervals, literals, epsilon)
+
+    def __contains__(self, symbol):
+        if symbol == EPSILON:
+            return self.epsilon
+        if len(symbol) != 1:
+            return symbol in self.literals
+        code_point = ord(symbol)
+        i = bisect_right(self._starts, code_point) - 1
+        return i >= 0 and code_point <= self.intervals[i][1]
+
+    def __iter__(self):
+        """Yields every symbol except ε, characters in code-point order first."""
+        for lo, hi in self.intervals:
+            for code_point in range(lo, hi + 1):
+                yield chr(code_point)
+        yield from sorted(self.literals)
+
+    def __len__(self):
+        """Number of symbols, not counting ε."""
+        return sum(hi - lo + 1 for lo, hi in self.intervals) + len(self.literals)
+
+    def __bool__(self):
+        return bool(self.intervals or self.literals or self.epsilon)
+
+    def __eq__(self, other):
+        if not isinstance(other, SymbolClass):
+            return NotImplemented
+        return (self.intervals, self.literals, self.epsilon) == (other.intervals, other.literals, other.epsilon)
+
+    def __hash__(self):
+        return hash((self.intervals, self.literals, self.epsilon))
+
+    def __repr__(self):
+        return f"SymbolClass({self.spec()!r})"
+
+    def union(self, other):
+        return SymbolClass(self.intervals + other.intervals, self.literals | other.literals, self.epsilon or other.epsilon)
+
+    def intersection(self, other):
+        return SymbolClass(
+            _intersect(self.intervals, other.intervals),
+            self.literals & other.literals,
+            self.epsilon and other.epsilon
+        )
+
+    def difference(self, other):
+        return SymbolClass(
+            _subtract(self.intervals, other.intervals),
+            self.literals - other.literals,
+            self.epsilon and not other.epsilon
+        )
+
+    def without_epsilon(self):
+        if not self.epsilon:
+            return self
+        return SymbolClass(self.intervals, self.literals)
+
+    def sort_key(self):
+        """The smallest symbol, so classes sort like the symbols they contain."""
+        candidates = list(self.literals)
+        if self.intervals:
+            candidates.append(chr(self.intervals[0][0]))
+        return min(candidates) if candidates else ''
+
+    def parts(self):
+        """Spec parts describing the class, in canonical order."""
+        parts = [EPSILON] if self.epsilon else []
+        for lo, hi in self.intervals:
+            parts.extend(_format_interval(lo, hi))
+        parts.extend(sorted(self.literals))
+        return parts
+
+    def spec(self):
+        """Canonical spec string; parse_symbol_class(spec) returns an equal class."""
+        return ','.join(self.parts())
+
+    def specs(self, max_length):
+        """
+        Splits the canonical spec into comma-separated chunks of at most
+        ``max_length`` characters, e.g. to fit a transition's symbol column.
+        """
+        chunks = []
+        current = ''
+        for part in self.parts():
+            candidate = f"{current},{part}" if current else part
+            if current and len(candidate) > max_length:
+                chunks.append(current)
+                current = part
+            else:
+                current = candidate
+        if current:
+            chunks.append(current)
+        return chunks
+
+
+def _parse_part(part, intervals, literals):
+    """Adds the symbols of one comma-separated part of a spec."""
+    code_points = CODE_POINT_PATTERN.match(part)
+    if code_points:
+        start = int(code_points.group(1), 16)
+        end = int(code_points.group(2), 16) if code_points.group(2) else start
+        if end <= MAX_CODE_POINT:
+            if start <= end:
+                intervals.append((start, end))
+            return
+        literals.append(part)
+        return
+
+    # Check for range patterns like a-z, 0-9, A-Z
+    range_match = RANGE_PATTERN.match(part)
+    if range_match:
+        start_char, end_char = range_match.groups()
+        if _same_class(start_char, end_char):
+            if ord(start_char) <= ord(end_char):
+                intervals.append((ord(start_char), ord(end_char)))
+            return
+        # Invalid range, treat as literal
+
+    if len(part) == 1:
+        intervals.append((ord(part), ord(part)))
+    else:
+        literals.append(part)
+
+
+@lru_cache(maxsize=SYMBOL_CACHE_SIZE)
+def parse_symbol_class(symbol):
+    """
+    Parses a transition symbol spec into a SymbolClass. An empty spec is
+    epsilon. The result is cached and shared between callers.
+    """
+    if not symbol or symbol == EPSILON:
+        return SymbolClass(epsilon=True)  # Epsilon transition
+
+    intervals = []
+    literals = []
+    epsilon = False
+    for part in (s.strip() for s in symbol.split(',')):
+        if not part:
+            continue
+        if part == EPSILON:
+            epsilon = True
+        else:
+            _parse_part(part, intervals, literals)
+    return SymbolClass(intervals, literals, epsilon)
+
+
+def parse_alphabet(alphabet):
+    """Parses an alphabet spec. ε is never an input symbol, so it is dropped."""
+    if not alphabet or not alphabet.strip():
+        return SymbolClass()
+    return parse_symbol_class(alphabet).without_epsilon()
+
+
+@lru_cache(maxsize=SYMBOL_CACHE_SIZE)
+def expand_symbols(symbol):
+    """
+    Returns the symbols described by a transition symbol spec as a frozenset.
+    The result is shared between callers and must not be modified. Prefer
+    parse_symbol_class for specs that may cover large ranges.
+    """
+    symbol_class = parse_symbol_class(symbol)
+    symbols = frozenset(symbol_class)
+    if symbol_class.epsilon:
+        symbols |= {EPSILON}
+    return symbols
+
+
+def partition_alphabet(alphabet, classes):
+    """
+    Splits the alphabet into minterms: the coarsest partition in which the
+    part of every given class inside the alphabet is a union of blocks.
+    Symbols used by exactly the same classes end up in the same block,
+    including one block for the symbols no class uses.
+
+    Returns ``(blocks, members)``: ``blocks`` is a list of SymbolClass sorted
+    by their smallest symbol and ``members[i]`` is the frozenset of block
+    ids covered by ``classes[i]``.
+    """
+    # Elementary segments: maximal runs of the alphabet's code points that
+    # no class boundary falls inside
+    boundaries = set()
+    for symbol_class in (alphabet, *classes):
+        for lo, hi in symbol_class.intervals:
+            boundaries.add(lo)
+            boundaries.add(hi + 1)
+    boundaries = sorted(boundaries)
+    segments = []
+    for lo, next_lo in zip(boundaries, boundaries[1:]):
+        if chr(lo) in alphabet:
+            segments.append((lo, next_lo - 1))
+    starts = [lo for lo, _ in segments]
+
+    # Signature of every segment and literal: bit i is set when class i covers it
+    segment_signatures = [0] * len(segments)
+    literal_signatures = dict.fromkeys(alphabet.literals, 0)
+    for i, symbol_class in enumerate(classes):
+        bit = 1 << i
+        for lo, hi in symbol_class.intervals:
+            j = bisect_right(starts, lo) - 1
+            if j < 0 or segments[j][1] < lo:
+                j += 1
+            while j < len(segments) and starts[j] <= hi:
+                segment_signatures[j] |= bit
+                j += 1
+        for literal in symbol_class.literals:
+            if literal in literal_signatures:
+                literal_signatures[literal] |= bit
+
+    groups = {}
+    for segment, signature in zip(segments, segment_signatures):
+        groups.setdefault(signature, ([], []))[0].append(segment)
+    for literal, signature in literal_signatures.items():
+        groups.setdefault(signature, ([], []))[1].append(literal)
+
+    keyed = sorted(
+        ((SymbolClass(intervals, literals), signature) for signature, (intervals, literals) in groups.items()),
+        key=lambda entry: entry[0].sort_key()
+    )
+    blocks = []
+    members = [[] for _ in classes]
+    for b, (block, signature) in enumerate(keyed):
+        blocks.append(block)
+        while signature:
+            low = signature & -signature
+            members[low.bit_length() - 1].append(b)
+            signature ^= low
+    return blocks, [frozenset(m) for m in members]
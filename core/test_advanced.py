@@ -6,7 +6,14 @@ These tests cover edge cases, performance, and complex scenarios.
 from django.test import TestCase
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from io import StringIO
+import json
+import os
+import tempfile
 import time
+from unittest.mock import patch
 
 from .models import Automaton, State, Transition
 
@@ -263,6 +270,48 @@ class PerformanceTest(TestCase):
             self.assertEqual(nfa_result, expected)
 
 
+class BenchCommandTest(TestCase):
+    """Test the bench management command."""
+
+    def test_report(self):
+        """Test that every family is measured and nothing is left in the database."""
+        out = StringIO()
+        call_command('bench', sizes='8', repeat=1, strings=5, length=10, stdout=out)
+        report = json.loads(out.getvalue())
+
+        measured = {(r['family'], r['operation']) for r in report['results']}
+        self.assertIn(('chain', 'minimize'), measured)
+        self.assertIn(('nth_from_end', 'to_dfa'), measured)
+        self.assertNotIn(('chain', 'to_dfa'), measured)
+        self.assertEqual(len(report['results']), 4 * 4)
+
+        to_dfa = next(r for r in report['results'] if r['family'] == 'nth_from_end' and r['operation'] == 'to_dfa')
+        self.assertEqual(to_dfa['states'], 4)
+        self.assertGreater(to_dfa['queries'], 0)
+        self.assertGreater(to_dfa['peak_memory_bytes'], 0)
+        self.assertFalse(Automaton.objects.exists())
+
+    def test_in_memory(self):
+        """Test that --in-memory runs with the database unreachable."""
+        out = StringIO()
+        unreachable = OperationalError("could not connect to server")
+        with tempfile.TemporaryDirectory() as directory, \
+                patch.object(connection, 'ensure_connection', side_effect=unreachable):
+            path = os.path.join(directory, 'bench.json')
+            call_command('bench', sizes='8', repeat=1, strings=5, length=10, in_memory=True, output=path, stdout=out)
+            with open(path) as f:
+                report = json.load(f)
+        self.assertIn(' - queries', out.getvalue())
+
+        self.assertIsNone(report['meta']['database'])
+        self.assertEqual(len(report['results']), 4 * 3)
+        self.assertNotIn('json', {r['operation'] for r in report['results']})
+        to_dfa = next(r for r in report['results'] if r['family'] == 'nth_from_end' and r['operation'] == 'to_dfa')
+        self.assertEqual(to_dfa['states'], 4)
+        self.assertIsNone(to_dfa['queries'])
+        self.assertGreater(to_dfa['peak_memory_bytes'], 0)
+
+
 class ComplexScenarioTest(TestCase):
     """Test complex real-world scenarios."""
     
@@ -2,13 +2,26 @@
 Test cases for web interface and API endpoints.
 """
 
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.contrib.auth.models import User
 from django.urls import reverse
-from django.http import JsonResponse
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.http import Http404, JsonResponse
+from django.utils import timezone
 import json
+from datetime import timedelta
+from unittest.mock import patch
 
-from .models import Automaton
+from .access import get_automaton_instance, get_system_user_id, visible_automata
+from .editing import EditBatch
+from .engine import CompiledAutomaton
+from .instrumentation import current_metrics, metrics_snapshot, reset_metrics, timed_phase
+from .jobs import fail_stale_jobs, run_job
+from .models import STEPS_PAGE_SIZE, Automaton, DerivedAutomaton, Job, ResultSteps, State, patching_json
+from .traces import CACHE_KEY_PREFIX
 
 
 class WebInterfaceTest(TestCase):
@@ -487,6 +500,940 @@ class IntegrationTest(TestCase):
         self.assertTrue(is_valid, f"Converted DFA should be valid: {message}")
 
 
+
+class BatchSimulationTest(TestCase):
+    """Test the batch simulation endpoint."""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.login(username='testuser', password='testpass123')
+
+        self.dfa = Automaton.objects.create(
+            name="Even A's",
+            alphabet="a,b",
+            owner=self.user
+        )
+        q0 = self.dfa.states.create(name="q0", is_start=True, is_final=True)
+        q1 = self.dfa.states.create(name="q1", is_final=False)
+        self.dfa.transitions.create(from_state=q0, to_state=q1, symbol="a")
+        self.dfa.transitions.create(from_state=q0, to_state=q0, symbol="b")
+        self.dfa.transitions.create(from_state=q1, to_state=q0, symbol="a")
+        self.dfa.transitions.create(from_state=q1, to_state=q1, symbol="b")
+        self.url = reverse('core:simulate_batch', kwargs={'pk': self.dfa.pk})
+
+    def test_batch_json(self):
+        """Test simulating a JSON list of strings."""
+        strings = ["", "a", "aa", "ab", "bab", "ac"]
+        response = self.client.post(
+            self.url,
+            json.dumps({'strings': strings}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+        data = json.loads(response.content)
+        self.assertEqual(data['count'], 6)
+        self.assertEqual(
+            [result['accepted'] for result in data['results']],
+            [True, False, True, False, False, False]
+        )
+        self.assertIn("not in the alphabet", data['results'][5]['message'])
+        self.assertNotIn('path', data['results'][0])
+
+    def test_batch_include_paths(self):
+        """Test that paths are only returned on request."""
+        response = self.client.post(
+            self.url,
+            json.dumps({'strings': ["ab"], 'include_paths': True}),
+            content_type='application/json'
+        )
+        data = json.loads(response.content)
+        self.assertEqual(data['results'][0]['path'], ['q0', 'q1', 'q1'])
+
+    def test_batch_file_upload(self):
+        """Test simulating a newline-delimited upload."""
+        upload = SimpleUploadedFile("strings.txt", b"aa\nab\nbb\n")
+        response = self.client.post(self.url, {'file': upload})
+        data = json.loads(response.content)
+
+        self.assertEqual(data['count'], 3)
+        self.assertEqual(data['accepted_count'], 2)
+
+    def test_batch_compiles_once(self):
+        """Test that the query count does not grow with the number of strings."""
+        self.dfa.get_type()
+        body = json.dumps({'strings': ["ab" * 50] * 2000})
+        with self.assertNumQueries(5):
+            response = self.client.post(self.url, body, content_type='application/json')
+        self.assertEqual(json.loads(response.content)['accepted_count'], 2000)
+
+    def test_batch_rejects_bad_input(self):
+        """Test that malformed bodies are rejected."""
+        response = self.client.post(
+            self.url,
+            json.dumps({'strings': "aa"}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class AlphabetRangeEditTest(TestCase):
+    """Test editing automata whose alphabets are given as ranges."""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.login(username='testuser', password='testpass123')
+
+    def test_range_symbols(self):
+        """Test that range specs are checked against the alphabet's intervals."""
+        automaton = Automaton.objects.create(name="Letters", alphabet="a-z", owner=self.user)
+        q0 = automaton.states.create(name='q0', is_start=True, is_final=True)
+        url = reverse('core:add_transition', kwargs={'pk': automaton.pk})
+
+        def post(symbol):
+            return self.client.post(url, json.dumps({
+                'from_state': q0.pk, 'to_state': q0.pk, 'symbol': symbol
+            }), content_type='application/json')
+
+        self.assertEqual(json.loads(post('a-z').content)['status'], 'ok')
+        self.assertEqual(Automaton.objects.get(pk=automaton.pk).get_type(), 'DFA')
+
+        # Overlaps the a-z transition of this DFA state
+        self.assertIn('already has a transition', json.loads(post('x-z').content)['message'])
+
+        response = post('A-C')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Symbol 'A' is not in the alphabet", json.loads(response.content)['message'])
+
+    def test_symbols_are_listed_as_ranges(self):
+        """Test that large alphabets are listed as ranges instead of every symbol."""
+        automaton = Automaton.objects.create(name="Lexer", alphabet="U+0000-U+FFFF,_", owner=self.user)
+        response = self.client.get(reverse('core:get_alphabet_symbols', kwargs={'pk': automaton.pk}))
+        self.assertEqual(
+            [symbol['value'] for symbol in json.loads(response.content)['symbols']], ['U+0000-U+FFFF']
+        )
+
+
+class StreamingSimulationViewTest(TestCase):
+    """Test the streaming simulation endpoint."""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.login(username='testuser', password='testpass123')
+
+        self.dfa = Automaton.objects.create(name="Even A's", alphabet="a,b", owner=self.user)
+        q0 = self.dfa.states.create(name="q0", is_start=True, is_final=True)
+        q1 = self.dfa.states.create(name="q1", is_final=False)
+        self.dfa.transitions.create(from_state=q0, to_state=q1, symbol="a")
+        self.dfa.transitions.create(from_state=q0, to_state=q0, symbol="b")
+        self.dfa.transitions.create(from_state=q1, to_state=q0, symbol="a")
+        self.dfa.transitions.create(from_state=q1, to_state=q1, symbol="b")
+        self.url = reverse('core:simulate_stream', kwargs={'pk': self.dfa.pk})
+
+    def test_stream_long_input(self):
+        """Test that a body longer than one read chunk is simulated."""
+        body = "b" * 150000 + "aa" + "b" * 50000
+        response = self.client.post(
+            self.url + '?checkpoint_every=50000&path=rle', body, content_type='text/plain'
+        )
+        self.assertEqual(response.status_code, 200)
+
+        data = json.loads(response.content)
+        self.assertTrue(data['accepted'])
+        self.assertEqual(data['length'], 200002)
+        self.assertEqual(data['state'], 'q0')
+        self.assertEqual(len(data['checkpoints']), 5)
+        self.assertEqual(data['runs'], [['q0', 150001], ['q1', 1], ['q0', 50001]])
+
+    def test_stream_multibyte_symbols(self):
+        """Test that UTF-8 sequences split across chunks are decoded."""
+        automaton = Automaton.objects.create(name="Greek", alphabet="α,β", owner=self.user)
+        q0 = automaton.states.create(name="q0", is_start=True, is_final=True)
+        automaton.transitions.create(from_state=q0, to_state=q0, symbol="α,β")
+        url = reverse('core:simulate_stream', kwargs={'pk': automaton.pk})
+
+        with patch('core.views.STREAM_CHUNK_SIZE', 3):
+            response = self.client.post(url, "αβα".encode(), content_type='text/plain')
+        data = json.loads(response.content)
+        self.assertTrue(data['accepted'])
+        self.assertEqual(data['length'], 3)
+
+        response = self.client.post(url, b"\xce", content_type='text/plain')
+        self.assertEqual(response.status_code, 400)
+
+    def test_stream_stops_on_unknown_symbol(self):
+        """Test that the error of the run is reported."""
+        response = self.client.post(self.url, "abcab", content_type='text/plain')
+        data = json.loads(response.content)
+        self.assertFalse(data['accepted'])
+        self.assertIn("not in the alphabet", data['message'])
+        self.assertEqual(data['length'], 2)
+
+    def test_stream_rejects_bad_checkpoint_interval(self):
+        response = self.client.post(self.url + '?checkpoint_every=x', "ab", content_type='text/plain')
+        self.assertEqual(response.status_code, 400)
+
+
+class SimulationTraceTest(TestCase):
+    """Test compact simulation traces and their window endpoint."""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.login(username='testuser', password='testpass123')
+
+        self.nfa = Automaton.objects.create(name="Ends in ab", alphabet="a,b", owner=self.user)
+        q0 = self.nfa.states.create(name="q0", is_start=True)
+        q1 = self.nfa.states.create(name="q1")
+        q2 = self.nfa.states.create(name="q2", is_final=True)
+        self.nfa.transitions.create(from_state=q0, to_state=q0, symbol="a,b")
+        self.nfa.transitions.create(from_state=q0, to_state=q1, symbol="a")
+        self.nfa.transitions.create(from_state=q1, to_state=q2, symbol="b")
+        self.nfa.update_json_representation()
+
+    def test_compact_trace(self):
+        """Test that the simulate endpoint returns a compact trace with its first window."""
+        response = self.client.get(
+            reverse('core:simulate_string', kwargs={'pk': self.nfa.pk}),
+            {'input_string': "b" * 5000 + "ab", 'trace': 'compact'}
+        )
+        data = json.loads(response.content)
+        self.assertTrue(data['accepted'])
+        self.assertNotIn('path', data)
+
+        trace = data['trace']
+        self.assertEqual(trace['length'], 5002)
+        self.assertEqual(trace['runs'][0], [[0], 1000])
+        self.assertEqual(trace['states'][str(trace['start'])], ['q0'])
+        self.assertEqual(trace['transitions']['0'][2], 'b')
+
+        response = self.client.get(trace['url'], {'offset': 4999, 'limit': 10})
+        window = json.loads(response.content)
+        self.assertEqual(window['runs'], [[[0], 1], [[1, 2], 1]])
+        self.assertEqual(
+            [window['states'][str(window['transitions'][str(i)][1])] for i in (1, 2)],
+            [['q0', 'q1'], ['q0', 'q2']]
+        )
+
+    def test_stream_trace(self):
+        """Test that streamed inputs can be traced."""
+        response = self.client.post(
+            reverse('core:simulate_stream', kwargs={'pk': self.nfa.pk}) + '?path=trace',
+            "ab" * 3000, content_type='text/plain'
+        )
+        trace = json.loads(response.content)['trace']
+        self.assertEqual(trace['length'], 6000)
+        # The first window ends within the cycle taken from the second step
+        self.assertEqual(trace['runs'][:2], [[[0], 1], [[1, 2], 499]])
+
+    def test_unknown_trace(self):
+        """Test that expired traces and traces of other automata are not found."""
+        response = self.client.get(
+            reverse('core:simulate_string', kwargs={'pk': self.nfa.pk}),
+            {'input_string': "ab", 'trace': 'compact'}
+        )
+        trace_id = json.loads(response.content)['trace']['id']
+        other = Automaton.objects.create(name="Other", alphabet="a", owner=self.user)
+
+        for pk, trace in [(other.pk, trace_id), (self.nfa.pk, 'missing')]:
+            response = self.client.get(reverse('core:simulation_trace', kwargs={'pk': pk, 'trace_id': trace}))
+            self.assertEqual(response.status_code, 404)
+
+    def test_trace_is_shared(self):
+        """Test that traces are stored in the shared trace cache, not the per-process default."""
+        response = self.client.get(
+            reverse('core:simulate_string', kwargs={'pk': self.nfa.pk}),
+            {'input_string': "ab", 'trace': 'compact'}
+        )
+        key = CACHE_KEY_PREFIX + json.loads(response.content)['trace']['id']
+        self.assertIsNotNone(caches['traces'].get(key))
+        self.assertIsNone(caches['default'].get(key))
+
+
+class JsonDeltaTest(TestCase):
+    """Test that editor mutations patch the stored JSON and return deltas."""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.login(username='testuser', password='testpass123')
+
+        self.automaton = Automaton.objects.create(
+            name="Delta Test",
+            alphabet="a,b",
+            owner=self.user
+        )
+        self.q0 = self.automaton.states.create(name="q0", is_start=True)
+        self.q1 = self.automaton.states.create(name="q1")
+        self.transition = self.automaton.transitions.create(
+            from_state=self.q0, to_state=self.q1, symbol="a"
+        )
+        self.automaton.update_json_representation()
+
+    def post(self, name, body):
+        url = reverse(f'core:{name}', kwargs={'pk': self.automaton.pk})
+        response = self.client.post(url, json.dumps(body), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content)['delta']
+
+    def stored_json(self):
+        self.automaton.refresh_from_db()
+        return self.automaton.json_representation
+
+    def assertMatchesRebuild(self):
+        stored = self.stored_json()
+        self.automaton.update_json_representation()
+        rebuilt = self.automaton.json_representation
+        key = lambda element: element['data']['pk']
+        self.assertEqual(sorted(stored['nodes'], key=key), sorted(rebuilt['nodes'], key=key))
+        self.assertEqual(sorted(stored['edges'], key=key), sorted(rebuilt['edges'], key=key))
+
+    def test_add_state_delta(self):
+        """Test that added states come back as added nodes."""
+        delta = self.post('add_state', {'name': 'q2, q3'})
+        self.assertEqual([node['data']['id'] for node in delta['nodes']['added']], ['q2', 'q3'])
+        self.assertMatchesRebuild()
+
+    def test_add_existing_states_writes_nothing(self):
+        """Test that adding only existing states leaves the stored structure alone."""
+        self.automaton.refresh_from_db()
+        updated_at = self.automaton.updated_at
+        with CaptureQueriesContext(connection) as queries:
+            delta = self.post('add_state', {'name': 'q0, q1'})
+        self.assertEqual(delta, Automaton.json_delta())
+        self.assertFalse(any('UPDATE "core_automaton"' in query['sql'] for query in queries.captured_queries))
+        self.automaton.refresh_from_db()
+        self.assertEqual(self.automaton.updated_at, updated_at)
+
+    def test_overlapping_deltas_both_survive(self):
+        """Test that a delta is applied to the stored JSON, not to a copy loaded before another edit."""
+        first = Automaton.objects.get(pk=self.automaton.pk)
+        second = Automaton.objects.get(pk=self.automaton.pk)
+        with patching_json():
+            q2 = first.states.create(name="q2")
+            q3 = second.states.create(name="q3")
+            edge = second.transitions.create(from_state=self.q1, to_state=q3, symbol="b")
+            first.apply_json_delta(added_nodes=[Automaton.json_node(q2)])
+            second.apply_json_delta(
+                added_nodes=[Automaton.json_node(q3)], added_edges=[Automaton.json_edge(edge, 'q1', 'q3')]
+            )
+
+        stored = self.stored_json()
+        self.assertEqual(sorted(node['data']['id'] for node in stored['nodes']), ['q0', 'q1', 'q2', 'q3'])
+        self.assertEqual(len(stored['edges']), 2)
+        self.assertEqual(self.automaton.structure_hash, second.structure_hash)
+        self.assertMatchesRebuild()
+
+    def test_set_start_delta(self):
+        """Test that moving the start state updates both nodes."""
+        delta = self.post('update_state', {'state_pk': self.q1.pk, 'action': 'set_start'})
+        self.assertEqual(delta['nodes']['updated'], [
+            {'id': 'q0', 'is_start': False},
+            {'id': 'q1', 'is_start': True},
+        ])
+        self.assertMatchesRebuild()
+
+    def test_delete_state_removes_edges(self):
+        """Test that deleting a state also drops its edges from the JSON."""
+        delta = self.post('delete_state', {'state_pk': self.q1.pk})
+        self.assertEqual(delta['nodes']['removed'], ['q1'])
+        self.assertEqual(delta['edges']['removed'], [self.transition.pk])
+        self.assertMatchesRebuild()
+
+    def test_transition_deltas(self):
+        """Test adding and deleting transitions."""
+        delta = self.post('add_transition', {'from_state': self.q1.pk, 'to_state': self.q1.pk, 'symbol': 'b'})
+        edge = delta['edges']['added'][0]['data']
+        self.assertTrue(edge['is_self_loop'])
+        self.assertMatchesRebuild()
+
+        delta = self.post('delete_transition', {'transition_pk': edge['pk']})
+        self.assertEqual(delta['edges']['removed'], [edge['pk']])
+        self.assertMatchesRebuild()
+
+    def test_mutation_saves_json_once(self):
+        """Test that a toggle writes the JSON representation with a single UPDATE."""
+        url = reverse('core:update_state', kwargs={'pk': self.automaton.pk})
+        body = json.dumps({'state_pk': self.q1.pk, 'action': 'toggle_final'})
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(url, body, content_type='application/json')
+        json_writes = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE "core_automaton"') and '"json_representation"' in query['sql']
+        ]
+        self.assertEqual(len(json_writes), 1)
+
+    def test_missing_json_requests_reload(self):
+        """Test that an automaton without stored JSON is rebuilt instead of patched."""
+        Automaton.objects.filter(pk=self.automaton.pk).update(json_representation={})
+        delta = self.post('add_state', {'name': 'q2'})
+        self.assertEqual(delta, {'reload': True})
+        self.assertEqual(len(self.stored_json()['nodes']), 3)
+
+
+class EditBatchTest(TestCase):
+    """Test the batched editing endpoint."""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+
+        self.dfa = Automaton.objects.create(name="Batch DFA", alphabet="a,b", owner=self.user)
+        self.q0 = self.dfa.states.create(name="q0", is_start=True)
+        self.q1 = self.dfa.states.create(name="q1")
+        self.transition = self.dfa.transitions.create(from_state=self.q0, to_state=self.q1, symbol="a")
+        self.dfa.update_json_representation()
+        self.url = reverse('core:edit_batch', kwargs={'pk': self.dfa.pk})
+
+    def post(self, operations):
+        return self.client.post(self.url, json.dumps({'operations': operations}), content_type='application/json')
+
+    def assertMatchesRebuild(self):
+        self.dfa.refresh_from_db()
+        stored = self.dfa.json_representation
+        self.dfa.update_json_representation()
+        rebuilt = self.dfa.json_representation
+        key = lambda element: element['data']['pk']
+        self.assertEqual(sorted(stored['nodes'], key=key), sorted(rebuilt['nodes'], key=key))
+        self.assertEqual(sorted(stored['edges'], key=key), sorted(rebuilt['edges'], key=key))
+
+    def test_builds_chain_in_one_request(self):
+        """Test that states and the transitions between them are created together."""
+        operations = [{'op': 'add_state', 'name': f'p{i}'} for i in range(50)]
+        operations += [{'op': 'add_transition', 'from': f'p{i}', 'to': f'p{i + 1}', 'symbol': 'a'} for i in range(49)]
+        operations.append({'op': 'toggle_final', 'state': 'p49'})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post(operations)
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(len(queries), 20)
+
+        data = json.loads(response.content)
+        self.assertEqual(data['operations'], {'add_state': 50, 'add_transition': 49, 'toggle_final': 1})
+        self.assertEqual(len(data['delta']['nodes']['added']), 50)
+        self.assertEqual(len(data['delta']['edges']['added']), 49)
+        self.assertEqual(self.dfa.states.count(), 52)
+        self.assertTrue(self.dfa.states.get(name='p49').is_final)
+        self.assertMatchesRebuild()
+
+    def test_invalid_operation_rejects_batch(self):
+        """Test that nothing is written when any operation is invalid."""
+        response = self.post([
+            {'op': 'add_state', 'name': 'q2'},
+            {'op': 'add_transition', 'from': 'q2', 'to': 'q0', 'symbol': 'c'},
+        ])
+        self.assertEqual(response.status_code, 400)
+        data = json.loads(response.content)
+        self.assertEqual(data['operation'], 1)
+        self.assertIn("not in the alphabet", data['message'])
+        self.assertFalse(self.dfa.states.filter(name='q2').exists())
+
+        for operations in (
+            [{'op': 'explode'}],
+            [{'op': 'remove_state', 'state': 'missing'}],
+            [{'op': 'add_state', 'name': 'q0'}],
+            [{'op': 'remove_transition', 'transition_pk': 'x'}],
+            'not a list',
+        ):
+            self.assertEqual(self.post(operations).status_code, 400)
+
+    def test_dfa_rejects_overlapping_transitions(self):
+        """Test the DFA determinism check, including transitions added by the same batch."""
+        self.dfa.transitions.create(from_state=self.q0, to_state=self.q0, symbol="b")
+        self.dfa.transitions.create(from_state=self.q1, to_state=self.q1, symbol="a,b")
+        self.dfa.states.filter(pk=self.q1.pk).update(is_final=True)
+        self.dfa.update_json_representation()
+        self.assertEqual(self.dfa.get_type(), 'DFA')
+
+        response = self.post([{'op': 'add_transition', 'from': 'q0', 'to': 'q0', 'symbol': 'a,b'}])
+        self.assertEqual(response.status_code, 400)
+
+        response = self.post([
+            {'op': 'remove_transition', 'transition_pk': self.transition.pk},
+            {'op': 'add_transition', 'from': 'q0', 'to': 'q0', 'symbol': 'a'},
+            {'op': 'add_transition', 'from': 'q0', 'to': 'q1', 'symbol': 'a-b'},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.content)['operation'], 2)
+
+    def test_remove_and_readd_state(self):
+        """Test that a removed state can be re-created under the same name."""
+        response = self.post([
+            {'op': 'remove_state', 'state': 'q1'},
+            {'op': 'add_state', 'name': 'q1', 'is_final': True},
+            {'op': 'add_transition', 'from': 'q0', 'to': 'q1', 'symbol': 'b'},
+            {'op': 'set_start', 'state': 'q1'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        q1 = self.dfa.states.get(name='q1')
+        self.assertNotEqual(q1.pk, self.q1.pk)
+        self.assertTrue(q1.is_final and q1.is_start)
+        self.q0.refresh_from_db()
+        self.assertFalse(self.q0.is_start)
+        self.assertEqual(list(self.dfa.transitions.values_list('symbol', flat=True)), ['b'])
+        self.assertMatchesRebuild()
+
+    def test_concurrent_edit_conflicts(self):
+        """Test that a state added by another request after validation fails the batch with 409."""
+        validate = EditBatch.validate
+
+        def validate_then_race(batch):
+            validate(batch)
+            State.objects.create(automaton=self.dfa, name='q2')
+
+        with patch.object(EditBatch, 'validate', validate_then_race):
+            response = self.post([
+                {'op': 'add_state', 'name': 'q2'},
+                {'op': 'add_transition', 'from': 'q0', 'to': 'q2', 'symbol': 'b'},
+            ])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(json.loads(response.content)['status'], 'error')
+        self.assertEqual(self.dfa.states.filter(name='q2').count(), 1)
+        self.assertEqual(self.dfa.transitions.count(), 1)
+
+    def test_first_state_becomes_start(self):
+        """Test that the first state added to an empty automaton is the start state."""
+        empty = Automaton.objects.create(name="Empty", alphabet="a", owner=self.user)
+        url = reverse('core:edit_batch', kwargs={'pk': empty.pk})
+        body = {'operations': [{'op': 'add_state', 'name': 's0'}, {'op': 'add_state', 'name': 's1'}]}
+        response = self.client.post(url, json.dumps(body), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(empty.states.filter(is_start=True).values_list('name', flat=True)), ['s0'])
+
+
+class AccessResolutionTest(TestCase):
+    """Test that automaton visibility is resolved with a single query."""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.other = User.objects.create_user(username='other', password='testpass123')
+        self.system = User.objects.create_user(username='system')
+        self.client.login(username='testuser', password='testpass123')
+
+        self.own = Automaton.objects.create(name="Own", alphabet="a", owner=self.user)
+        self.foreign = Automaton.objects.create(name="Foreign", alphabet="a", owner=self.other)
+        self.unowned = Automaton.objects.create(name="Unowned", alphabet="a")
+        self.example = Automaton.objects.create(name="Example", alphabet="a", owner=self.system)
+
+    def test_visibility(self):
+        """Test that own automata and both kinds of examples are visible."""
+        self.assertEqual(
+            set(visible_automata(self.user).values_list('name', flat=True)),
+            {"Own", "Unowned", "Example"}
+        )
+        with self.assertRaises(Http404):
+            get_automaton_instance(self.foreign.pk, self.user)
+
+    def test_single_query(self):
+        """Test that a lookup costs one query once the system user is known."""
+        get_system_user_id()
+        for automaton in (self.own, self.unowned, self.example):
+            with self.assertNumQueries(1):
+                self.assertEqual(get_automaton_instance(automaton.pk, self.user), automaton)
+
+    def test_system_user_memo_reset(self):
+        """Test that recreating the system user is picked up."""
+        self.assertEqual(get_system_user_id(), self.system.pk)
+        self.system.delete()
+        self.assertIsNone(get_system_user_id())
+
+        replacement = User.objects.create_user(username='system')
+        self.assertEqual(get_system_user_id(), replacement.pk)
+
+    def test_system_user_created_elsewhere(self):
+        """Test that a missing system user is not memoized, so one created by another process is found."""
+        self.system.delete()
+        self.assertIsNone(get_system_user_id())
+
+        # bulk_create sends no post_save, like a save in another process
+        User.objects.bulk_create([User(username='system')])
+        self.assertEqual(get_system_user_id(), User.objects.get(username='system').pk)
+
+    def test_detail_view_validates_once(self):
+        """Test that the detail page validates an untyped automaton only once."""
+        q0 = self.own.states.create(name="q0", is_start=True, is_final=True)
+        self.own.transitions.create(from_state=q0, to_state=q0, symbol="a")
+        self.own.update_json_representation()
+        with patch.object(CompiledAutomaton, 'validate', autospec=True, side_effect=CompiledAutomaton.validate) as validate:
+            response = self.client.get(reverse('core:automaton_detail', kwargs={'pk': self.own.pk}))
+        self.assertEqual(validate.call_count, 1)
+        self.assertEqual(response.context['fa_type'], 'DFA')
+        self.assertTrue(response.context['fa_type_valid'])
+
+    def test_detail_view_fetches_once(self):
+        """Test that the detail page reuses the automaton it already fetched."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('core:automaton_detail', kwargs={'pk': self.own.pk}))
+        self.assertEqual(response.status_code, 200)
+        automaton_lookups = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT "core_automaton"."id"')
+        ]
+        self.assertEqual(len(automaton_lookups), 1)
+
+    def test_foreign_automaton_endpoint(self):
+        """Test that endpoints 404 on automata the user cannot see."""
+        response = self.client.get(reverse('core:get_automaton_json', kwargs={'pk': self.foreign.pk}))
+        self.assertEqual(response.status_code, 404)
+
+        response = self.client.get(reverse('core:get_automaton_json', kwargs={'pk': self.example.pk}))
+        self.assertEqual(response.status_code, 200)
+
+
+class InstrumentationTest(TestCase):
+    """Test the Server-Timing headers and the metrics endpoint."""
+
+    def setUp(self):
+        reset_metrics()
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+
+        self.dfa = Automaton.objects.create(name="Redundant", alphabet="a,b", owner=self.user)
+        q0 = self.dfa.states.create(name="q0", is_start=True)
+        q1 = self.dfa.states.create(name="q1", is_final=True)
+        q2 = self.dfa.states.create(name="q2", is_final=True)
+        self.dfa.transitions.create(from_state=q0, to_state=q1, symbol="a")
+        self.dfa.transitions.create(from_state=q0, to_state=q2, symbol="b")
+        self.dfa.transitions.create(from_state=q1, to_state=q1, symbol="a,b")
+        self.dfa.transitions.create(from_state=q2, to_state=q2, symbol="a,b")
+        self.dfa.update_json_representation()
+
+    def test_server_timing_header(self):
+        """Test that core responses report queries, DB time and phases."""
+        url = reverse('core:minimize_dfa', kwargs={'pk': self.dfa.pk})
+        response = self.client.post(url)
+        header = response['Server-Timing']
+
+        self.assertRegex(header, r'db;dur=[0-9.]+;desc="\d+ queries"')
+        for name in ('app', 'total', 'minimize', 'hopcroft', 'persist', 'compile'):
+            self.assertIn(f'{name};dur=', header)
+
+    def test_non_core_responses_untouched(self):
+        """Test that requests outside the core app are not instrumented."""
+        response = self.client.get('/accounts/login/')
+        self.assertNotIn('Server-Timing', response)
+
+    def test_metrics_endpoint(self):
+        """Test that the histograms are aggregated and only visible to staff."""
+        json_url = reverse('core:get_automaton_json', kwargs={'pk': self.dfa.pk})
+        for _ in range(3):
+            self.client.get(json_url)
+
+        metrics_url = reverse('core:metrics')
+        self.assertEqual(self.client.get(metrics_url).status_code, 302)
+
+        self.user.is_staff = True
+        self.user.save()
+        data = json.loads(self.client.get(metrics_url).content)
+        histograms = data['endpoints']['core:get_automaton_json']
+
+        self.assertEqual(histograms['total_ms']['count'], 3)
+        self.assertEqual(sum(histograms['queries']['buckets'].values()), 3)
+
+    def test_phase_outside_request(self):
+        """Test that timed phases are a no-op without an active request."""
+        self.assertIsNone(current_metrics())
+        with timed_phase('idle'):
+            pass
+        self.assertEqual(metrics_snapshot(), {})
+
+
+class DashboardClassificationTest(TestCase):
+    """Test that the dashboard is served from the stored type column."""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+
+    def create_automata(self, count):
+        """Create alternating DFAs ('a' loop) and NFAs (ε move) without a stored type."""
+        for i in range(count):
+            automaton = Automaton.objects.create(name=f"A{i}", alphabet="a", owner=self.user)
+            q0 = automaton.states.create(name="q0", is_start=True, is_final=True)
+            symbol = "a" if i % 2 == 0 else "ε"
+            automaton.transitions.create(from_state=q0, to_state=q0, symbol=symbol)
+
+    def load_dashboard(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('core:dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_constant_queries(self):
+        """Test that the query count does not depend on the number of automata."""
+        get_system_user_id()
+        self.create_automata(4)
+        _, small = self.load_dashboard()
+        _, small_cached = self.load_dashboard()
+
+        Automaton.objects.filter(owner=self.user).delete()
+        self.create_automata(40)
+        response, large = self.load_dashboard()
+        _, large_cached = self.load_dashboard()
+
+        self.assertEqual(small, large)
+        self.assertEqual(small_cached, large_cached)
+        self.assertLess(large_cached, large)
+        self.assertEqual(len(response.context['automatons']['dfas']), 20)
+        self.assertEqual(len(response.context['automatons']['nfas']), 20)
+        self.assertEqual(response.context['stats']['dfas_count'], 20)
+        self.assertEqual(response.context['stats']['nfas_count'], 20)
+
+    def test_structure_not_loaded(self):
+        """Test that the dashboard does not load the stored structure of the listed automata."""
+        self.create_automata(2)
+        for automaton in Automaton.objects.filter(owner=self.user):
+            automaton.update_json_representation()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('core:dashboard'))
+        listed = response.context['automatons']['dfas'] + response.context['automatons']['nfas']
+        self.assertEqual(len(listed), 2)
+        for column in ('packed_structure', 'json_representation'):
+            self.assertFalse(any(column in query['sql'] for query in queries.captured_queries))
+            self.assertIn(column, listed[0].get_deferred_fields())
+
+    def test_classify_untyped(self):
+        """Test that bulk classification matches get_type."""
+        self.create_automata(6)
+        queryset = Automaton.objects.filter(owner=self.user)
+        with self.assertNumQueries(4):
+            self.assertEqual(Automaton.classify_untyped(queryset), 6)
+        self.assertEqual(Automaton.classify_untyped(queryset), 0)
+
+        for automaton in queryset:
+            expected = automaton.cached_type
+            automaton.cached_type = ''
+            self.assertEqual(automaton.get_type(), expected)
+
+
+@override_settings(CORE_JOBS_EAGER=True)
+class JobQueueTest(TestCase):
+    """Test minimize/to_dfa submitted as background jobs."""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+
+        # Strings whose 3rd symbol from the end is 'a'
+        self.nfa = Automaton.objects.create(name="3rd from end", alphabet="a,b", owner=self.user)
+        states = [
+            self.nfa.states.create(name=f"q{i}", is_start=(i == 0), is_final=(i == 3))
+            for i in range(4)
+        ]
+        self.nfa.transitions.create(from_state=states[0], to_state=states[0], symbol="a,b")
+        self.nfa.transitions.create(from_state=states[0], to_state=states[1], symbol="a")
+        for i in range(1, 3):
+            self.nfa.transitions.create(from_state=states[i], to_state=states[i + 1], symbol="a,b")
+        self.nfa.update_json_representation()
+
+    def submit(self, name, automaton):
+        response = self.client.post(reverse(f'core:{name}', kwargs={'pk': automaton.pk}))
+        return response, json.loads(response.content)
+
+    def test_conversion_job(self):
+        """Test that a submitted conversion reports progress and its result."""
+        response, data = self.submit('submit_nfa_to_dfa', self.nfa)
+        self.assertEqual(response.status_code, 202)
+
+        job = json.loads(self.client.get(data['status_url']).content)
+        self.assertEqual(job['status'], Job.SUCCEEDED)
+        self.assertEqual(job['progress']['subsets_discovered'], 8)
+        self.assertEqual(job['result']['status'], 'success')
+        self.assertEqual(job['result_url'], job['result']['conversion_steps_url'])
+
+        # The result page finds the steps without them being in the session
+        response = self.client.get(job['result_url'])
+        self.assertTrue(response.context['has_steps'])
+        self.assertEqual(response.context['detailed_steps']['dfa_state_count'], 8)
+
+    def test_minimization_job(self):
+        """Test that the minimized DFA of a converted NFA comes back as a job result."""
+        _, data = self.submit('submit_nfa_to_dfa', self.nfa)
+        dfa = Automaton.objects.get(pk=json.loads(self.client.get(data['status_url']).content)['result']['dfa_id'])
+
+        _, data = self.submit('submit_minimize_dfa', dfa)
+        job = json.loads(self.client.get(data['status_url']).content)
+        self.assertEqual(job['status'], Job.SUCCEEDED)
+        self.assertEqual(job['result']['status'], 'info')
+        self.assertIn('partition_rounds', job['progress'])
+
+    @override_settings(CORE_DFA_MAX_STATES=4)
+    def test_budget_exceeded(self):
+        """Test that conversions over budget fail with how far they got."""
+        url = reverse('core:convert_nfa_to_dfa', kwargs={'pk': self.nfa.pk})
+        response = self.client.post(url)
+        data = json.loads(response.content)
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(data['status'], 'budget_exceeded')
+        self.assertEqual(data['budget']['limit'], 'max_states')
+        self.assertEqual(data['budget']['maximum'], 4)
+
+        _, data = self.submit('submit_nfa_to_dfa', self.nfa)
+        job = json.loads(self.client.get(data['status_url']).content)
+        self.assertEqual(job['status'], Job.FAILED)
+        self.assertEqual(job['result']['status'], 'budget_exceeded')
+        self.assertGreater(job['progress']['subsets_discovered'], 4)
+        self.assertFalse(Automaton.objects.filter(name__endswith='_DFA').exists())
+
+    def test_wrong_type_rejected(self):
+        """Test that submitting an NFA for minimization is refused."""
+        response, data = self.submit('submit_minimize_dfa', self.nfa)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(data['message'], 'Only DFA can be minimized.')
+        self.assertFalse(Job.objects.exists())
+
+    def test_jobs_are_private(self):
+        """Test that other users cannot poll a job."""
+        _, data = self.submit('submit_nfa_to_dfa', self.nfa)
+        User.objects.create_user(username='other', password='testpass123')
+        self.client.login(username='other', password='testpass123')
+        self.assertEqual(self.client.get(data['status_url']).status_code, 404)
+
+    def test_claimed_jobs_run_once(self):
+        """Test that a job another worker already claimed is not run again."""
+        job = Job.objects.create(
+            operation=DerivedAutomaton.TO_DFA, automaton=self.nfa, owner=self.user, status=Job.RUNNING
+        )
+        run_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.RUNNING)
+        self.assertFalse(Automaton.objects.filter(name__endswith='_DFA').exists())
+
+    def test_deleted_automaton_fails(self):
+        """Test that a job whose automaton is gone fails with a message."""
+        job = Job.objects.create(operation=DerivedAutomaton.TO_DFA, automaton=None, owner=self.user)
+        with self.assertLogs('core.jobs', 'ERROR'):
+            run_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn('deleted', job.error)
+
+    @override_settings(CORE_JOB_STALE_SECONDS=600)
+    def test_stale_jobs_fail(self):
+        """Test that jobs left running by a dead worker are failed, and recent ones are left alone."""
+        now = timezone.now()
+        stale, recent = [
+            Job.objects.create(
+                operation=DerivedAutomaton.TO_DFA, automaton=self.nfa, owner=self.user,
+                status=Job.RUNNING, started_at=now - timedelta(seconds=seconds)
+            )
+            for seconds in (601, 10)
+        ]
+        with self.assertLogs('core.jobs', 'WARNING'):
+            self.assertEqual(fail_stale_jobs(), 1)
+
+        stale.refresh_from_db()
+        recent.refresh_from_db()
+        self.assertEqual(stale.status, Job.FAILED)
+        self.assertIn('interrupted', stale.error)
+        self.assertIsNotNone(stale.finished_at)
+        self.assertEqual(recent.status, Job.RUNNING)
+
+
+class ResultStepsTest(TestCase):
+    """Test that detailed steps are kept in the result store instead of the session."""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+
+        # Strings whose 8th symbol from the end is 'a': 256 DFA states, 512 transitions
+        self.nfa = Automaton.objects.create(name="8th from end", alphabet="a,b", owner=self.user)
+        states = [
+            self.nfa.states.create(name=f"q{i}", is_start=(i == 0), is_final=(i == 8))
+            for i in range(9)
+        ]
+        self.nfa.transitions.create(from_state=states[0], to_state=states[0], symbol="a,b")
+        self.nfa.transitions.create(from_state=states[0], to_state=states[1], symbol="a")
+        for i in range(1, 8):
+            self.nfa.transitions.create(from_state=states[i], to_state=states[i + 1], symbol="a,b")
+        self.nfa.update_json_representation()
+
+    def convert(self):
+        url = reverse('core:convert_nfa_to_dfa', kwargs={'pk': self.nfa.pk})
+        data = json.loads(self.client.post(url).content)
+        self.assertEqual(data['status'], 'success')
+        return Automaton.objects.get(pk=data['dfa_id'])
+
+    def test_steps_stay_out_of_the_session(self):
+        """Test that the session stays small and the steps are stored compressed."""
+        dfa = self.convert()
+        self.assertFalse(any('steps' in key for key in self.client.session.keys()))
+
+        stored = ResultSteps.objects.get(result=dfa)
+        steps = ResultSteps.load(DerivedAutomaton.TO_DFA, dfa)
+        self.assertEqual(steps['dfa_state_count'], 256)
+        self.assertLess(len(stored.data), len(json.dumps(steps)) / 4)
+
+        # The cache entry only keeps the summary
+        cached = DerivedAutomaton.objects.get(result=dfa)
+        self.assertNotIn('steps', cached.detailed_steps)
+        self.assertEqual(cached.detailed_steps['dfa_state_count'], 256)
+
+    def test_result_page_is_paginated(self):
+        """Test that long lists are cut on the page and served by the steps endpoint."""
+        dfa = self.convert()
+        response = self.client.get(reverse('core:conversion_result', kwargs={'pk': dfa.pk}))
+        context = response.context
+        self.assertEqual(len(context['detailed_steps']['steps'][3]['transitions']), STEPS_PAGE_SIZE)
+        self.assertIn(
+            {'path': 'steps.3.transitions', 'shown': STEPS_PAGE_SIZE, 'total': 512},
+            context['steps_truncated']
+        )
+
+        response = self.client.get(context['steps_url'], {'path': 'steps.3.transitions', 'offset': 500})
+        data = json.loads(response.content)
+        self.assertEqual(data['total'], 512)
+        self.assertEqual(len(data['items']), 12)
+        self.assertIn('nfa_computation', data['items'][0])
+
+        response = self.client.get(context['steps_url'], {'path': 'steps.9'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_expired_steps_fall_back_to_summary(self):
+        """Test that expired steps are not shown and are purged by the next store."""
+        with self.settings(CORE_RESULT_STEPS_TTL=-1):
+            dfa = self.convert()
+        self.assertIsNone(ResultSteps.load(DerivedAutomaton.TO_DFA, dfa))
+
+        response = self.client.get(reverse('core:conversion_result', kwargs={'pk': dfa.pk}))
+        self.assertTrue(response.context['has_steps'])
+        self.assertEqual(response.context['detailed_steps']['dfa_state_count'], 256)
+        self.assertNotIn('steps', response.context['detailed_steps'])
+
+        ResultSteps.store(DerivedAutomaton.TO_DFA, self.nfa, {'steps': []})
+        self.assertFalse(ResultSteps.objects.filter(result=dfa).exists())
+
+
 if __name__ == '__main__':
     import unittest
     unittest.main()
@@ -1,11 +1,21 @@
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.urls import reverse
-from django.db import IntegrityError
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
 import json
+import random
+from unittest.mock import patch
 
-from .models import Automaton, State, Transition
+from .engine import (
+    BudgetExceeded, CompactTrace, CompiledAutomaton, ConstructionBudget, LazyDFA, PackFormatError,
+    StreamingSimulation, packed_structure_hash, unpack_structure,
+)
+from .generators import GeneratorParams, generate, save_automata
+from .models import Automaton, DerivedAutomaton, State, Transition, UserHistory, history_buffer, lazy_dfas
+from .parallel import simulate_parallel
+from .symbols import expand_symbols, parse_alphabet, parse_symbol_class, partition_alphabet
 
 
 class AutomatonModelTest(TestCase):
@@ -633,6 +643,1148 @@ class AutomatonAJAXTest(TestCase):
         self.assertIn('path', response_data)
 
 
+
+class CompiledAutomatonTest(TestCase):
+    """Test cases for the compiled transition-table engine."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+
+    def test_symbol_specs_are_cached(self):
+        """Test that parsed symbol specs are shared frozensets."""
+        automaton = Automaton.objects.create(name="Ranges", alphabet="a,b,c", owner=self.user)
+        q0 = automaton.states.create(name="q0", is_start=True)
+        first = automaton.transitions.create(from_state=q0, to_state=q0, symbol="a-c")
+        second = automaton.transitions.create(from_state=q0, to_state=q0, symbol="a-c")
+
+        self.assertEqual(first.get_symbols_as_set(), frozenset({'a', 'b', 'c'}))
+        self.assertIs(first.get_symbols_as_set(), second.get_symbols_as_set())
+        self.assertTrue(first.matches_symbol('b'))
+        self.assertFalse(first.matches_symbol('d'))
+        self.assertEqual(expand_symbols(''), frozenset({'ε'}))
+
+    def create_even_a_dfa(self):
+        """Create a DFA accepting strings with an even number of a's."""
+        dfa = Automaton.objects.create(
+            name="Even A's",
+            alphabet="a,b",
+            owner=self.user
+        )
+        q0 = dfa.states.create(name="q0", is_start=True, is_final=True)
+        q1 = dfa.states.create(name="q1", is_final=False)
+        dfa.transitions.create(from_state=q0, to_state=q1, symbol="a")
+        dfa.transitions.create(from_state=q0, to_state=q0, symbol="b")
+        dfa.transitions.create(from_state=q1, to_state=q0, symbol="a")
+        dfa.transitions.create(from_state=q1, to_state=q1, symbol="b")
+        return dfa
+
+    def test_compile_interns_states_and_symbols(self):
+        """Test that states and symbols are interned to integers."""
+        dfa = self.create_even_a_dfa()
+        compiled = dfa.compile()
+
+        self.assertEqual(compiled.state_names, ['q0', 'q1'])
+        self.assertEqual(compiled.symbols, ['a', 'b'])
+        self.assertEqual(compiled.start_states, [0])
+        self.assertEqual(list(compiled.delta), [1, 0, 0, 1])
+
+    def test_compile_groups_ranges_into_classes(self):
+        """Test that symbols used by the same transitions share one table column."""
+        dfa = Automaton.objects.create(name="Ranges", alphabet="a,b,c,1", owner=self.user)
+        q0 = dfa.states.create(name="q0", is_start=True, is_final=True)
+        q1 = dfa.states.create(name="q1")
+        dfa.transitions.create(from_state=q0, to_state=q1, symbol="a-c")
+        dfa.transitions.create(from_state=q0, to_state=q0, symbol="1")
+        compiled = dfa.compile()
+
+        self.assertEqual(compiled.symbols, ['1', 'a-c'])
+        row = [compiled.delta[s] for s in range(compiled.num_symbols)]
+        self.assertEqual(row, [0, 1])
+        self.assertEqual(compiled.simulate_dfa("1b")[0], False)
+        self.assertEqual(compiled.classify('b'), 1)
+
+    def test_large_alphabet_uses_few_classes(self):
+        """Test that a byte-level alphabet used through ranges compiles to a few classes."""
+        dfa = Automaton.objects.create(name="Identifiers", alphabet="U+0000-U+00FF", owner=self.user)
+        q0 = dfa.states.create(name="q0", is_start=True)
+        q1 = dfa.states.create(name="q1", is_final=True)
+        dead = dfa.states.create(name="dead")
+        dfa.transitions.create(from_state=q0, to_state=q1, symbol="a-z,A-Z,_")
+        dfa.transitions.create(from_state=q0, to_state=dead, symbol="U+0000-U+0040,U+005B-U+005E,U+0060")
+        dfa.transitions.create(from_state=q0, to_state=dead, symbol="U+007B-U+00FF")
+        dfa.transitions.create(from_state=q1, to_state=q1, symbol="a-z,A-Z,0-9,_")
+        dfa.transitions.create(from_state=q1, to_state=dead, symbol="U+0000-U+002F,U+003A-U+0040")
+        dfa.transitions.create(from_state=q1, to_state=dead, symbol="U+005B-U+005E,U+0060,U+007B-U+00FF")
+        dfa.transitions.create(from_state=dead, to_state=dead, symbol="U+0000-U+00FF")
+        dfa.update_json_representation()
+
+        compiled = dfa.compile()
+        self.assertLess(compiled.num_symbols, 10)
+        self.assertEqual(compiled.validate()['dfa_problems'], [])
+        self.assertEqual(dfa.get_type(), 'DFA')
+        self.assertTrue(dfa.simulate("snake_case2", trace=False)[0])
+        self.assertFalse(dfa.simulate("2fast", trace=False)[0])
+        self.assertFalse(dfa.simulate("é", trace=False)[0])
+        self.assertEqual(dfa.simulate("ā", trace=False)[1], "Input symbol 'ā' is not in the alphabet.")
+
+        minimized, _ = dfa.minimize()
+        self.assertEqual(minimized.states.count(), 3)
+        self.assertTrue(all(len(t.symbol) <= 50 for t in minimized.transitions.all()))
+        self.assertTrue(minimized.simulate("x_1", trace=False)[0])
+        self.assertFalse(minimized.simulate("1x", trace=False)[0])
+
+    def test_packed_structure_round_trip(self):
+        """Test that the packed structure compiles to the same tables, loading no rows."""
+        nfa = Automaton.objects.create(name="Packed", alphabet="a,b", owner=self.user, has_epsilon=True)
+        q0 = nfa.states.create(name="q0", is_start=True)
+        q1 = nfa.states.create(name="q1", is_final=True)
+        nfa.transitions.create(from_state=q0, to_state=q0, symbol="a,b")
+        nfa.transitions.create(from_state=q0, to_state=q1, symbol="")
+        nfa.transitions.create(from_state=q1, to_state=q1, symbol="b")
+        nfa.update_json_representation()
+        self.assertIsNotNone(nfa.packed_structure)
+
+        from_rows = CompiledAutomaton.from_automaton(nfa)
+        reloaded = Automaton.objects.get(pk=nfa.pk)
+        # Only the row totals are checked, once per instance
+        with self.assertNumQueries(1):
+            from_blob = reloaded.compile()
+        with self.assertNumQueries(0):
+            reloaded.compile()
+        self.assertEqual(from_blob.state_pks, from_rows.state_pks)
+        self.assertEqual(list(from_blob.transition_pks), list(from_rows.transition_pks))
+        self.assertEqual(from_blob.step_masks, from_rows.step_masks)
+        self.assertEqual(from_blob.simulate_nfa("ab"), from_rows.simulate_nfa("ab"))
+
+        with self.assertRaises(PackFormatError):
+            unpack_structure(b'XXXX' + bytes(nfa.packed_structure)[4:])
+
+    def test_stale_packed_structure_is_rebuilt(self):
+        """Test that a blob packed for another structure hash is replaced from the rows."""
+        dfa = self.create_even_a_dfa()
+        dfa.update_json_representation()
+        Automaton.objects.filter(pk=dfa.pk).update(structure_hash='0' * 64)
+
+        reloaded = Automaton.objects.get(pk=dfa.pk)
+        with self.assertNumQueries(3):
+            compiled = reloaded.compile()
+        self.assertEqual(list(compiled.delta), [1, 0, 0, 1])
+        self.assertEqual(packed_structure_hash(reloaded.packed_structure), '0' * 64)
+
+    def test_symbol_class_specs(self):
+        """Test parsing, canonical specs and splitting of symbol classes."""
+        self.assertEqual(parse_symbol_class("U+0041-U+0043").spec(), "A-C")
+        self.assertEqual(parse_symbol_class("b,a,c,d").spec(), "a-d")
+        self.assertEqual(parse_symbol_class("U+002C, ,x").spec(), "U+002C,x")
+        self.assertIn(',', parse_symbol_class("U+002C"))
+        self.assertTrue(parse_symbol_class("").epsilon)
+        self.assertEqual(expand_symbols("a-Z"), frozenset({'a-Z'}))
+
+        symbols = parse_symbol_class(",".join(chr(c) for c in range(0x4E00, 0x4E40, 2)))
+        chunks = symbols.specs(50)
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(chunk) <= 50 for chunk in chunks))
+        merged = parse_symbol_class(chunks[0])
+        for chunk in chunks[1:]:
+            merged = merged.union(parse_symbol_class(chunk))
+        self.assertEqual(merged, symbols)
+
+    def test_partition_alphabet(self):
+        """Test that the alphabet is split into minterms of the transition classes."""
+        blocks, members = partition_alphabet(
+            parse_alphabet("a-z"), [parse_symbol_class("a-m"), parse_symbol_class("k-z")]
+        )
+        self.assertEqual([block.spec() for block in blocks], ["a-j", "k-m", "n-z"])
+        self.assertEqual(members, [frozenset({0, 1}), frozenset({1, 2})])
+
+    def test_dfa_simulation_runs_without_queries(self):
+        """Test that DFA simulation costs no queries after compilation."""
+        dfa = self.create_even_a_dfa()
+        with self.assertNumQueries(2):
+            compiled = dfa.compile()
+        with self.assertNumQueries(0):
+            accepted, message, path, detailed_path = compiled.simulate_dfa("ab" * 5000)
+
+        self.assertTrue(accepted)
+        self.assertEqual(message, "Simulation completed.")
+        self.assertEqual(len(path), 10001)
+        self.assertEqual(len(detailed_path['transitions']), 10000)
+
+    def test_dfa_simulation_results(self):
+        """Test accept, reject and error results through Automaton.simulate."""
+        dfa = self.create_even_a_dfa()
+
+        accepted, message, path, detailed_path = dfa.simulate("aba")
+        self.assertTrue(accepted)
+        self.assertEqual(path, ['q0', 'q1', 'q1', 'q0'])
+        self.assertEqual(detailed_path['symbols'], ['a', 'b', 'a'])
+        first_step = detailed_path['transitions'][0][0]
+        self.assertEqual(first_step['from_state'], 'q0')
+        self.assertEqual(first_step['to_state'], 'q1')
+        self.assertEqual(
+            first_step['transition_id'],
+            dfa.transitions.get(from_state__name='q0', symbol='a').pk
+        )
+
+        accepted, message, path = dfa.simulate("ac")
+        self.assertFalse(accepted)
+        self.assertIn("not in the alphabet", message)
+        self.assertEqual(path, ['q0', 'q1'])
+
+
+    def create_epsilon_nfa(self):
+        """Create an ε-NFA accepting a*b* via q0 -ε-> q1."""
+        nfa = Automaton.objects.create(
+            name="a*b*",
+            alphabet="a,b",
+            owner=self.user,
+            has_epsilon=True
+        )
+        q0 = nfa.states.create(name="q0", is_start=True, is_final=False)
+        q1 = nfa.states.create(name="q1", is_final=True)
+        nfa.transitions.create(from_state=q0, to_state=q0, symbol="a")
+        nfa.transitions.create(from_state=q0, to_state=q1, symbol="ε")
+        nfa.transitions.create(from_state=q1, to_state=q1, symbol="b")
+        return nfa
+
+    def test_nfa_epsilon_closures_are_precomputed(self):
+        """Test that ε-closures and successor masks are stored as bitmasks."""
+        compiled = self.create_epsilon_nfa().compile()
+
+        self.assertEqual(compiled.closures, [0b11, 0b10])
+        self.assertEqual(compiled.start_mask(), 0b11)
+        self.assertEqual(compiled.step(0b11, compiled.symbol_index['a']), 0b11)
+        self.assertEqual(compiled.step(0b11, compiled.symbol_index['b']), 0b10)
+
+    def test_nfa_simulation_results(self):
+        """Test NFA acceptance, rejection and stuck runs."""
+        nfa = self.create_epsilon_nfa()
+        compiled = nfa.compile()
+
+        accepted, message, path, detailed_path = compiled.simulate_nfa("aab")
+        self.assertTrue(accepted)
+        self.assertEqual(message, "String accepted.")
+        self.assertEqual(path, [['q0', 'q1'], ['q0', 'q1'], ['q0', 'q1'], ['q1']])
+        self.assertEqual(
+            [t['from_state'] for t in detailed_path['transitions'][2]],
+            ['q1']
+        )
+
+        accepted, message, path = compiled.simulate_nfa("ba")
+        self.assertFalse(accepted)
+        self.assertEqual(message, "Simulation stuck. No transition found.")
+
+        accepted, message, path, detailed_path = compiled.simulate_nfa("")
+        self.assertTrue(accepted)
+
+    def test_nfa_long_input_without_trace(self):
+        """Test that untraced NFA simulation handles long inputs without queries."""
+        compiled = self.create_epsilon_nfa().compile()
+        with self.assertNumQueries(0):
+            accepted, message, path, detailed_path = compiled.simulate_nfa(
+                "a" * 500000 + "b" * 500000, trace=False
+            )
+        self.assertTrue(accepted)
+        self.assertEqual(path, [])
+
+
+
+class HopcroftMinimizationTest(TestCase):
+    """Test cases for Hopcroft-based DFA minimization."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+
+    def create_minimizable_dfa(self):
+        """Create a DFA where q1 and q2 are equivalent."""
+        dfa = Automaton.objects.create(
+            name="Minimizable DFA",
+            alphabet="a,b",
+            owner=self.user
+        )
+        q0 = dfa.states.create(name="q0", is_start=True, is_final=False)
+        q1 = dfa.states.create(name="q1", is_final=True)
+        q2 = dfa.states.create(name="q2", is_final=True)
+        dfa.transitions.create(from_state=q0, to_state=q1, symbol="a")
+        dfa.transitions.create(from_state=q0, to_state=q2, symbol="b")
+        dfa.transitions.create(from_state=q1, to_state=q1, symbol="a,b")
+        dfa.transitions.create(from_state=q2, to_state=q2, symbol="a,b")
+        return dfa
+
+    def test_minimize_merges_equivalent_states(self):
+        """Test that equivalent states are merged and steps are reported."""
+        dfa = self.create_minimizable_dfa()
+        minimized, detailed_steps = dfa.minimize()
+
+        self.assertNotEqual(minimized.pk, dfa.pk)
+        self.assertEqual(minimized.name, "Minimizable DFA_minimized")
+        self.assertEqual(minimized.states.count(), 2)
+        self.assertEqual(minimized.transitions.count(), 4)
+        self.assertEqual(detailed_steps['original_state_count'], 3)
+        self.assertEqual(detailed_steps['minimized_state_count'], 2)
+        self.assertEqual(detailed_steps['reduction_percentage'], 33.3)
+        self.assertEqual(detailed_steps['steps'][0]['partition'], [['q1', 'q2'], ['q0']])
+        self.assertEqual(
+            sorted(c['original_states'] for c in detailed_steps['equivalence_classes']),
+            [['q0'], ['q1', 'q2']]
+        )
+
+        for test_string in ["", "a", "b", "ab", "ba"]:
+            self.assertEqual(dfa.simulate(test_string)[0], minimized.simulate(test_string)[0])
+
+    def test_minimize_already_minimal(self):
+        """Test that a minimal DFA is returned unchanged."""
+        dfa = Automaton.objects.create(name="Even A's", alphabet="a", owner=self.user)
+        q0 = dfa.states.create(name="q0", is_start=True, is_final=True)
+        q1 = dfa.states.create(name="q1")
+        dfa.transitions.create(from_state=q0, to_state=q1, symbol="a")
+        dfa.transitions.create(from_state=q1, to_state=q0, symbol="a")
+
+        result, detailed_steps = dfa.minimize()
+        self.assertEqual(result, dfa)
+        self.assertEqual(detailed_steps['message'], "Already minimal - no equivalent states found")
+
+    def test_minimize_large_dfa(self):
+        """Test that a large DFA minimizes with a bounded number of queries."""
+        dfa = Automaton.objects.create(name="Mod 4 chain", alphabet="a,b", owner=self.user)
+        n = 2000
+        states = State.objects.bulk_create([
+            State(automaton=dfa, name=f"q{i}", is_start=(i == 0), is_final=(i % 4 == 0))
+            for i in range(n)
+        ])
+        Transition.objects.bulk_create(
+            [Transition(automaton=dfa, from_state=states[i], to_state=states[(i + 1) % n], symbol="a") for i in range(n)]
+            + [Transition(automaton=dfa, from_state=states[i], to_state=states[i], symbol="b") for i in range(n)]
+        )
+        dfa.update_json_representation()
+        dfa.cached_type = 'DFA'
+
+        # Includes replacing the stored steps (one DELETE, one INSERT)
+        with self.assertNumQueries(12):
+            minimized, detailed_steps = dfa.minimize()
+
+        self.assertEqual(detailed_steps['minimized_state_count'], 4)
+        self.assertTrue(minimized.simulate("aaaa")[0])
+        self.assertFalse(minimized.simulate("aab")[0])
+
+
+
+class SubsetConstructionTest(TestCase):
+    """Test cases for the bitset subset construction."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+
+    def create_nth_from_end_nfa(self, n):
+        """Create the NFA accepting strings whose n-th symbol from the end is 'a'."""
+        nfa = Automaton.objects.create(
+            name=f"{n}th from end",
+            alphabet="a,b",
+            owner=self.user
+        )
+        states = [
+            nfa.states.create(name=f"q{i}", is_start=(i == 0), is_final=(i == n))
+            for i in range(n + 1)
+        ]
+        nfa.transitions.create(from_state=states[0], to_state=states[0], symbol="a,b")
+        nfa.transitions.create(from_state=states[0], to_state=states[1], symbol="a")
+        for i in range(1, n):
+            nfa.transitions.create(from_state=states[i], to_state=states[i + 1], symbol="a,b")
+        return nfa
+
+    def test_subset_construction_masks(self):
+        """Test that subsets are discovered as bitmasks in BFS order."""
+        compiled = self.create_nth_from_end_nfa(2).compile()
+        subsets, transitions = compiled.subset_construction()
+
+        self.assertEqual(subsets[0], 0b001)
+        self.assertEqual(len(subsets), 4)
+        self.assertEqual(len(transitions), 8)
+
+    def test_progress_reports(self):
+        """Test that the subset construction reports the subsets it discovered."""
+        compiled = self.create_nth_from_end_nfa(11).compile()
+        compiled.PROGRESS_INTERVAL = 1000
+        reports = []
+        subsets, _ = compiled.subset_construction(progress=reports.append)
+
+        self.assertEqual(len(subsets), 2048)
+        self.assertEqual(reports, [1000, 2000, 2048])
+
+    def test_budget_aborts_without_rows(self):
+        """Test that an oversized construction stops early and writes nothing."""
+        nfa = self.create_nth_from_end_nfa(12)
+        automaton_count = Automaton.objects.count()
+
+        with self.assertRaises(BudgetExceeded) as raised:
+            nfa.to_dfa(budget=ConstructionBudget(max_states=100))
+
+        progress = raised.exception.as_dict()
+        self.assertEqual(progress['limit'], 'max_states')
+        self.assertGreater(progress['subsets_discovered'], 100)
+        self.assertLess(progress['subsets_discovered'], 200)
+        self.assertEqual(Automaton.objects.count(), automaton_count)
+        self.assertFalse(DerivedAutomaton.objects.exists())
+
+    def test_budget_limits(self):
+        """Test the transition and time limits of the construction."""
+        compiled = self.create_nth_from_end_nfa(8).compile()
+        with self.assertRaises(BudgetExceeded) as raised:
+            compiled.subset_construction(budget=ConstructionBudget(max_transitions=50))
+        self.assertEqual(raised.exception.limit, 'max_transitions')
+
+        with self.assertRaises(BudgetExceeded) as raised:
+            compiled.subset_construction(budget=ConstructionBudget(max_seconds=-1))
+        self.assertEqual(raised.exception.limit, 'max_seconds')
+
+        subsets, _ = compiled.subset_construction(budget=ConstructionBudget(max_states=256))
+        self.assertEqual(len(subsets), 256)
+
+    def test_to_dfa_bulk_persistence(self):
+        """Test that the DFA is written with a bounded number of queries."""
+        nfa = self.create_nth_from_end_nfa(6)
+        nfa.update_json_representation()
+        nfa.cached_type = 'NFA'
+
+        # Includes replacing the stored steps (one DELETE, one INSERT)
+        with self.assertNumQueries(12):
+            dfa, detailed_steps = nfa.to_dfa()
+
+        self.assertEqual(detailed_steps['dfa_state_count'], 64)
+        self.assertEqual(dfa.states.count(), 64)
+        self.assertEqual(dfa.transitions.count(), 128)
+        self.assertEqual(len(detailed_steps['state_mapping']), 64)
+        self.assertEqual(len(detailed_steps['steps'][3]['transitions']), 128)
+        self.assertEqual(detailed_steps['steps'][1]['epsilon_closure'], ['q0'])
+        self.assertEqual(
+            detailed_steps['steps'][3]['transitions'][0]['nfa_computation'],
+            "δ(['q0'], a) = ε-closure(['q0', 'q1'])"
+        )
+
+        for test_string in ["aaaaaa", "abbbbb", "bbbbbb", "baaaaaa", "aab"]:
+            self.assertEqual(nfa.simulate(test_string)[0], dfa.simulate(test_string)[0])
+
+    def test_to_dfa_with_epsilon_transitions(self):
+        """Test that ε-closures are folded into the DFA states."""
+        nfa = Automaton.objects.create(name="a*b*", alphabet="a,b", owner=self.user, has_epsilon=True)
+        q0 = nfa.states.create(name="q0", is_start=True)
+        q1 = nfa.states.create(name="q1", is_final=True)
+        nfa.transitions.create(from_state=q0, to_state=q0, symbol="a")
+        nfa.transitions.create(from_state=q0, to_state=q1, symbol="ε")
+        nfa.transitions.create(from_state=q1, to_state=q1, symbol="b")
+
+        dfa, detailed_steps = nfa.to_dfa()
+
+        self.assertEqual(detailed_steps['state_mapping'][0]['nfa_states'], ['q0', 'q1'])
+        self.assertTrue(detailed_steps['state_mapping'][0]['is_final'])
+        for test_string in ["", "aab", "abb", "ba"]:
+            self.assertEqual(nfa.simulate(test_string)[0], dfa.simulate(test_string)[0])
+
+
+
+class ValidationReportTest(TestCase):
+    """Test cases for single-pass DFA/NFA validation."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.automaton = Automaton.objects.create(name="Partial", alphabet="a,b", owner=self.user)
+        self.q0 = self.automaton.states.create(name="q0", is_start=True)
+        self.q1 = self.automaton.states.create(name="q1", is_final=True)
+
+    def test_reports_all_problems(self):
+        """Test that every determinism and completeness violation is listed."""
+        self.automaton.transitions.create(from_state=self.q0, to_state=self.q1, symbol="a")
+        self.automaton.transitions.create(from_state=self.q0, to_state=self.q0, symbol="a,b")
+        self.automaton.transitions.create(from_state=self.q1, to_state=self.q0, symbol="ε")
+
+        with self.assertNumQueries(2):
+            report = self.automaton.validate()
+
+        self.assertEqual(report['nfa_problems'], [])
+        self.assertEqual(
+            [(p['code'], p.get('state'), p.get('symbol')) for p in report['dfa_problems']],
+            [
+                ('epsilon_transition', 'q1', None),
+                ('nondeterministic', 'q0', 'a'),
+                ('missing_transition', 'q1', 'a'),
+                ('missing_transition', 'q1', 'b'),
+            ]
+        )
+        self.assertEqual(self.automaton.is_dfa(), (False, "DFA cannot have epsilon transitions"))
+        self.assertEqual(self.automaton.is_nfa(), (True, "Valid NFA"))
+        self.assertEqual(self.automaton.get_type(), 'NFA')
+
+    def test_missing_start_and_final(self):
+        """Test that structural problems invalidate both DFA and NFA."""
+        self.automaton.states.update(is_start=False, is_final=False)
+        report = self.automaton.validate()
+
+        self.assertEqual(
+            [p['code'] for p in report['nfa_problems']],
+            ['no_start_state', 'no_final_state']
+        )
+        self.assertEqual(self.automaton.is_dfa(report), (False, "No start state defined"))
+        self.assertEqual(self.automaton.get_type(), 'INVALID')
+
+    def test_valid_dfa(self):
+        """Test that a complete deterministic automaton has no problems."""
+        self.automaton.transitions.create(from_state=self.q0, to_state=self.q1, symbol="a-b")
+        self.automaton.transitions.create(from_state=self.q1, to_state=self.q1, symbol="a,b")
+
+        self.assertEqual(self.automaton.is_dfa(), (True, "Valid DFA"))
+        self.assertEqual(self.automaton.get_type(), 'DFA')
+
+
+class StructureHashCacheTest(TestCase):
+    """Test cases for structure hashes and cached minimize/to_dfa results."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+
+    def create_redundant_dfa(self, name="Redundant"):
+        """Create a DFA for 'ends in a' with two equivalent non-final states."""
+        dfa = Automaton.objects.create(name=name, alphabet="a,b", owner=self.user)
+        q0 = dfa.states.create(name="q0", is_start=True)
+        q1 = dfa.states.create(name="q1")
+        q2 = dfa.states.create(name="q2", is_final=True)
+        dfa.transitions.create(from_state=q0, to_state=q2, symbol="a")
+        dfa.transitions.create(from_state=q0, to_state=q1, symbol="b")
+        dfa.transitions.create(from_state=q1, to_state=q2, symbol="a")
+        dfa.transitions.create(from_state=q1, to_state=q1, symbol="b")
+        dfa.transitions.create(from_state=q2, to_state=q2, symbol="a")
+        dfa.transitions.create(from_state=q2, to_state=q1, symbol="b")
+        dfa.update_json_representation()
+        return dfa
+
+    def test_hash_ignores_pks_and_symbol_grouping(self):
+        """Test that the hash depends on structure only."""
+        first = self.create_redundant_dfa("First")
+        second = Automaton.objects.create(name="Second", alphabet="b,a", owner=self.user)
+        q2 = second.states.create(name="q2", is_final=True)
+        q1 = second.states.create(name="q1")
+        q0 = second.states.create(name="q0", is_start=True)
+        second.transitions.create(from_state=q2, to_state=q2, symbol="a")
+        second.transitions.create(from_state=q2, to_state=q1, symbol="b")
+        second.transitions.create(from_state=q1, to_state=q2, symbol="a")
+        second.transitions.create(from_state=q1, to_state=q1, symbol="b")
+        second.transitions.create(from_state=q0, to_state=q2, symbol="a")
+        second.transitions.create(from_state=q0, to_state=q1, symbol="b")
+        second.update_json_representation()
+
+        self.assertEqual(len(first.structure_hash), 64)
+        self.assertEqual(first.structure_hash, second.structure_hash)
+
+        second.transitions.filter(from_state=q1).delete()
+        second.transitions.create(from_state=q1, to_state=q1, symbol="a,b")
+        second.update_json_representation()
+        self.assertNotEqual(first.structure_hash, second.structure_hash)
+
+    def test_hash_follows_json_deltas(self):
+        """Test that incremental edits keep the stored hash current."""
+        dfa = self.create_redundant_dfa()
+        before = dfa.structure_hash
+        dfa.apply_json_delta(updated_nodes=[{'id': 'q1', 'is_final': True}])
+        self.assertNotEqual(dfa.structure_hash, before)
+
+        dfa.apply_json_delta(updated_nodes=[{'id': 'q1', 'is_final': False}])
+        self.assertEqual(dfa.structure_hash, before)
+
+    def test_row_edit_after_cached_minimize(self):
+        """Test that editing rows directly is not answered from the cache of the old structure."""
+        dfa = self.create_redundant_dfa()
+        first, _ = dfa.minimize()
+        self.assertEqual(first.states.count(), 2)
+
+        q1 = dfa.states.get(name="q1")
+        q1.is_final = True
+        q1.save()
+        reloaded = Automaton.objects.get(pk=dfa.pk)
+        second, steps = reloaded.minimize()
+        self.assertFalse(steps.get('cached', False))
+        self.assertNotEqual(second.pk, first.pk)
+        self.assertTrue(second.simulate("b")[0])
+
+    def test_minimize_reuses_result(self):
+        """Test that minimizing an identical DFA returns the existing result."""
+        first, steps = self.create_redundant_dfa("First").minimize()
+        self.assertNotIn('cached', steps)
+
+        second = self.create_redundant_dfa("Second")
+        second.get_type()
+        # The lookup, and refreshing the expiry of the stored steps
+        with self.assertNumQueries(2):
+            cached, cached_steps = second.minimize()
+
+        self.assertEqual(cached.pk, first.pk)
+        self.assertTrue(cached_steps['cached'])
+        self.assertEqual(cached_steps['minimized_state_count'], steps['minimized_state_count'])
+        self.assertEqual(Automaton.objects.filter(name__endswith='_minimized').count(), 1)
+
+    def test_minimal_dfa_is_its_own_cached_result(self):
+        """Test that a cached 'already minimal' result points at the caller."""
+        first = Automaton.objects.create(name="Minimal", alphabet="a", owner=self.user)
+        q0 = first.states.create(name="q0", is_start=True)
+        q1 = first.states.create(name="q1", is_final=True)
+        first.transitions.create(from_state=q0, to_state=q1, symbol="a")
+        first.transitions.create(from_state=q1, to_state=q0, symbol="a")
+        first.update_json_representation()
+        self.assertEqual(first.minimize()[0], first)
+
+        second = Automaton.objects.create(name="Minimal copy", alphabet="a", owner=self.user)
+        q0 = second.states.create(name="q0", is_start=True)
+        q1 = second.states.create(name="q1", is_final=True)
+        second.transitions.create(from_state=q0, to_state=q1, symbol="a")
+        second.transitions.create(from_state=q1, to_state=q0, symbol="a")
+        second.update_json_representation()
+        self.assertEqual(second.minimize()[0], second)
+
+    def test_edited_result_is_recomputed(self):
+        """Test that a cached result edited by its owner is not reused."""
+        first, _ = self.create_redundant_dfa("First").minimize()
+        first.states.update(is_final=True)
+        first.update_json_representation()
+
+        second, steps = self.create_redundant_dfa("Second").minimize()
+        self.assertNotEqual(second.pk, first.pk)
+        self.assertNotIn('cached', steps)
+
+    def test_to_dfa_reuses_result(self):
+        """Test that converting an identical NFA returns the existing DFA."""
+        def create_nfa(name):
+            nfa = Automaton.objects.create(name=name, alphabet="a,b", owner=self.user)
+            q0 = nfa.states.create(name="q0", is_start=True)
+            q1 = nfa.states.create(name="q1", is_final=True)
+            nfa.transitions.create(from_state=q0, to_state=q0, symbol="a,b")
+            nfa.transitions.create(from_state=q0, to_state=q1, symbol="a")
+            nfa.update_json_representation()
+            return nfa
+
+        first, _ = create_nfa("First").to_dfa()
+        second, steps = create_nfa("Second").to_dfa()
+
+        self.assertEqual(second.pk, first.pk)
+        self.assertTrue(steps['cached'])
+        self.assertEqual(Automaton.objects.filter(name__endswith='_DFA').count(), 1)
+
+
+
+class StructureInvalidationTest(TestCase):
+    """Test cases for keeping the stored structure in sync with row writes."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.dfa = Automaton.objects.create(name="Only a", alphabet="a,b", owner=self.user)
+        self.q0 = self.dfa.states.create(name="q0", is_start=True)
+        self.q1 = self.dfa.states.create(name="q1", is_final=True)
+        self.dfa.transitions.create(from_state=self.q0, to_state=self.q1, symbol="a")
+        self.dfa.update_json_representation()
+        self.dfa.compile()
+
+    def test_helpers_refresh_structure(self):
+        """Test that the transition helpers update the JSON, hash and packed structure."""
+        before = self.dfa.structure_hash
+        self.dfa.add_transition(self.q0, self.q1, 'b')
+        self.assertNotEqual(self.dfa.structure_hash, before)
+        self.assertTrue(self.dfa.simulate('b')[0])
+
+        reloaded = Automaton.objects.get(pk=self.dfa.pk)
+        self.assertEqual(reloaded.structure_hash, self.dfa.structure_hash)
+        self.assertTrue(reloaded.simulate('b')[0])
+        self.assertEqual(len(reloaded.json_representation['edges']), 2)
+
+        reloaded.remove_transition(self.q0, self.q1, 'b')
+        reloaded = Automaton.objects.get(pk=self.dfa.pk)
+        self.assertEqual(reloaded.structure_hash, before)
+        self.assertIn("No transition found", reloaded.simulate('b')[1])
+
+    def test_orm_writes_invalidate_structure(self):
+        """Test that rows written directly are picked up on next use."""
+        Transition.objects.create(automaton=self.dfa, from_state=self.q1, to_state=self.q1, symbol="a,b")
+        reloaded = Automaton.objects.get(pk=self.dfa.pk)
+        self.assertEqual(reloaded.structure_hash, '')
+        self.assertIsNone(reloaded.packed_structure)
+        self.assertTrue(reloaded.simulate('aab')[0])
+        self.assertEqual(len(reloaded.get_structure_hash()), 64)
+        self.assertEqual(len(reloaded.json_representation['edges']), 2)
+
+        State.objects.filter(pk=self.q1.pk).delete()
+        reloaded = Automaton.objects.get(pk=self.dfa.pk)
+        self.assertFalse(reloaded.is_dfa()[0])
+        self.assertEqual(reloaded.compile().state_names, ['q0'])
+
+    def test_stale_packed_structure_is_rebuilt(self):
+        """Test that a packed structure that no longer matches the rows is not trusted."""
+        nfa = Automaton.objects.create(name="Loop", alphabet="a", owner=self.user)
+        q0 = nfa.states.create(name="q0", is_start=True)
+        loop = nfa.transitions.create(from_state=q0, to_state=q0, symbol="a")
+        nfa.update_json_representation()
+        nfa.compile()
+        stale = Automaton.objects.filter(pk=nfa.pk).values(
+            'json_representation', 'structure_hash', 'packed_structure'
+        ).get()
+
+        # Rows changed behind the stored JSON, e.g. by a lost editor update
+        loop.delete()
+        q1 = nfa.states.create(name="q1", is_final=True)
+        nfa.transitions.create(from_state=q0, to_state=q1, symbol="a")
+        Automaton.objects.filter(pk=nfa.pk).update(cached_type='', **stale)
+
+        reloaded = Automaton.objects.get(pk=nfa.pk)
+        self.assertEqual(reloaded.get_type(), 'NFA')
+        self.assertTrue(reloaded.simulate('a')[0])
+        self.assertEqual(len(reloaded.json_representation['nodes']), 2)
+        self.assertNotEqual(reloaded.structure_hash, stale['structure_hash'])
+
+        # Once rebuilt, the packed structure is used again with one check query
+        reloaded = Automaton.objects.get(pk=nfa.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(reloaded.compile().state_names, ['q0', 'q1'])
+
+    def test_deleting_automaton_skips_invalidation(self):
+        """Test that cascading deletes do not update the automaton being deleted."""
+        with CaptureQueriesContext(connection) as queries:
+            self.dfa.delete()
+        self.assertFalse([q for q in queries.captured_queries if q['sql'].startswith('UPDATE "core_automaton"')])
+
+
+class LazyDFATest(TestCase):
+    """Test cases for lazily determinized NFA simulation."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        lazy_dfas.clear()
+        self.addCleanup(lazy_dfas.clear)
+
+    def create_nfa(self, name="Ends in ab"):
+        """Create an NFA accepting strings over {a, b} ending in 'ab'."""
+        nfa = Automaton.objects.create(name=name, alphabet="a,b", owner=self.user)
+        q0 = nfa.states.create(name="q0", is_start=True)
+        q1 = nfa.states.create(name="q1")
+        q2 = nfa.states.create(name="q2", is_final=True)
+        nfa.transitions.create(from_state=q0, to_state=q0, symbol="a,b")
+        nfa.transitions.create(from_state=q0, to_state=q1, symbol="a")
+        nfa.transitions.create(from_state=q1, to_state=q2, symbol="b")
+        nfa.update_json_representation()
+        return nfa
+
+    def test_matches_eager_simulation(self):
+        """Test that lazy runs return the same results as simulate_nfa."""
+        compiled = self.create_nfa().compile()
+        lazy = LazyDFA(compiled)
+        for test_string in ["", "ab", "aab", "ba", "abab", "abba", "ac"]:
+            self.assertEqual(
+                lazy.simulate(test_string),
+                compiled.simulate_nfa(test_string),
+                test_string
+            )
+
+    def test_caches_discovered_transitions(self):
+        """Test that each subset transition is computed once."""
+        lazy = LazyDFA(self.create_nfa().compile())
+        lazy.simulate("abab" * 100, trace=False)
+        # Subsets {q0}, {q0, q1} and {q0, q2} on a and b
+        self.assertEqual(lazy.misses, len(lazy))
+        self.assertLessEqual(len(lazy), 6)
+
+        misses = lazy.misses
+        self.assertTrue(lazy.simulate("ab" * 7, trace=False)[0])
+        self.assertEqual(lazy.misses, misses)
+        self.assertGreater(lazy.hits, 0)
+
+    def test_lru_is_bounded(self):
+        """Test that the least recently used transitions are evicted."""
+        lazy = LazyDFA(self.create_nfa().compile(), max_transitions=2)
+        accepted = lazy.simulate("aabab", trace=False)[0]
+        self.assertTrue(accepted)
+        self.assertEqual(len(lazy), 2)
+
+    def test_shared_across_calls(self):
+        """Test that simulate_many reuses the lazy DFA of the same automaton version."""
+        nfa = self.create_nfa()
+        nfa.simulate_many(["ab", "aab"])
+
+        reloaded = Automaton.objects.get(pk=nfa.pk)
+        with self.assertNumQueries(0):
+            results = reloaded.simulate_many(["ab", "aab", "ba"])
+        self.assertEqual([r['accepted'] for r in results], [True, True, False])
+        self.assertIs(reloaded.lazy_dfa(), nfa.lazy_dfa())
+
+    def test_row_edit_drops_shared_lazy_dfa(self):
+        """Test that row writes outside the editor are not answered by the old LazyDFA."""
+        nfa = self.create_nfa()
+        self.assertFalse(nfa.simulate("aba", trace=False)[0])
+        self.assertEqual(len(lazy_dfas), 1)
+
+        q1 = nfa.states.get(name="q1")
+        q1.is_final = True
+        q1.save()
+        self.assertEqual(len(lazy_dfas), 0)
+        self.assertTrue(Automaton.objects.get(pk=nfa.pk).simulate("aba", trace=False)[0])
+
+    def test_edit_starts_fresh_cache(self):
+        """Test that changing the structure does not reuse stale transitions."""
+        nfa = self.create_nfa()
+        self.assertFalse(nfa.simulate("aba", trace=False)[0])
+
+        nfa.states.filter(name="q1").update(is_final=True)
+        nfa.update_json_representation()
+        self.assertTrue(nfa.simulate("aba", trace=False)[0])
+        # The LazyDFA of the previous version is dropped
+        self.assertEqual(len(lazy_dfas), 1)
+
+
+class StreamingSimulationTest(TestCase):
+    """Test cases for simulating inputs fed in chunks."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.dfa = Automaton.objects.create(name="Even A's", alphabet="a,b", owner=self.user)
+        q0 = self.dfa.states.create(name="q0", is_start=True, is_final=True)
+        q1 = self.dfa.states.create(name="q1")
+        self.dfa.transitions.create(from_state=q0, to_state=q1, symbol="a")
+        self.dfa.transitions.create(from_state=q0, to_state=q0, symbol="b")
+        self.dfa.transitions.create(from_state=q1, to_state=q0, symbol="a")
+        self.dfa.transitions.create(from_state=q1, to_state=q1, symbol="b")
+        self.dfa.update_json_representation()
+
+    def feed(self, simulation, text, size):
+        for i in range(0, len(text), size):
+            simulation.feed(text[i:i + size])
+        return simulation.result()
+
+    def test_matches_dfa_simulation(self):
+        """Test that the verdict does not depend on how the input is split."""
+        compiled = self.dfa.compile()
+        for test_string in ["", "a", "aa", "abba", "bab", "abca"]:
+            expected = compiled.simulate_dfa(test_string, trace=False)
+            for size in (1, 2, 5):
+                result = self.feed(StreamingSimulation(compiled), test_string, size)
+                self.assertEqual((result['accepted'], result['message']), expected[:2], (test_string, size))
+        self.assertEqual(self.feed(StreamingSimulation(compiled), "abca", 2)['length'], 2)
+
+    def test_matches_lazy_dfa(self):
+        """Test that NFAs are run through their lazy DFA."""
+        nfa = Automaton.objects.create(name="Ends in ab", alphabet="a,b", owner=self.user)
+        q0 = nfa.states.create(name="q0", is_start=True)
+        q1 = nfa.states.create(name="q1")
+        q2 = nfa.states.create(name="q2", is_final=True)
+        nfa.transitions.create(from_state=q0, to_state=q0, symbol="a,b")
+        nfa.transitions.create(from_state=q0, to_state=q1, symbol="a")
+        nfa.transitions.create(from_state=q1, to_state=q2, symbol="b")
+        nfa.update_json_representation()
+
+        lazy = LazyDFA(nfa.compile())
+        for test_string in ["", "ab", "abab", "abba", "ac"]:
+            result = self.feed(StreamingSimulation(lazy.compiled, lazy), test_string, 3)
+            self.assertEqual((result['accepted'], result['message']), lazy.simulate(test_string)[:2])
+        self.assertEqual(nfa.streaming_simulation().result()['state'], ['q0'])
+
+    def test_checkpoints(self):
+        """Test that the state is sampled at the requested interval."""
+        simulation = self.dfa.streaming_simulation(checkpoint_every=2)
+        result = self.feed(simulation, "abaab", 2)
+        self.assertEqual(result['checkpoints'], [
+            {'position': 0, 'state': 'q0'},
+            {'position': 2, 'state': 'q1'},
+            {'position': 4, 'state': 'q1'},
+        ])
+        self.assertEqual(result['checkpoint_every'], 2)
+
+    def test_checkpoints_are_bounded(self):
+        """Test that the interval doubles instead of keeping every checkpoint."""
+        simulation = self.dfa.streaming_simulation(checkpoint_every=1)
+        simulation.MAX_CHECKPOINTS = 8
+        result = self.feed(simulation, "b" * 100, 7)
+        self.assertLessEqual(len(result['checkpoints']), 9)
+        self.assertEqual(result['checkpoint_every'], 16)
+        self.assertTrue(all(c['position'] % 16 == 0 for c in result['checkpoints']))
+
+    def test_run_length_path(self):
+        """Test that self-loops collapse into runs across chunk boundaries."""
+        simulation = self.dfa.streaming_simulation(run_length=True)
+        result = self.feed(simulation, "bbbabbba", 3)
+        self.assertEqual(result['runs'], [['q0', 4], ['q1', 4], ['q0', 1]])
+        self.assertFalse(result['runs_truncated'])
+        self.assertNotIn('checkpoints', result)
+
+        simulation = self.dfa.streaming_simulation(run_length=True)
+        simulation.MAX_RUNS = 2
+        result = self.feed(simulation, "aaaa", 1)
+        self.assertEqual(result['runs'], [['q0', 1], ['q1', 1]])
+        self.assertTrue(result['runs_truncated'])
+        self.assertTrue(result['accepted'])
+
+
+class CompactTraceTest(TestCase):
+    """Test cases for interned, run-length encoded simulation traces."""
+
+    def build(self, steps):
+        trace = CompactTrace()
+        for step in steps:
+            trace.add(step)
+        trace.close()
+        return trace
+
+    def expand(self, runs):
+        return [step for block, count in runs for _ in range(count) for step in block]
+
+    def test_collapses_loops_and_cycles(self):
+        """Test that self-loops and cycles become single runs."""
+        steps = [0] * 1000 + [1, 2, 3] * 500 + [4, 5, 6]
+        trace = self.build(steps)
+        self.assertEqual(trace.runs, [[[0], 1000], [[1, 2, 3], 500], [[4, 5, 6], 1]])
+        self.assertEqual(trace.length, len(steps))
+
+    def test_short_repeats_stay_literal(self):
+        """Test that repetitions below MIN_RUN_STEPS are not split into runs."""
+        steps = [0, 1, 1, 2, 0, 2, 0, 3]
+        self.assertEqual(self.build(steps).runs, [[steps, 1]])
+
+    def test_roundtrip_and_windows(self):
+        """Test that any window expands to the same steps as the input."""
+        rng = random.Random(4)
+        steps = []
+        for _ in range(200):
+            block = [rng.randrange(4) for _ in range(rng.randrange(1, 4))]
+            steps.extend(block * rng.randrange(1, 12))
+        trace = CompactTrace.from_data(json.loads(json.dumps(self.build(steps).to_data())))
+        self.assertEqual(self.expand(trace.runs), steps)
+        for offset in range(0, len(steps) + 5, 37):
+            for limit in (1, 5, 64, 1000):
+                self.assertEqual(self.expand(trace.window(offset, limit)), steps[offset:offset + limit])
+
+    def test_streaming_simulation_trace(self):
+        """Test that a traced run interns its states and transitions."""
+        user = User.objects.create_user(username='testuser', password='testpass123')
+        dfa = Automaton.objects.create(name="Even A's", alphabet="a,b", owner=user)
+        q0 = dfa.states.create(name="q0", is_start=True, is_final=True)
+        q1 = dfa.states.create(name="q1")
+        t0 = dfa.transitions.create(from_state=q0, to_state=q1, symbol="a")
+        dfa.transitions.create(from_state=q0, to_state=q0, symbol="b")
+        t2 = dfa.transitions.create(from_state=q1, to_state=q0, symbol="a")
+        dfa.transitions.create(from_state=q1, to_state=q1, symbol="b")
+        dfa.update_json_representation()
+
+        simulation = dfa.streaming_simulation(trace=True)
+        simulation.feed("b" * 5000 + "aa" * 10)
+        trace = simulation.trace
+        trace.close()
+        self.assertEqual(trace.length, 5020)
+        self.assertEqual(trace.states, ['q0', 'q1'])
+        self.assertEqual(trace.transitions[1:], [[0, 1, 'a', [t0.pk]], [1, 0, 'a', [t2.pk]]])
+        self.assertEqual(trace.runs, [[[0], 5000], [[1, 2], 10]])
+
+
+@override_settings(CORE_PARALLEL_MIN_STRINGS=1)
+class ParallelSimulationTest(TestCase):
+    """Test cases for batch simulation over worker processes."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        rng = random.Random(7)
+        self.strings = [''.join(rng.choice('ab') for _ in range(rng.randrange(12))) for _ in range(200)]
+        self.strings.append('abc')
+
+    def create(self, family):
+        generated = generate(family, 16, random.Random(3))
+        return save_automata([generated], [self.user])[0]
+
+    def test_matches_serial_results(self):
+        """Test that DFAs and NFAs give the same results in the same order."""
+        for family in ('random_dfa', 'nth_from_end'):
+            automaton = self.create(family)
+            serial = automaton.simulate_many(self.strings, include_paths=True, workers=1)
+            self.assertEqual(automaton.simulate_many(self.strings, include_paths=True, workers=2), serial)
+            self.assertIn("not in the alphabet", serial[-1]['message'])
+
+    def test_small_chunks_keep_order(self):
+        """Test that results of many chunks are returned in input order."""
+        automaton = self.create('random_dfa')
+        compiled = automaton.compile()
+        results = simulate_parallel(compiled.pack(), automaton.alphabet, False, self.strings, workers=2, chunk_size=7)
+        self.assertEqual([result['string'] for result in results], self.strings)
+        self.assertEqual(
+            [result['accepted'] for result in results],
+            [compiled.simulate_dfa(string, trace=False)[0] for string in self.strings]
+        )
+
+    def test_packed_batch_does_not_compile(self):
+        """Test that a batch sent to the workers is not compiled in this process as well."""
+        created = self.create('random_dfa')
+        self.assertEqual(created.get_type(), 'DFA')
+        automaton = Automaton.objects.get(pk=created.pk)
+        with patch('core.models.simulate_parallel', return_value=[]) as simulate, \
+                patch.object(CompiledAutomaton, 'from_packed') as from_packed, \
+                patch.object(CompiledAutomaton, 'from_automaton') as from_automaton:
+            automaton.simulate_many(self.strings, workers=2)
+        from_packed.assert_not_called()
+        from_automaton.assert_not_called()
+        self.assertEqual(simulate.call_args.args[0], bytes(automaton.packed_structure))
+
+    @override_settings(CORE_PARALLEL_MIN_STRINGS=1000)
+    def test_small_batches_stay_serial(self):
+        """Test that batches below the threshold do not start a pool."""
+        automaton = self.create('random_dfa')
+        with patch('core.models.simulate_parallel') as simulate:
+            automaton.simulate_many(self.strings, workers=2)
+        simulate.assert_not_called()
+
+
+@override_settings(CORE_HISTORY_BUFFER_SIZE=100, CORE_HISTORY_FLUSH_INTERVAL=3600)
+class UserHistoryBufferTest(TestCase):
+    """Test cases for buffered history logging."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.automaton = Automaton.objects.create(name="History", alphabet="a", owner=self.user)
+        history_buffer.take()
+        self.addCleanup(history_buffer.take)
+
+    def log(self, action, **details):
+        with self.captureOnCommitCallbacks(execute=True):
+            UserHistory.log_action(self.user, self.automaton, action, details=details)
+
+    def test_logging_does_not_validate(self):
+        """Test that logging uses the cached type and defers the write."""
+        with self.assertNumQueries(0):
+            self.log('edit', action_type='add_state')
+        self.assertEqual(self.automaton.cached_type, '')
+        self.assertFalse(UserHistory.objects.exists())
+
+        Automaton.objects.filter(pk=self.automaton.pk).update(cached_type='NFA')
+        self.assertEqual(UserHistory.flush_pending(), 1)
+        self.assertEqual(UserHistory.objects.get().automaton_type, 'NFA')
+
+    def test_consecutive_edits_are_coalesced(self):
+        """Test that a burst of edits becomes one row with aggregated details."""
+        self.log('edit', action_type='add_state')
+        self.log('edit', action_type='add_state')
+        self.log('edit', action_type='add_transition')
+        self.log('simulate', input_string='a')
+        self.log('edit', action_type='add_state')
+
+        with self.assertNumQueries(3):
+            self.assertEqual(UserHistory.flush_pending(), 3)
+        rows = list(UserHistory.objects.order_by('timestamp').values_list('action', 'details'))
+        self.assertEqual(rows[0], ('edit', {
+            'action_type': 'multiple',
+            'edit_count': 3,
+            'action_types': {'add_state': 2, 'add_transition': 1},
+        }))
+        self.assertEqual(rows[1][0], 'simulate')
+        self.assertEqual(rows[2], ('edit', {'action_type': 'add_state'}))
+
+    @override_settings(CORE_HISTORY_BUFFER_SIZE=2)
+    def test_flushes_when_full(self):
+        """Test that the buffer is written once it reaches its size."""
+        self.log('simulate', input_string='a')
+        self.assertFalse(UserHistory.objects.exists())
+        self.log('simulate', input_string='aa')
+        self.assertEqual(UserHistory.objects.count(), 2)
+
+    def test_rolled_back_actions_are_not_logged(self):
+        """Test that entries are only buffered once their transaction commits."""
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            UserHistory.log_action(self.user, self.automaton, 'edit')
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(UserHistory.flush_pending(), 0)
+
+    def test_dashboard_flushes_before_reading(self):
+        """Test that the dashboard shows entries still in the buffer."""
+        self.log('simulate', input_string='a')
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(reverse('core:dashboard'))
+        self.assertEqual(len(response.context['recent_history']), 1)
+        self.assertEqual(response.context['stats']['total_simulations'], 1)
+
+class GeneratorTest(TestCase):
+    """Test cases for the automaton generators."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+
+    def test_seeded_generation_is_reproducible(self):
+        """Test that the same seed gives the same automaton."""
+        params = GeneratorParams(alphabet_size=3, density=0.5, epsilon_ratio=0.2)
+        first = generate('random_nfa', 50, random.Random(7), params)
+        second = generate('random_nfa', 50, random.Random(7), params)
+        self.assertEqual(first.transitions, second.transitions)
+        self.assertEqual(first.states, second.states)
+        self.assertTrue(first.has_epsilon)
+
+    def test_save_uses_bulk_queries(self):
+        """Test that many automata are written with a fixed number of queries."""
+        rng = random.Random(0)
+        generated = [generate('random_dfa', 20, rng) for _ in range(30)]
+        # One INSERT per table and batch (SQLite batches by its parameter
+        # limit) and one UPDATE of the JSON, not queries per automaton
+        with CaptureQueriesContext(connection) as queries:
+            automata = save_automata(generated, [self.user] * 30)
+        self.assertLess(len(queries), 30)
+        self.assertEqual(sum(query['sql'].startswith('UPDATE') for query in queries.captured_queries), 1)
+
+        automaton = Automaton.objects.get(pk=automata[0].pk)
+        self.assertEqual(automaton.states.count(), 20)
+        self.assertEqual(automaton.get_type(), 'DFA')
+        stored = automaton.json_representation
+        automaton.update_json_representation()
+        self.assertEqual(stored, automaton.json_representation)
+
+    def test_worst_cases(self):
+        """Test the sizes of the subset construction and minimization worst cases."""
+        nfa, de_bruijn, redundant = save_automata([
+            generate('nth_from_end', 32, random.Random(0)),
+            generate('de_bruijn', 64, random.Random(0)),
+            generate('redundant_dfa', 40, random.Random(0)),
+        ], [self.user] * 3)
+
+        dfa, steps = nfa.to_dfa()
+        self.assertEqual(steps['dfa_state_count'], 32)
+
+        self.assertEqual(de_bruijn.states.count(), 64)
+        minimized, steps = de_bruijn.minimize()
+        self.assertEqual(minimized, de_bruijn)
+
+        minimized, steps = redundant.minimize()
+        self.assertLessEqual(steps['minimized_state_count'], 10)
+
+
 if __name__ == '__main__':
     import unittest
     unittest.main()
@@ -0,0 +1,83 @@
+"""
+Server-side cache of compact simulation traces.
+
+A simulation run with a compact trace stores the CompactTrace in the Django
+cache under a random id for ``CORE_TRACE_TTL`` seconds, and the editor pages
+through it with the trace endpoint instead of downloading the whole path.
+Traces are zlib-compressed JSON, and each window lists only the states and
+transitions its steps reference.
+
+The page requests of a trace can reach any worker process, so the cache
+alias named by ``CORE_TRACE_CACHE`` must be shared between them: a database
+or file-based cache (or memcached/redis), not the per-process LocMemCache.
+The project settings point it at a DatabaseCache, whose table is created with
+``python manage.py createcachetable``.
+"""
+import json
+import uuid
+import zlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .engine import CompactTrace
+
+DEFAULT_TRACE_TTL = 60 * 60
+DEFAULT_TRACE_CACHE = 'default'
+
+# Steps per trace window unless the request asks for fewer or more
+TRACE_PAGE_SIZE = 1000
+
+CACHE_KEY_PREFIX = 'core:trace:'
+
+
+def trace_ttl():
+    return getattr(settings, 'CORE_TRACE_TTL', DEFAULT_TRACE_TTL)
+
+
+def trace_cache():
+    return caches[getattr(settings, 'CORE_TRACE_CACHE', DEFAULT_TRACE_CACHE)]
+
+
+def store_trace(automaton_id, trace):
+    """Closes and caches the trace of a simulation of the automaton. Returns its id."""
+    trace.close()
+    trace_id = uuid.uuid4().hex
+    data = {'automaton_id': automaton_id, **trace.to_data()}
+    trace_cache().set(CACHE_KEY_PREFIX + trace_id, zlib.compress(json.dumps(data).encode('utf-8')), trace_ttl())
+    return trace_id
+
+
+def load_trace(automaton_id, trace_id):
+    """Returns the cached trace, or None if it expired or belongs to another automaton."""
+    packed = trace_cache().get(CACHE_KEY_PREFIX + trace_id)
+    if packed is None:
+        return None
+    data = json.loads(zlib.decompress(packed))
+    if data.pop('automaton_id') != automaton_id:
+        return None
+    return CompactTrace.from_data(data)
+
+
+def trace_window(trace, offset, limit):
+    """
+    Returns the steps ``offset`` to ``offset + limit`` of the trace as runs,
+    with the states and transitions they reference keyed by index.
+    """
+    runs = trace.window(offset, limit)
+    transitions = {index: trace.transitions[index] for block, _ in runs for index in block}
+    states = {}
+    for source, target, _, _ in transitions.values():
+        states[source] = trace.states[source]
+        states[target] = trace.states[target]
+    if offset == 0 and trace.start is not None:
+        states[trace.start] = trace.states[trace.start]
+    return {
+        'offset': offset,
+        'limit': limit,
+        'length': trace.length,
+        'start': trace.start,
+        'runs': runs,
+        'states': states,
+        'transitions': transitions,
+    }
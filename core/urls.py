@@ -22,11 +22,15 @@ urlpatterns = [
     path('api/automaton/<int:pk>/json/', views.get_automaton_json, name='get_automaton_json'),
     path('api/automaton/<int:pk>/symbols/', views.get_alphabet_symbols, name='get_alphabet_symbols'),
     path('api/automaton/<int:pk>/simulate/', views.simulate_string, name='simulate_string'),
+    path('api/automaton/<int:pk>/simulate-batch/', views.simulate_batch, name='simulate_batch'),
+    path('api/automaton/<int:pk>/simulate-stream/', views.simulate_stream, name='simulate_stream'),
+    path('api/automaton/<int:pk>/trace/<str:trace_id>/', views.simulation_trace, name='simulation_trace'),
     path('api/automaton/<int:pk>/add-state/', views.add_state, name='add_state'),
     path('api/automaton/<int:pk>/update-state/', views.update_state, name='update_state'),
     path('api/automaton/<int:pk>/delete-state/', views.delete_state, name='delete_state'),
     path('api/automaton/<int:pk>/add-transition/', views.add_transition, name='add_transition'),
     path('api/automaton/<int:pk>/delete-transition/', views.delete_transition, name='delete_transition'),
+    path('api/automaton/<int:pk>/edit-batch/', views.edit_batch, name='edit_batch'),
     
     # Advanced operations
     path('api/automaton/<int:pk>/to-dfa/', views.convert_nfa_to_dfa, name='convert_nfa_to_dfa'),
@@ -34,12 +38,21 @@ urlpatterns = [
     path('api/automaton/<int:pk>/is-dfa/', views.check_if_nfa_is_dfa, name='check_if_nfa_is_dfa'),
     path('api/automaton/<int:pk>/check-type/', views.check_fa_type, name='check_fa_type'),
     path('api/automaton/<int:pk>/enable-epsilon/', views.enable_epsilon, name='enable_epsilon'),
+    
+    # Background jobs
+    path('api/automaton/<int:pk>/to-dfa/submit/', views.submit_nfa_to_dfa, name='submit_nfa_to_dfa'),
+    path('api/automaton/<int:pk>/minimize/submit/', views.submit_minimize_dfa, name='submit_minimize_dfa'),
+    path('api/jobs/<int:job_id>/', views.job_status, name='job_status'),
+    path('api/automaton/<int:pk>/result-steps/<str:operation>/', views.result_steps, name='result_steps'),
     # Legacy endpoints
     path('api/nfa/<int:pk>/to-dfa/', views.convert_nfa_to_dfa, name='convert_nfa_to_dfa_legacy'),
     path('api/dfa/<int:pk>/minimize/', views.minimize_dfa, name='minimize_dfa_legacy'),
     path('api/nfa/<int:pk>/is-dfa/', views.check_if_nfa_is_dfa, name='check_if_nfa_is_dfa_legacy'),
     path('api/automaton/<int:pk>/check-fa-type/', views.check_fa_type, name='check_fa_type_legacy'),
     
+    # Admin-only request metrics
+    path('api/metrics/', views.metrics, name='metrics'),
+    
     # New standalone pages
     path('fa-checker/', views.FATypeCheckerView.as_view(), name='fa_type_checker'),
     path('conversion-tools/', views.ConversionToolsView.as_view(), name='conversion_tools'),
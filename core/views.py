@@ -1,89 +1,102 @@
+import codecs
 import json
 from django.shortcuts import render, get_object_or_404, redirect
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.http import JsonResponse, Http404, HttpResponseBadRequest
 from django.views.decorators.http import require_POST
 from django.db import transaction, IntegrityError
+from django.db.models import Count, Q
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.decorators import login_required
-from django.contrib.auth.models import User
-
-from .models import Automaton, State, Transition, UserHistory
+from django.contrib.admin.views.decorators import staff_member_required
+
+from .access import get_automaton_instance, get_system_user_id, visible_automata
+from .editing import EditBatch, EditError
+from .instrumentation import metrics_snapshot
+from .engine import BudgetExceeded
+from .jobs import (
+    REQUIRED_TYPES, budget_exceeded_data, job_status_data, perform_operation, submit_job
+)
+from .models import (
+    STEPS_PAGE_SIZE, Automaton, DerivedAutomaton, Job, ResultSteps, State, Transition, UserHistory,
+    patching_json, truncate_steps,
+)
+from .symbols import parse_symbol_class
+from .traces import TRACE_PAGE_SIZE, load_trace, store_trace, trace_window
+
+# Upper bound on the number of strings accepted by one batch simulation request
+MAX_BATCH_STRINGS = 100000
+
+# Bytes read from the request body per step of a streaming simulation
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Upper bound on the number of items returned by one result steps request
+MAX_STEPS_PAGE_SIZE = 1000
+
+# Upper bound on the number of steps returned by one trace window request
+MAX_TRACE_PAGE_SIZE = 100000
+
+OPERATION_TYPE_ERRORS = {
+    DerivedAutomaton.TO_DFA: 'Only NFA can be converted to DFA.',
+    DerivedAutomaton.MINIMIZE: 'Only DFA can be minimized.',
+}
+
+# Large stored structure columns that list pages do not use
+LIST_DEFERRED_FIELDS = ('packed_structure', 'json_representation')
 
 # --- Helper Function ---
-def get_automaton_instance(pk, user):
-    """Fetches the automaton instance, ensuring ownership or system access."""
-    try:
-        # Try to get user's own automaton first
-        return Automaton.objects.get(pk=pk, owner=user)
-    except Automaton.DoesNotExist:
-        # Try to get system examples (owner=None or system user)
-        try:
-            return Automaton.objects.get(pk=pk, owner=None)
-        except Automaton.DoesNotExist:
-            # Try system user examples
-            try:
-                system_user = User.objects.get(username='system')
-                return Automaton.objects.get(pk=pk, owner=system_user)
-            except (User.DoesNotExist, Automaton.DoesNotExist):
-                raise Http404("No Automaton found matching the query or you don't have permission.")
-
 def get_automaton_related_models(automaton):
     """Gets the State and Transition models for a given automaton instance."""
     return State, Transition
 
+def split_by_type(queryset):
+    """
+    Splits automata into DFAs and NFAs using the stored type column, after
+    classifying any automata whose type is not known yet in bulk. The stored
+    structure is not needed for listing, so it is not loaded.
+    """
+    Automaton.classify_untyped(queryset)
+    grouped = {'DFA': [], 'NFA': []}
+    for automaton in queryset.filter(cached_type__in=grouped).defer(*LIST_DEFERRED_FIELDS).order_by('pk'):
+        grouped[automaton.cached_type].append(automaton)
+    return {'dfas': grouped['DFA'], 'nfas': grouped['NFA']}
+
 # --- Class-Based Views for Pages ---
 class DashboardView(LoginRequiredMixin, ListView):
     template_name = 'automaton/dashboard.html'
     context_object_name = 'automatons'
 
     def get_queryset(self):
-        # Get user's own automata
-        user_automatons = Automaton.objects.filter(owner=self.request.user)
-        
-        # Get system examples (examples for everyone)
-        system_automatons = Automaton.objects.filter(owner=None)
-        
-        # Try to get examples from system user if exists
-        try:
-            system_user = User.objects.get(username='system')
-            system_automatons = system_automatons.union(Automaton.objects.filter(owner=system_user))
-        except User.DoesNotExist:
-            pass
-        
-        # Combine user's automata with system examples
-        all_automatons = user_automatons.union(system_automatons)
-        
-        # Separate by type
-        dfas = [a for a in all_automatons if a.get_type() == 'DFA']
-        nfas = [a for a in all_automatons if a.get_type() == 'NFA']
-        
-        return {'dfas': dfas, 'nfas': nfas}
+        # User's own automata combined with system examples, separated by type
+        return split_by_type(visible_automata(self.request.user))
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Add user history for dashboard
+        # Add user history for dashboard, including buffered entries
+        UserHistory.flush_pending()
         recent_history = UserHistory.objects.filter(
             user=self.request.user
         ).select_related('user')[:10]
         
         context['recent_history'] = recent_history
         
-        # Add statistics
-        user_automatons = Automaton.objects.filter(owner=self.request.user)
+        # Add statistics (the user's automata were classified by get_queryset)
+        history_counts = UserHistory.objects.filter(user=self.request.user).aggregate(
+            total_created=Count('pk', filter=Q(action='create')),
+            total_simulations=Count('pk', filter=Q(action='simulate')),
+        )
+        type_counts = {
+            row['cached_type']: row['count']
+            for row in Automaton.objects.filter(owner=self.request.user)
+            .values('cached_type').annotate(count=Count('pk')).order_by()
+        }
         context['stats'] = {
-            'total_created': UserHistory.objects.filter(
-                user=self.request.user, 
-                action='create'
-            ).count(),
-            'total_simulations': UserHistory.objects.filter(
-                user=self.request.user, 
-                action='simulate'
-            ).count(),
-            'dfas_count': len([a for a in user_automatons if a.get_type() == 'DFA']),
-            'nfas_count': len([a for a in user_automatons if a.get_type() == 'NFA']),
+            'total_created': history_counts['total_created'],
+            'total_simulations': history_counts['total_simulations'],
+            'dfas_count': type_counts.get('DFA', 0),
+            'nfas_count': type_counts.get('NFA', 0),
         }
         
         return context
@@ -93,18 +106,14 @@ class ExercisesListView(ListView):
     context_object_name = 'exercises'
 
     def get_queryset(self):
-        try:
-            system_user = User.objects.get(username='system')
-            automatons = Automaton.objects.filter(owner=system_user)
-            dfas = [a for a in automatons if a.get_type() == 'DFA']
-            nfas = [a for a in automatons if a.get_type() == 'NFA']
-            return {'dfas': dfas, 'nfas': nfas}
-        except User.DoesNotExist:
+        system_user_id = get_system_user_id()
+        if system_user_id is None:
             return {'dfas': [], 'nfas': []}
+        return split_by_type(Automaton.objects.filter(owner_id=system_user_id))
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        exercises = self.get_queryset()
+        exercises = self.object_list
         context['dfas'] = exercises['dfas']
         context['nfas'] = exercises['nfas']
         return context
@@ -118,8 +127,10 @@ class AutomatonDetailView(LoginRequiredMixin, DetailView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        automaton = self.get_object()
-        automaton_type = automaton.get_type()
+        automaton = self.object
+        # One validation serves both the type and the FA type check
+        report = automaton.validate()
+        automaton_type = automaton.get_type(report)
         context['is_nfa'] = automaton_type == 'NFA'
         context['is_dfa'] = automaton_type == 'DFA'
         
@@ -127,8 +138,8 @@ class AutomatonDetailView(LoginRequiredMixin, DetailView):
         
         # Add FA type check
         context['fa_type'] = automaton_type
-        is_dfa_valid, dfa_message = automaton.is_dfa()
-        is_nfa_valid, nfa_message = automaton.is_nfa()
+        is_dfa_valid, dfa_message = automaton.is_dfa(report)
+        is_nfa_valid, nfa_message = automaton.is_nfa(report)
         context['fa_type_valid'] = is_dfa_valid or is_nfa_valid
         context['fa_type_message'] = dfa_message if is_dfa_valid else nfa_message
         
@@ -241,6 +252,7 @@ class AutomatonDeleteView(LoginRequiredMixin, DeleteView):
 
 @login_required
 @require_POST
+@patching_json()
 def add_state(request, pk):
     automaton = get_automaton_instance(pk, request.user)
     StateModel, _ = get_automaton_related_models(automaton)
@@ -262,23 +274,28 @@ def add_state(request, pk):
         
         created_states = []
         existing_states = []
+        added_nodes = []
         
         for i, state_name in enumerate(state_names):
             try:
                 # Only make the first state in the list the start state if no states exist
                 is_start = is_first_state and i == 0
-                new_state = StateModel.objects.create(
-                    automaton=automaton, 
-                    name=state_name, 
-                    is_start=is_start
-                )
+                with transaction.atomic():
+                    new_state = StateModel.objects.create(
+                        automaton=automaton, 
+                        name=state_name, 
+                        is_start=is_start
+                    )
                 created_states.append(state_name)
+                added_nodes.append(Automaton.json_node(new_state))
             except IntegrityError:
                 existing_states.append(state_name)
         
-        # Auto-save: update JSON representation and save
-        automaton.update_json_representation()
-        automaton.save()
+        # Auto-save: patch the JSON representation with the new nodes, if any
+        if added_nodes:
+            delta = automaton.apply_json_delta(added_nodes=added_nodes)
+        else:
+            delta = Automaton.json_delta()
         
         # Log edit action only when states are actually created
         if created_states:
@@ -305,7 +322,8 @@ def add_state(request, pk):
             'status': 'ok' if created_states else 'warning',
             'message': message,
             'created_count': len(created_states),
-            'existing_count': len(existing_states)
+            'existing_count': len(existing_states),
+            'delta': delta
         })
         
     except Exception as e:
@@ -313,32 +331,39 @@ def add_state(request, pk):
 
 @login_required
 @require_POST
+@patching_json()
 def update_state(request, pk):
     data = json.loads(request.body)
     action = data.get('action')
-    StateModel, _ = get_automaton_related_models(get_automaton_instance(pk, request.user))
-    state = get_object_or_404(StateModel, pk=data.get('state_pk'))
+    automaton = get_automaton_instance(pk, request.user)
+    StateModel, _ = get_automaton_related_models(automaton)
+    state = get_object_or_404(StateModel, pk=data.get('state_pk'), automaton=automaton)
     
     with transaction.atomic():
         if action == 'toggle_final':
             state.is_final = not state.is_final
-            state.save()
+            state.save(update_fields=['is_final'])
+            updated_nodes = [{'id': state.name, 'is_final': state.is_final}]
         elif action == 'set_start':
             # Ensure only one start state
-            state.automaton.states.update(is_start=False)
+            previous_starts = list(
+                automaton.states.filter(is_start=True).exclude(pk=state.pk).values_list('name', flat=True)
+            )
+            automaton.states.update(is_start=False)
             state.is_start = True
-            state.save()
+            state.save(update_fields=['is_start'])
+            updated_nodes = [{'id': name, 'is_start': False} for name in previous_starts]
+            updated_nodes.append({'id': state.name, 'is_start': True})
         else:
             return JsonResponse({'status': 'error', 'message': 'Invalid action.'}, status=400)
     
-    # Auto-save: update JSON representation and save
-    state.automaton.update_json_representation()
-    state.automaton.save()
+    # Auto-save: patch the JSON representation with the changed flags
+    delta = automaton.apply_json_delta(updated_nodes=updated_nodes)
     
     # Log edit action
     UserHistory.log_action(
         user=request.user,
-        automaton=state.automaton,
+        automaton=automaton,
         action='edit',
         details={
             'action_type': f'update_state_{action}',
@@ -346,24 +371,25 @@ def update_state(request, pk):
         }
     )
     
-    return JsonResponse({'status': 'ok'})
+    return JsonResponse({'status': 'ok', 'delta': delta})
 
 @login_required
 @require_POST
+@patching_json()
 def delete_state(request, pk):
     data = json.loads(request.body)
-    StateModel, _ = get_automaton_related_models(get_automaton_instance(pk, request.user))
-    state = get_object_or_404(StateModel, pk=data.get('state_pk'))
-    automaton = state.automaton
+    automaton = get_automaton_instance(pk, request.user)
+    StateModel, _ = get_automaton_related_models(automaton)
+    state = get_object_or_404(StateModel, pk=data.get('state_pk'), automaton=automaton)
     state.delete()
     
-    # Auto-save: update JSON representation and save
-    automaton.update_json_representation()
-    automaton.save()
-    return JsonResponse({'status': 'ok'})
+    # Auto-save: drop the node and its edges from the JSON representation
+    delta = automaton.apply_json_delta(removed_nodes=[state.name])
+    return JsonResponse({'status': 'ok', 'delta': delta})
 
 @login_required
 @require_POST
+@patching_json()
 def add_transition(request, pk):
     automaton = get_automaton_instance(pk, request.user)
     StateModel, TransitionModel = get_automaton_related_models(automaton)
@@ -374,47 +400,42 @@ def add_transition(request, pk):
         to_state = StateModel.objects.get(pk=data.get('to_state'), automaton=automaton)
         symbol = data.get('symbol')
 
+        automaton_type = automaton.get_type()
+
         # Handle empty symbol as epsilon for NFA
-        if not symbol and automaton.get_type() == 'NFA':
+        if not symbol and automaton_type == 'NFA':
             symbol = 'ε'
         elif not symbol:
             return JsonResponse({'status': 'error', 'message': 'Symbol cannot be empty.'}, status=400)
 
-        # For NFA, allow epsilon transitions
-        if automaton.get_type() == 'NFA':
-            if symbol == 'ε' or symbol == '':
-                # Epsilon transition is always valid for NFA
-                pass
-            else:
-                # Handle multiple symbols (a,b format)
-                if ',' in symbol:
-                    symbols = [s.strip() for s in symbol.split(',') if s.strip()]
-                    for s in symbols:
-                        if s not in automaton.get_alphabet_as_set():
-                            return JsonResponse({'status': 'error', 'message': f"Symbol '{s}' is not in the alphabet."}, status=400)
-                else:
-                    if symbol not in automaton.get_alphabet_as_set():
-                        return JsonResponse({'status': 'error', 'message': f"Symbol '{symbol}' is not in the alphabet."}, status=400)
-        else:
-            # For DFA, check single symbol in alphabet
-            if symbol not in automaton.get_alphabet_as_set():
-                return JsonResponse({'status': 'error', 'message': f"Symbol '{symbol}' is not in the alphabet."}, status=400)
+        # Symbols may be lists and ranges (a,b or a-z), checked against the
+        # alphabet's intervals so that large alphabets are never expanded.
+        # Only NFAs allow epsilon
+        symbol_class = parse_symbol_class(symbol)
+        if symbol_class.epsilon and automaton_type != 'NFA':
+            return JsonResponse({'status': 'error', 'message': "Symbol 'ε' is not in the alphabet."}, status=400)
+        outside = symbol_class.without_epsilon().difference(automaton.get_alphabet_class())
+        if outside:
+            return JsonResponse(
+                {'status': 'error', 'message': f"Symbol '{next(iter(outside))}' is not in the alphabet."}, status=400
+            )
 
         # For DFAs, ensure no two transitions from the same state have the same symbol
-        if automaton.get_type() == 'DFA':
+        if automaton_type == 'DFA':
             existing_transitions = TransitionModel.objects.filter(
                 automaton=automaton, 
                 from_state=from_state
             )
             for trans in existing_transitions:
-                if trans.matches_symbol(symbol):
+                if trans.get_symbol_class().intersection(symbol_class):
                     return JsonResponse({'status': 'error', 'message': 'This DFA already has a transition for this state and symbol.'}, status=400)
 
-        TransitionModel.objects.create(automaton=automaton, from_state=from_state, to_state=to_state, symbol=symbol)
+        new_transition = TransitionModel.objects.create(automaton=automaton, from_state=from_state, to_state=to_state, symbol=symbol)
         
-        # Auto-save: update JSON representation and save
-        automaton.update_json_representation()
-        automaton.save()
+        # Auto-save: patch the JSON representation with the new edge
+        delta = automaton.apply_json_delta(
+            added_edges=[Automaton.json_edge(new_transition, from_state.name, to_state.name)]
+        )
         
         # Log edit action
         UserHistory.log_action(
@@ -429,7 +450,7 @@ def add_transition(request, pk):
             }
         )
         
-        return JsonResponse({'status': 'ok', 'message': 'Transition added.'})
+        return JsonResponse({'status': 'ok', 'message': 'Transition added.', 'delta': delta})
     except StateModel.DoesNotExist:
         return JsonResponse({'status': 'error', 'message': 'State not found.'}, status=404)
     except Exception as e:
@@ -437,30 +458,104 @@ def add_transition(request, pk):
 
 @login_required
 @require_POST
+@patching_json()
 def delete_transition(request, pk):
     data = json.loads(request.body)
-    _, TransitionModel = get_automaton_related_models(get_automaton_instance(pk, request.user))
-    transition = get_object_or_404(TransitionModel, pk=data.get('transition_pk'))
-    automaton = transition.automaton
+    automaton = get_automaton_instance(pk, request.user)
+    _, TransitionModel = get_automaton_related_models(automaton)
+    transition = get_object_or_404(TransitionModel, pk=data.get('transition_pk'), automaton=automaton)
+    transition_pk = transition.pk
     transition.delete()
     
-    # Auto-save: update JSON representation and save
-    automaton.update_json_representation()
-    automaton.save()
-    return JsonResponse({'status': 'ok'})
+    # Auto-save: drop the edge from the JSON representation
+    delta = automaton.apply_json_delta(removed_edges=[transition_pk])
+    return JsonResponse({'status': 'ok', 'delta': delta})
+
+@login_required
+@require_POST
+@patching_json()
+def edit_batch(request, pk):
+    """
+    Applies a list of edit operations (see core.editing) in one request.
+    Either every operation is applied or, if one is invalid or conflicts
+    with a concurrent edit, none is.
+    """
+    automaton = get_automaton_instance(pk, request.user)
+    try:
+        data = json.loads(request.body)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return JsonResponse({'status': 'error', 'message': 'Invalid JSON body.'}, status=400)
+    operations = data.get('operations') if isinstance(data, dict) else None
+
+    batch = EditBatch(automaton, operations)
+    try:
+        batch.validate()
+    except EditError as e:
+        return JsonResponse({'status': 'error', 'message': str(e), 'operation': e.index}, status=400)
+    try:
+        delta = batch.apply()
+    except IntegrityError:
+        # Another request changed the automaton between validation and the
+        # write, e.g. adding a state of the same name; nothing was applied
+        return JsonResponse({
+            'status': 'error',
+            'message': 'The automaton was changed by another edit. Reload it and try again.'
+        }, status=409)
+
+    UserHistory.log_action(
+        user=request.user,
+        automaton=automaton,
+        action='edit',
+        details={
+            'action_type': 'edit_batch',
+            'operations': batch.counts
+        }
+    )
+
+    return JsonResponse({
+        'status': 'ok',
+        'message': f"Applied {len(operations)} operation(s).",
+        'operations': batch.counts,
+        'delta': delta
+    })
 
 # --- Core Functionality Views ---
 
 @login_required
 def get_automaton_json(request, pk):
     automaton = get_automaton_instance(pk, request.user)
-    automaton.update_json_representation()
+    # Mutations keep the stored JSON current, so it is only rebuilt when
+    # missing or explicitly requested
+    if not automaton.json_representation or request.GET.get('refresh'):
+        automaton.update_json_representation()
     return JsonResponse(automaton.json_representation)
 
+def _trace_data(automaton, trace):
+    """Caches a compact trace and describes it with its first window."""
+    trace_id = store_trace(automaton.pk, trace)
+    return {
+        'id': trace_id,
+        'url': reverse('core:simulation_trace', kwargs={'pk': automaton.pk, 'trace_id': trace_id}),
+        **trace_window(trace, 0, TRACE_PAGE_SIZE),
+    }
+
 @login_required
 def simulate_string(request, pk):
     automaton = get_automaton_instance(pk, request.user)
     input_string = request.GET.get('input_string', '')
+
+    if request.GET.get('trace') == 'compact':
+        # Interned, run-length encoded path paged through simulation_trace
+        simulation = automaton.streaming_simulation(trace=True)
+        if simulation is None:
+            return JsonResponse({'accepted': False, 'message': "Cannot simulate invalid automaton", 'path': []})
+        simulation.feed(input_string)
+        result = simulation.result()
+        return JsonResponse({
+            'accepted': result['accepted'],
+            'message': result['message'],
+            'trace': _trace_data(automaton, simulation.trace),
+        })
     
     # The simulate method now returns detailed path information
     simulation_result = automaton.simulate(input_string)
@@ -477,123 +572,265 @@ def simulate_string(request, pk):
         'detailed_path': detailed_path
     })
 
+def _read_batch_input(request):
+    """
+    Reads the strings for a batch simulation from a JSON body
+    ({"strings": [...], "include_paths": true}), an uploaded newline-delimited
+    file ("file") or a plain text body with one string per line.
+    Returns (input_strings, include_paths); raises ValueError on bad input.
+    """
+    upload = request.FILES.get('file')
+    if upload is not None:
+        try:
+            input_strings = upload.read().decode('utf-8').splitlines()
+        except UnicodeDecodeError:
+            raise ValueError('Uploaded file must be UTF-8 text.')
+        include_paths = request.POST.get('include_paths') in ('1', 'true', 'on')
+    elif request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body)
+        except json.JSONDecodeError:
+            raise ValueError('Request body is not valid JSON.')
+        input_strings = data.get('strings') if isinstance(data, dict) else None
+        if not isinstance(input_strings, list) or not all(isinstance(s, str) for s in input_strings):
+            raise ValueError('"strings" must be a list of strings.')
+        include_paths = bool(data.get('include_paths'))
+    else:
+        input_strings = request.body.decode('utf-8', errors='replace').splitlines()
+        include_paths = request.GET.get('include_paths') in ('1', 'true')
+
+    if len(input_strings) > MAX_BATCH_STRINGS:
+        raise ValueError(f'At most {MAX_BATCH_STRINGS} strings can be simulated per request.')
+    return input_strings, include_paths
+
+@login_required
+@require_POST
+def simulate_batch(request, pk):
+    """Simulates many strings against one compiled copy of the automaton."""
+    automaton = get_automaton_instance(pk, request.user)
+    try:
+        input_strings, include_paths = _read_batch_input(request)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+    results = automaton.simulate_many(input_strings, include_paths=include_paths)
+    accepted_count = sum(1 for result in results if result['accepted'])
+
+    if request.GET.get('format') == 'html':
+        return render(request, 'automaton/bulk_test_results.html', {
+            'automaton': automaton,
+            'automaton_type': automaton.get_type().lower(),
+            'results': results,
+            'accepted_count': accepted_count,
+            'rejected_count': len(results) - accepted_count,
+            'error_count': 0,
+        })
+
+    return JsonResponse({
+        'status': 'ok',
+        'automaton_type': automaton.get_type(),
+        'count': len(results),
+        'accepted_count': accepted_count,
+        'rejected_count': len(results) - accepted_count,
+        'results': results
+    })
+
+def _iter_body_chunks(request, chunk_size):
+    """
+    Yields the request body in chunks without loading it into memory.
+    Django reads nothing from a body without Content-Length, so chunked
+    uploads are read from the WSGI input when the server marks it as
+    terminated.
+    """
+    if not request.META.get('CONTENT_LENGTH') and request.META.get('wsgi.input_terminated'):
+        stream = request.META['wsgi.input']
+    else:
+        stream = request
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+@login_required
+@require_POST
+def simulate_stream(request, pk):
+    """
+    Simulates one string sent as the raw UTF-8 request body, of any length.
+    The body is decoded and fed to the automaton chunk by chunk, so memory
+    use does not depend on the input length. Instead of the full path the
+    response can hold the state every ``checkpoint_every`` symbols and, with
+    ``path=rle``, the path as run-length encoded [state, count] runs, or
+    with ``path=trace`` a compact trace paged through simulation_trace.
+    """
+    automaton = get_automaton_instance(pk, request.user)
+    try:
+        checkpoint_every = int(request.GET.get('checkpoint_every', 0))
+    except ValueError:
+        checkpoint_every = -1
+    if checkpoint_every < 0:
+        return JsonResponse(
+            {'status': 'error', 'message': '"checkpoint_every" must be a non-negative integer.'}, status=400
+        )
+
+    path = request.GET.get('path')
+    simulation = automaton.streaming_simulation(
+        checkpoint_every=checkpoint_every, run_length=path == 'rle', trace=path == 'trace'
+    )
+    if simulation is None:
+        return JsonResponse({'status': 'error', 'message': 'Cannot simulate invalid automaton'}, status=400)
+
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        for chunk in _iter_body_chunks(request, STREAM_CHUNK_SIZE):
+            # Keep reading after the run stopped, so the client can finish sending
+            if not simulation.stopped:
+                simulation.feed(decoder.decode(chunk))
+        if not simulation.stopped:
+            simulation.feed(decoder.decode(b'', final=True))
+    except UnicodeDecodeError:
+        return JsonResponse({'status': 'error', 'message': 'Request body must be UTF-8 text.'}, status=400)
+
+    data = {'status': 'ok', 'automaton_type': automaton.get_type(), **simulation.result()}
+    if simulation.trace is not None:
+        data['trace'] = _trace_data(automaton, simulation.trace)
+    return JsonResponse(data)
+
+@login_required
+def simulation_trace(request, pk, trace_id):
+    """
+    Window of a cached compact trace, e.g. ?offset=5000&limit=1000 for the
+    steps 5000 to 5999, as [block, count] runs of transition indices.
+    """
+    automaton = get_automaton_instance(pk, request.user)
+    try:
+        offset = max(int(request.GET.get('offset', 0)), 0)
+        limit = min(max(int(request.GET.get('limit', TRACE_PAGE_SIZE)), 1), MAX_TRACE_PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'offset and limit must be integers.'}, status=400)
+
+    trace = load_trace(automaton.pk, trace_id)
+    if trace is None:
+        return JsonResponse({'status': 'error', 'message': 'Trace not found or expired.'}, status=404)
+    return JsonResponse({'status': 'ok', **trace_window(trace, offset, limit)})
+
 @login_required
 def get_alphabet_symbols(request, pk):
-    """Return alphabet symbols for the automaton."""
+    """
+    Return the alphabet as the parts of its canonical spec: single symbols,
+    and ranges such as a-z for runs of symbols, so large alphabets stay short.
+    """
     automaton = get_automaton_instance(pk, request.user)
-    alphabet = list(automaton.get_alphabet_as_set())
+    parts = automaton.get_alphabet_class().without_epsilon().parts()
     
     # If has_epsilon is True, always include epsilon option
-    if automaton.has_epsilon:
-        symbols = [{'value': 'ε', 'label': 'ε (epsilon)'}]
-        symbols.extend([{'value': symbol, 'label': symbol} for symbol in sorted(alphabet)])
-    else:
-        symbols = [{'value': symbol, 'label': symbol} for symbol in sorted(alphabet)]
+    symbols = [{'value': 'ε', 'label': 'ε (epsilon)'}] if automaton.has_epsilon else []
+    symbols.extend({'value': part, 'label': part} for part in parts)
     
     return JsonResponse({'symbols': symbols})
 
 # --- Placeholder Views for Future Implementation ---
-@login_required
-def convert_nfa_to_dfa(request, pk):
+def _run_operation(request, pk, operation):
+    """Runs a conversion or minimization in the request; the result page reads its steps from ResultSteps."""
     try:
         automaton = get_automaton_instance(pk, request.user)
         
-        if automaton.get_type() != 'NFA':
-            return JsonResponse({'status': 'error', 'message': 'Only NFA can be converted to DFA.'}, status=400)
-        
-        dfa, detailed_steps = automaton.to_dfa()
+        if automaton.get_type() != REQUIRED_TYPES[operation]:
+            return JsonResponse({'status': 'error', 'message': OPERATION_TYPE_ERRORS[operation]}, status=400)
         
-        # Store the detailed steps in the session for the result page
-        request.session[f'conversion_steps_{dfa.id}'] = detailed_steps
+        data, _, _ = perform_operation(operation, automaton, request.user)
         
-        # Log conversion action
-        UserHistory.log_action(
-            user=request.user,
-            automaton=automaton,
-            action='convert',
-            details={
-                'from_type': 'NFA',
-                'to_type': 'DFA',
-                'result_dfa_id': dfa.id,
-                'result_dfa_name': dfa.name,
-                'original_states': detailed_steps['nfa_state_count'],
-                'result_states': detailed_steps['dfa_state_count']
-            }
-        )
-        
-        return JsonResponse({
-            'status': 'success', 
-            'message': 'NFA successfully converted to DFA.',
-            'dfa_id': dfa.id,
-            'dfa_name': dfa.name,
-            'conversion_steps_url': f'/automata/automaton/{dfa.id}/conversion-result/'
-        })
+        return JsonResponse(data)
+    except BudgetExceeded as e:
+        return JsonResponse(budget_exceeded_data(e), status=422)
     except Exception as e:
         return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
 
+def _submit_operation(request, pk, operation):
+    """Queues a conversion or minimization as a background job."""
+    automaton = get_automaton_instance(pk, request.user)
+    
+    if automaton.get_type() != REQUIRED_TYPES[operation]:
+        return JsonResponse({'status': 'error', 'message': OPERATION_TYPE_ERRORS[operation]}, status=400)
+    
+    job = submit_job(operation, automaton, request.user)
+    return JsonResponse({
+        'status': 'accepted',
+        'job_id': job.pk,
+        'status_url': reverse('core:job_status', kwargs={'job_id': job.pk})
+    }, status=202)
+
+@login_required
+def convert_nfa_to_dfa(request, pk):
+    return _run_operation(request, pk, DerivedAutomaton.TO_DFA)
+
 @login_required
 def minimize_dfa(request, pk):
+    return _run_operation(request, pk, DerivedAutomaton.MINIMIZE)
+
+@login_required
+@require_POST
+def submit_nfa_to_dfa(request, pk):
+    return _submit_operation(request, pk, DerivedAutomaton.TO_DFA)
+
+@login_required
+@require_POST
+def submit_minimize_dfa(request, pk):
+    return _submit_operation(request, pk, DerivedAutomaton.MINIMIZE)
+
+@login_required
+def result_steps(request, pk, operation):
+    """
+    Page of one list in the detailed steps of a minimization or conversion,
+    e.g. ?path=steps.3.transitions&offset=200&limit=200. Result pages render
+    only the first STEPS_PAGE_SIZE items of each list.
+    """
+    automaton = get_automaton_instance(pk, request.user)
+    if operation not in REQUIRED_TYPES:
+        raise Http404("Unknown operation")
     try:
-        automaton = get_automaton_instance(pk, request.user)
-        
-        if automaton.get_type() != 'DFA':
-            return JsonResponse({'status': 'error', 'message': 'Only DFA can be minimized.'}, status=400)
-        
-        minimized_dfa, detailed_steps = automaton.minimize()
-        
-        # Store the detailed steps in the session for the result page
-        request.session[f'minimization_steps_{minimized_dfa.id}'] = detailed_steps
-        
-        # Log minimization action
-        UserHistory.log_action(
-            user=request.user,
-            automaton=automaton,
-            action='minimize',
-            details={
-                'original_states': detailed_steps['original_state_count'],
-                'minimized_states': detailed_steps['minimized_state_count'],
-                'was_already_minimal': minimized_dfa == automaton,
-                'result_dfa_id': minimized_dfa.id if minimized_dfa != automaton else automaton.id,
-                'reduction_percentage': detailed_steps.get('reduction_percentage', 0)
-            }
-        )
-        
-        if minimized_dfa == automaton:
-            return JsonResponse({
-                'status': 'info',
-                'message': 'DFA is already minimal.',
-                'minimization_steps_url': f'/automata/automaton/{automaton.id}/minimization-result/'
-            })
-        else:
-            return JsonResponse({
-                'status': 'success',
-                'message': 'DFA successfully minimized.',
-                'minimized_dfa_id': minimized_dfa.id,
-                'minimized_dfa_name': minimized_dfa.name,
-                'minimization_steps_url': f'/automata/automaton/{minimized_dfa.id}/minimization-result/'
-            })
-    except Exception as e:
-        return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
+        offset = max(int(request.GET.get('offset', 0)), 0)
+        limit = min(max(int(request.GET.get('limit', STEPS_PAGE_SIZE)), 1), MAX_STEPS_PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'offset and limit must be integers.'}, status=400)
+
+    try:
+        page = ResultSteps.page(operation, automaton, request.GET.get('path', ''), offset, limit)
+    except KeyError:
+        return JsonResponse({'status': 'error', 'message': 'No list at this path.'}, status=400)
+    if page is None:
+        return JsonResponse({'status': 'error', 'message': 'No stored steps for this automaton.'}, status=404)
+    return JsonResponse({'status': 'ok', **page, 'limit': limit})
+
+@login_required
+def job_status(request, job_id):
+    """Progress and outcome of a background job owned by the user."""
+    job = get_object_or_404(Job, pk=job_id, owner=request.user)
+    return JsonResponse(job_status_data(job))
 
 @login_required
 def check_if_nfa_is_dfa(request, pk):
     automaton = get_automaton_instance(pk, request.user)
-    is_dfa, message = automaton.is_dfa()
-    return JsonResponse({'is_dfa': is_dfa, 'message': message})
+    report = automaton.validate()
+    is_dfa, message = automaton.is_dfa(report)
+    return JsonResponse({'is_dfa': is_dfa, 'message': message, 'problems': report['dfa_problems']})
 
 @login_required
 def check_fa_type(request, pk):
     """Generic FA type checker for any automaton."""
     automaton = get_automaton_instance(pk, request.user)
-    fa_type = automaton.get_type()
-    is_dfa_valid, dfa_message = automaton.is_dfa()
-    is_nfa_valid, nfa_message = automaton.is_nfa()
+    report = automaton.validate()
+    fa_type = automaton.get_type(report)
+    is_dfa_valid, dfa_message = automaton.is_dfa(report)
+    is_nfa_valid, nfa_message = automaton.is_nfa(report)
     
     return JsonResponse({
         'fa_type': fa_type,
         'is_valid': is_dfa_valid or is_nfa_valid,
         'message': dfa_message if is_dfa_valid else nfa_message,
-        'current_type': fa_type
+        'current_type': fa_type,
+        'dfa_problems': report['dfa_problems'],
+        'nfa_problems': report['nfa_problems']
     })
 
 @login_required
@@ -609,6 +846,7 @@ def enable_epsilon(request, pk):
         # Enable epsilon transitions
         automaton.has_epsilon = True
         automaton.cached_type = ''  # Clear cached type to force re-evaluation
+        automaton.structure_hash = automaton.compute_structure_hash()
         automaton.save()
         
         # Log the action
@@ -636,85 +874,73 @@ class FATypeCheckerView(LoginRequiredMixin, ListView):
     context_object_name = 'automatons'
     
     def get_queryset(self):
-        user_automatons = Automaton.objects.filter(owner=self.request.user)
-        system_automatons = Automaton.objects.filter(owner=None)
-        
-        try:
-            system_user = User.objects.get(username='system')
-            system_automatons = system_automatons.union(Automaton.objects.filter(owner=system_user))
-        except User.DoesNotExist:
-            pass
-        
-        return user_automatons.union(system_automatons)
+        return visible_automata(self.request.user).defer(*LIST_DEFERRED_FIELDS)
 
 class ConversionToolsView(LoginRequiredMixin, ListView):
     template_name = 'automaton/conversion_tools.html'
     context_object_name = 'automatons'
     
     def get_queryset(self):
-        user_automatons = Automaton.objects.filter(owner=self.request.user)
-        system_automatons = Automaton.objects.filter(owner=None)
-        
-        try:
-            system_user = User.objects.get(username='system')
-            system_automatons = system_automatons.union(Automaton.objects.filter(owner=system_user))
-        except User.DoesNotExist:
-            pass
-        
-        all_automatons = user_automatons.union(system_automatons)
-        
-        dfas = [a for a in all_automatons if a.get_type() == 'DFA']
-        nfas = [a for a in all_automatons if a.get_type() == 'NFA']
-        
-        return {'dfas': dfas, 'nfas': nfas}
+        return split_by_type(visible_automata(self.request.user))
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        automatons = self.get_queryset()
+        automatons = self.object_list
         context['dfas'] = automatons['dfas']
         context['nfas'] = automatons['nfas']
         return context
 
 
-class MinimizationResultView(LoginRequiredMixin, DetailView):
+class ResultStepsMixin:
+    """
+    Adds the stored steps of ``operation`` for the automaton to the context,
+    with long lists cut to STEPS_PAGE_SIZE items; the rest is served by the
+    result_steps endpoint. When the full steps have expired only the summary
+    kept with the cached result is shown.
+    """
+    operation = None
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        automaton = self.object
+
+        detailed_steps = (
+            ResultSteps.load(self.operation, automaton)
+            or DerivedAutomaton.stored_steps(self.operation, automaton)
+        )
+        detailed_steps, truncated = truncate_steps(detailed_steps)
+
+        context['detailed_steps'] = detailed_steps
+        context['has_steps'] = bool(detailed_steps)
+        context['steps_truncated'] = truncated
+        context['steps_url'] = reverse(
+            'core:result_steps', kwargs={'pk': automaton.pk, 'operation': self.operation}
+        )
+
+        return context
+
+
+class MinimizationResultView(LoginRequiredMixin, ResultStepsMixin, DetailView):
     """View for displaying detailed minimization results."""
     template_name = 'automaton/minimization_result.html'
     context_object_name = 'automaton'
+    operation = DerivedAutomaton.MINIMIZE
     
     def get_object(self, queryset=None):
         return get_automaton_instance(self.kwargs.get('pk'), self.request.user)
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        automaton = self.get_object()
-        
-        # Get detailed steps from session
-        steps_key = f'minimization_steps_{automaton.id}'
-        detailed_steps = self.request.session.get(steps_key, {})
-        
-        context['detailed_steps'] = detailed_steps
-        context['has_steps'] = bool(detailed_steps)
-        
-        return context
 
 
-class ConversionResultView(LoginRequiredMixin, DetailView):
+class ConversionResultView(LoginRequiredMixin, ResultStepsMixin, DetailView):
     """View for displaying detailed NFA to DFA conversion results."""
     template_name = 'automaton/conversion_result.html'
     context_object_name = 'automaton'
+    operation = DerivedAutomaton.TO_DFA
     
     def get_object(self, queryset=None):
         return get_automaton_instance(self.kwargs.get('pk'), self.request.user)
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        automaton = self.get_object()
-        
-        # Get detailed steps from session
-        steps_key = f'conversion_steps_{automaton.id}'
-        detailed_steps = self.request.session.get(steps_key, {})
-        
-        context['detailed_steps'] = detailed_steps
-        context['has_steps'] = bool(detailed_steps)
-        
-        return context
+
+
+@staff_member_required
+def metrics(request):
+    """Per-endpoint histograms of query counts, DB/Python time and algorithm phases."""
+    return JsonResponse({'endpoints': metrics_snapshot()})